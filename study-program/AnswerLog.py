@@ -0,0 +1,198 @@
+import hashlib
+import os
+import struct
+import time
+import zlib
+
+import Question
+import QuizLoader
+
+# The directory holding each user's answer history
+ANSWER_DIR = 'answers'
+
+# Each record holds the time answered, the question's key, an identifier for
+#   the quiz file it came from, the milliseconds taken to answer, a bit for
+#   each chosen answer index, and whether the answer was correct
+RECORD = struct.Struct('<d12sIIQB3x')
+
+# Every INDEX_INTERVAL records, the record number and time are added to the
+#   index so a time range can be found without reading the whole log
+INDEX_INTERVAL = 4096
+INDEX_ENTRY = struct.Struct('<Qd')
+
+# Records read from the log at a time when scanning
+SCAN_RECORDS = 1 << 14
+
+
+class AnswerLog():
+    """A user's history of answered questions, in a fixed-width binary log.
+    
+    Every answer appends one 40 byte record to the log, so recording an
+        answer is a single small buffered write. Because records are a fixed
+        width, record 'n' is always at byte 'n * 40', and a separate index
+        holds the time of every 4096th record. Queries over a time range find
+        their starting block in the index and then unpack packed runs of
+        records, rather than decoding the whole history.
+    
+    Records are written in the order questions are answered. A record left
+        incomplete by a crash is discarded when the log is next opened, and
+        any index entries that are missing are rebuilt.
+    
+    Files used, for a log named 'user.log':
+        user.log: the answer records
+        user.log.idx: the index
+    
+    Arguments:
+        log_file: the file holding the log
+    """
+    
+    def __init__(self, log_file):
+    
+        self.log_file = log_file
+        self.index_file = log_file + '.idx'
+        self.log = open(log_file, 'ab')
+        self.index = open(self.index_file, 'ab')
+        self.Recover()
+    
+    
+    def AccuracyByBank(self, since=None):
+        """Return how often questions from each quiz file were answered right.
+        
+        Arguments:
+            since: only count answers given at or after this time
+                   (default: count every answer)
+        
+        Returns:
+            A dictionary mapping each file identifier, as returned by
+                'BankId', to a (correct answers, answers) tuple.
+        """
+        
+        totals = {}
+        for records in self.Scan(since):
+            for answered, _, bank, _, _, correct in records:
+                if since is not None and answered < since:
+                    continue
+                right, count = totals.get(bank, (0, 0))
+                totals[bank] = (right + correct, count + 1)
+        return totals
+    
+    
+    def Append(self, question, choices, correct, latency, now=None):
+        """Record an answered question.
+        
+        Arguments:
+            question: the Question that was answered
+            choices: the indices of the chosen answers
+            correct: 'True' if the answer was correct
+            latency: the seconds taken to answer
+            now: the time the question was answered (default: the current
+                 time)
+        """
+        
+        if now is None:
+            now = time.time()
+        self.log.write(RECORD.pack(now, bytes.fromhex(question.Key()),
+                                   BankId(question.source),
+                                   min(int(latency * 1000), 0xffffffff),
+                                   Question.ChoiceMask(choices),
+                                   bool(correct)))
+        self.log.flush()
+        
+        self.count += 1
+        if self.count % INDEX_INTERVAL == 0:
+            self.index.write(INDEX_ENTRY.pack(self.count, now))
+            self.index.flush()
+    
+    
+    def Close(self):
+        """Close the log and its index."""
+        
+        self.log.close()
+        self.index.close()
+    
+    
+    def Recover(self):
+        """Discard any incomplete record and rebuild missing index entries."""
+        
+        size = os.path.getsize(self.log_file)
+        if size % RECORD.size:
+            size -= size % RECORD.size
+            self.log.truncate(size)
+        self.count = size // RECORD.size
+        
+        index_size = os.path.getsize(self.index_file)
+        index_size -= index_size % INDEX_ENTRY.size
+        self.index.truncate(index_size)
+        indexed = index_size // INDEX_ENTRY.size
+        if indexed > self.count // INDEX_INTERVAL:
+            # The log lost records the index still refers to
+            indexed = self.count // INDEX_INTERVAL
+            self.index.truncate(indexed * INDEX_ENTRY.size)
+        
+        with open(self.log_file, 'rb') as infile:
+            for block in range(indexed + 1, self.count // INDEX_INTERVAL + 1):
+                number = block * INDEX_INTERVAL
+                infile.seek((number - 1) * RECORD.size)
+                answered = RECORD.unpack(infile.read(RECORD.size))[0]
+                self.index.write(INDEX_ENTRY.pack(number, answered))
+        self.index.flush()
+    
+    
+    def Scan(self, since=None):
+        """Yield the log's records in runs, starting near a given time.
+        
+        Arguments:
+            since: skip the blocks of records answered entirely before this
+                   time (default: start at the first record)
+        
+        Yields:
+            Lists of (time, question key bytes, file identifier, latency in
+                milliseconds, chosen answer bits, correct) tuples. Runs may
+                begin with records older than 'since'.
+        """
+        
+        self.log.flush()
+        start = 0
+        if since is not None:
+            with open(self.index_file, 'rb') as infile:
+                index = infile.read()
+            for number, answered in INDEX_ENTRY.iter_unpack(index):
+                if answered >= since:
+                    break
+                start = number
+        
+        with open(self.log_file, 'rb') as infile:
+            infile.seek(start * RECORD.size)
+            while True:
+                data = infile.read(SCAN_RECORDS * RECORD.size)
+                data = data[:len(data) - len(data) % RECORD.size]
+                if not data:
+                    return
+                yield list(RECORD.iter_unpack(data))
+
+
+def BankId(path):
+    """Return the 32 bit identifier recorded for a quiz file."""
+    
+    if path is None:
+        return 0
+    return zlib.crc32(QuizLoader.PathKey(path).encode('utf-8'))
+
+
+def LoadAnswerLog(username):
+    """Open a user's answer history.
+    
+    Arguments:
+        username: the user whose history is opened
+    
+    Returns:
+        The user's AnswerLog, or 'None' if it couldn't be opened, and an
+            error message or 'None'.
+    """
+    
+    digest = hashlib.sha1(username.encode('utf-8')).hexdigest()
+    try:
+        os.makedirs(ANSWER_DIR, exist_ok=True)
+        return AnswerLog(os.path.join(ANSWER_DIR, digest + '.log')), None
+    except:
+        return None, f'Unable to load data from {ANSWER_DIR}'
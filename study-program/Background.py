@@ -0,0 +1,166 @@
+import queue
+import threading
+import time
+from tkinter import messagebox
+
+# Milliseconds between checks for a finished background task
+POLL_INTERVAL = 20
+
+
+class BackgroundTask():
+    """Run a function on a worker thread and report back on the Tk thread.
+    
+    Tk widgets may only be used from the thread running the main loop, so
+        the worker never calls back directly. Instead the result is placed
+        on a queue that the Tk thread checks with 'after' callbacks, and the
+        completion callback runs on the Tk thread once the result arrives.
+    
+    Arguments:
+        widget: any widget whose 'after' method is used for polling
+        func: the function to run on the worker thread, which must not touch
+              any Tk widgets or variables
+        on_done: called with the function's return value on the Tk thread
+        on_error: called with the exception if the function raises
+                  (default: show an error message box)
+    """
+    
+    def __init__(self, widget, func, on_done, on_error=None):
+    
+        self.widget = widget
+        self.on_done = on_done
+        self.on_error = on_error
+        self.results = queue.Queue(maxsize=1)
+        
+        thread = threading.Thread(target=self.Run, args=(func,), daemon=True)
+        thread.start()
+        self.widget.after(POLL_INTERVAL, self.Poll)
+    
+    
+    def Poll(self):
+        """Deliver the worker's result, or check again later."""
+        
+        try:
+            succeeded, value = self.results.get_nowait()
+        except queue.Empty:
+            self.widget.after(POLL_INTERVAL, self.Poll)
+            return
+        
+        if succeeded:
+            self.on_done(value)
+        elif self.on_error is not None:
+            self.on_error(value)
+        else:
+            messagebox.showerror('Error', 'Unexpected error encountered.')
+    
+    
+    def Run(self, func):
+        """Call the function on the worker thread and queue its outcome."""
+        
+        try:
+            self.results.put((True, func()))
+        except Exception as e:
+            self.results.put((False, e))
+
+
+class CoalescingWriter():
+    """Save values on a background thread, writing only the latest of each.
+    
+    Values submitted for the same key before the writer gets to them replace
+        one another, so a burst of saves results in a single write. Errors
+        raised while writing are collected and returned by 'Flush' and
+        'Close'.
+    
+    Arguments:
+        write: called on the writer thread with each key and value to save
+        delay: seconds to wait after a submission for more submissions to
+               arrive before writing (default: 0.2)
+    """
+    
+    def __init__(self, write, delay=0.2):
+    
+        self.write = write
+        self.delay = delay
+        self.pending = {}
+        self.errors = []
+        self.writing = False
+        self.flushing = False
+        self.closed = False
+        self.condition = threading.Condition()
+        
+        self.thread = threading.Thread(target=self.Run, daemon=True)
+        self.thread.start()
+    
+    
+    def Close(self):
+        """Write any pending values and stop the writer thread.
+        
+        Returns:
+            A list of the exceptions raised while writing.
+        """
+        
+        errors = self.Flush()
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+        return errors
+    
+    
+    def Flush(self):
+        """Block until every submitted value has been written.
+        
+        Returns:
+            A list of the exceptions raised while writing since the last
+                flush.
+        """
+        
+        with self.condition:
+            self.flushing = True
+            self.condition.notify_all()
+            while self.pending or self.writing:
+                self.condition.wait()
+            self.flushing = False
+            errors = self.errors
+            self.errors = []
+            return errors
+    
+    
+    def Run(self):
+        """Write pending values until the writer is closed."""
+        
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                
+                # Give a burst of saves the chance to finish arriving
+                deadline = time.monotonic() + self.delay
+                while not self.flushing and not self.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                pending = self.pending
+                self.pending = {}
+                self.writing = True
+            
+            for key, value in pending.items():
+                try:
+                    self.write(key, value)
+                except Exception as e:
+                    with self.condition:
+                        self.errors.append(e)
+            
+            with self.condition:
+                self.writing = False
+                self.condition.notify_all()
+    
+    
+    def Submit(self, key, value):
+        """Queue a value to be written, replacing any pending value for key."""
+        
+        with self.condition:
+            self.pending[key] = value
+            self.condition.notify_all()
@@ -0,0 +1,136 @@
+import hashlib
+import marshal
+import os
+
+# Default limit on the total size of the cache directory
+MAX_CACHE_BYTES = 512 << 20
+
+# Identifies cache files written by this version of the cache
+CACHE_MAGIC = b'QBC4'
+
+
+class BankCache():
+    """On-disk cache of decoded and validated quiz files.
+    
+    Each cached quiz file is stored in marshal format under a name derived
+        from its absolute path, size, and modification time, so editing a
+        quiz file makes its old entry unreachable. Reading a cache entry
+        refreshes its modification time, and the least recently used entries
+        are removed whenever the cache grows past its size limit.
+    """
+    
+    def __init__(self, cache_dir, max_bytes=MAX_CACHE_BYTES):
+    
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+    
+    
+    def CachePath(self, key):
+        """Return the cache file path used for a key."""
+        
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest + '.bin')
+    
+    
+    def Evict(self):
+        """Remove least recently used entries until the cache fits."""
+        
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith('.bin'):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((st.st_mtime_ns, st.st_size, entry.path))
+                    total += st.st_size
+        except FileNotFoundError:
+            return
+        
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+    
+    
+    def Get(self, path, st):
+        """Retrieve the cached questions for a quiz file.
+        
+        Arguments:
+            path: the quiz file's path
+            st: the quiz file's current 'os.stat' result
+        
+        Returns:
+            The list of question records, or 'None' if the file isn't cached.
+        """
+        
+        key = Key(path, st)
+        cache_file = self.CachePath(key)
+        try:
+            with open(cache_file, 'rb') as infile:
+                if infile.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                    return None
+                stored_key, questions = marshal.load(infile)
+        except (IOError, EOFError, ValueError, TypeError):
+            return None
+        if tuple(stored_key) != key:
+            return None
+        
+        # Mark the entry as recently used
+        try:
+            os.utime(cache_file)
+        except OSError:
+            pass
+        return questions
+    
+    
+    def Put(self, path, st, questions):
+        """Store the questions decoded from a quiz file.
+        
+        Arguments:
+            path: the quiz file's path
+            st: the 'os.stat' result taken before the file was read
+            questions: a list of question records made by 'Question.Record'
+        """
+        
+        key = Key(path, st)
+        cache_file = self.CachePath(key)
+        temp_file = f'{cache_file}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(temp_file, 'wb') as outfile:
+                outfile.write(CACHE_MAGIC)
+                marshal.dump((key, questions), outfile)
+            os.replace(temp_file, cache_file)
+        except (IOError, ValueError):
+            # Caching is best-effort, the quiz file is still usable
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+            return
+        
+        self.Evict()
+
+
+def Key(path, st):
+    """Return the cache key for a quiz file.
+    
+    Arguments:
+        path: the quiz file's path
+        st: the quiz file's 'os.stat' result
+    
+    Returns:
+        A tuple of the absolute path, size, and modification time.
+    """
+    
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
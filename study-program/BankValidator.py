@@ -0,0 +1,484 @@
+"""Check quiz files against the format written by 'CreateDBWindow'.
+
+Every record is checked in a single pass for the problems that would
+    otherwise surface in the middle of a quiz: missing answers, a
+    'NumOfAnswers' that doesn't match the answers present, a 'Correct' value
+    that matches no answer, and a 'Type' that disagrees with 'Correct'. Large
+    sets of files are checked on several processes at once, and a large file
+    is split into ranges of records so a single file is spread across the
+    processes too.
+
+Usage:
+    python BankValidator.py PATH [PATH ...] [--workers N] [--json]
+
+Each PATH may be a quiz file or a folder, which is searched for '.json'
+    files. The exit status is 1 if any problems were found.
+"""
+
+import argparse
+import codecs
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import sys
+
+import QuizLoader
+
+# Answer field names, built once rather than for every record
+MAX_ANSWERS = 64
+ANSWER_KEYS = tuple('Answer' + str(i) for i in range(1, MAX_ANSWERS + 2))
+
+# Maximum number of problems reported for a single file
+MAX_ERRORS = 1000
+
+# Files are only checked on other processes if there are at least this many
+#   bytes to check, since starting the processes takes time
+PARALLEL_BYTES = 1 << 24
+
+# Files larger than this are split into ranges of this many bytes when they're
+#   checked on other processes
+SPLIT_BYTES = 1 << 20
+
+# Number of bytes read at a time past the end of a range, to finish its last
+#   record
+READ_BYTES = 1 << 16
+
+
+def CheckEntry(entry):
+    """Return every problem found with a quiz entry.
+    
+    Arguments:
+        entry: a decoded quiz file entry
+    
+    Returns:
+        A list of messages describing each problem, which is empty if the
+            entry is valid.
+    """
+    
+    if type(entry) is not dict:
+        return ['Entry is not a dictionary']
+    errors = []
+    get = entry.get
+    
+    q_type = get('Type')
+    if q_type != 'single' and q_type != 'multi':
+        errors.append(f'Invalid question type {q_type!r}')
+    question = get('Question')
+    if type(question) is not str or not question:
+        errors.append('Missing question text')
+    
+    # Collect the answers, checking 'NumOfAnswers' against the answer fields
+    num_answers = get('NumOfAnswers')
+    if type(num_answers) is not int or not 1 <= num_answers <= MAX_ANSWERS:
+        errors.append(f'Invalid NumOfAnswers {num_answers!r}')
+        return errors
+    answers = set()
+    char_count = 0
+    for key in ANSWER_KEYS[:num_answers]:
+        answer = get(key)
+        if type(answer) is not str or not answer:
+            errors.append(f'Missing {key}')
+            char_count = None
+            continue
+        answers.add(answer)
+        if char_count is not None:
+            char_count += len(answer)
+    if ANSWER_KEYS[num_answers] in entry:
+        errors.append(f'NumOfAnswers is {num_answers} but '
+                      f'{ANSWER_KEYS[num_answers]} is present')
+    count = get('CharCount')
+    if count is not None and char_count is not None and count != char_count:
+        errors.append(f'CharCount is {count!r} but the answers hold '
+                      f'{char_count} characters')
+    
+    # A single answer question has one correct answer string, and a multiple
+    #   answer question has a list of several
+    correct = get('Correct')
+    if type(correct) is str:
+        if q_type == 'multi':
+            errors.append('Type is multi but Correct is a single answer')
+        correct = (correct,)
+    elif type(correct) is list and correct:
+        if q_type == 'single':
+            errors.append('Type is single but Correct is a list')
+        elif len(correct) < 2:
+            errors.append('Type is multi but Correct has one answer')
+    else:
+        errors.append('Missing Correct')
+        return errors
+    for answer in correct:
+        if answer not in answers:
+            errors.append(f'Correct answer {answer!r} matches no answer')
+    return errors
+
+
+def FindFiles(paths):
+    """Expand folders into the '.json' files they contain.
+    
+    Arguments:
+        paths: quiz files and folders
+    
+    Returns:
+        A list of quiz file paths.
+    """
+    
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if name.lower().endswith('.json'):
+                    files.append(os.path.join(dirpath, name))
+    return files
+
+
+def MergeRanges(path, ranges):
+    """Combine the reports on a file's ranges into a report on the file.
+    
+    Each range after the first finds its first record by searching for one,
+        so the ranges are only combined if every range began at the record
+        where the range before it stopped and the last range reached the end
+        of the array.
+    
+    Arguments:
+        path: the quiz file the ranges were read from
+        ranges: the results of 'ValidateRange' for each range, in order
+    
+    Returns:
+        A report, as returned by 'ValidateFile', or 'None' if the ranges
+            don't join up and the file must be checked as a whole.
+    """
+    
+    report = {'path': path, 'records': 0, 'errors': [], 'truncated': 0,
+              'error': None}
+    errors = report['errors']
+    expected = None
+    closed = False
+    for number, result in enumerate(ranges, 0):
+        if result is None:
+            return None
+        if result['first'] is None:
+            continue
+        if closed or (number and result['first'] != expected):
+            return None
+        for index, message in result['errors']:
+            if len(errors) < MAX_ERRORS:
+                errors.append((report['records'] + index, message))
+            else:
+                report['truncated'] += 1
+        report['truncated'] += result['truncated']
+        report['records'] += result['records']
+        expected = result['next']
+        closed = expected is None
+    if not closed or not report['records']:
+        return None
+    return report
+
+
+def PrintReport(reports, outfile=sys.stdout):
+    """Print one line for each problem found, followed by a summary."""
+    
+    records = 0
+    problems = 0
+    for report in reports:
+        records += report['records']
+        for problem in ReportProblems(report):
+            problems += 1
+            print(f'{report["path"]}: {problem}', file=outfile)
+        if report['truncated']:
+            print(f'{report["path"]}: {report["truncated"]} more problems '
+                  'not shown', file=outfile)
+            problems += report['truncated']
+    print(f'{len(reports)} file(s), {records} record(s), {problems} '
+          'problem(s)', file=outfile)
+
+
+def ReportProblems(report):
+    """Return a message for each problem listed in a report.
+    
+    Arguments:
+        report: a report, as returned by 'ValidateFile'
+    
+    Returns:
+        A list of messages, starting with any file level error, followed by
+            each record's problems in the form 'record N: problem'. Problems
+            'truncated' from the report aren't included.
+    """
+    
+    problems = []
+    if report['error']:
+        problems.append(report['error'])
+    for index, message in report['errors']:
+        problems.append(f'record {index}: {message}')
+    return problems
+
+
+def ValidateFile(path):
+    """Check every record of a quiz file.
+    
+    Arguments:
+        path: the quiz file to check
+    
+    Returns:
+        A report dictionary holding the file's 'path', the number of
+            'records' read, a list of (record index, message) 'errors', the
+            number of problems 'truncated' from that list, and a file level
+            'error' message or 'None'. Record indices start at 0.
+    """
+    
+    report = {'path': path, 'records': 0, 'errors': [], 'truncated': 0,
+              'error': None}
+    errors = report['errors']
+    records = 0
+    try:
+        for entry in QuizLoader.IterQuestions(path):
+            problems = CheckEntry(entry)
+            for message in problems:
+                if len(errors) < MAX_ERRORS:
+                    errors.append((records, message))
+                else:
+                    report['truncated'] += 1
+            records += 1
+        if not records:
+            report['error'] = 'File holds no questions'
+    except (OSError, ValueError) as e:
+        report['error'] = f'Unable to read the file: {e}'
+    report['records'] = records
+    return report
+
+
+def ValidateFiles(paths, workers=None):
+    """Check every record of several quiz files.
+    
+    Files are spread across a pool of processes when there is enough data to
+        make starting them worthwhile. Files larger than 'SPLIT_BYTES' are
+        split into ranges, as checked by 'ValidateRange', so the records of a
+        single large file are checked on several processes. A file whose
+        ranges don't join up, such as a file that isn't a valid JSON array,
+        is checked again as a whole so its report matches 'ValidateFile'.
+    
+    Arguments:
+        paths: the quiz files to check
+        workers: the number of processes to use (default: one per CPU)
+    
+    Returns:
+        A list of reports, as returned by 'ValidateFile', in the order of
+            'paths'.
+    """
+    
+    sizes = []
+    for path in paths:
+        try:
+            sizes.append(os.path.getsize(path))
+        except OSError:
+            sizes.append(0)
+    
+    if workers == 1 or sum(sizes) < PARALLEL_BYTES:
+        return [ValidateFile(path) for path in paths]
+    
+    # Each task is a whole file, or a range of bytes within a large file
+    tasks = []
+    for path, size in zip(paths, sizes):
+        if size > SPLIT_BYTES:
+            tasks.extend((path, start, min(start + SPLIT_BYTES, size))
+                         for start in range(0, size, SPLIT_BYTES))
+        else:
+            tasks.append((path, None, None))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(ValidateTask, tasks))
+    
+    reports = []
+    position = 0
+    for path, size in zip(paths, sizes):
+        if size > SPLIT_BYTES:
+            count = len(range(0, size, SPLIT_BYTES))
+            report = MergeRanges(path, results[position:position+count])
+            if report is None:
+                report = ValidateFile(path)
+        else:
+            count = 1
+            report = results[position]
+        reports.append(report)
+        position += count
+    return reports
+
+
+def ValidateRange(path, start, end):
+    """Check the records of a quiz file that begin within a range of bytes.
+    
+    The first range begins at the start of the file's JSON array. Any other
+        range begins at its first '{' that decodes as a dictionary followed
+        by ',' or ']', which 'MergeRanges' confirms is where the previous
+        range stopped. Records are checked until one begins at or after
+        'end', reading past 'end' to finish the last record.
+    
+    Arguments:
+        path: the quiz file to check
+        start: the offset of the first byte of the range
+        end: the offset of the byte following the range
+    
+    Returns:
+        A dictionary holding the byte offset of the 'first' record checked,
+            or 'None' if no record begins within the range, the offset of
+            the 'next' record, or 'None' if the array ended, and the
+            'records', 'errors', and 'truncated' entries of a report, with
+            records counted from the start of the range. 'None' if the range
+            couldn't be read as part of a JSON array.
+    """
+    
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    result = {'first': None, 'next': None, 'records': 0, 'errors': [],
+              'truncated': 0}
+    try:
+        infile = open(path, 'rb')
+    except OSError:
+        return None
+    
+    with infile:
+        infile.seek(start)
+        data = infile.read(end - start)
+        
+        # Skip the rest of a character split by the start of the range
+        lead = 0
+        while lead < len(data) and 0x80 <= data[lead] < 0xc0:
+            lead += 1
+        buffer = utf8.decode(data[lead:])
+        pos = 0
+        eof = False
+        
+        # Characters before this position in the buffer begin within the
+        #   range. Any character split by 'end' is held back by the decoder
+        limit = len(buffer)
+        
+        def Decode():
+            """Decode the value at 'pos', reading more if it's cut off."""
+            while True:
+                try:
+                    value, index = decoder.raw_decode(buffer, pos)
+                except ValueError:
+                    if eof or not Fill():
+                        raise
+                    continue
+                if index == len(buffer) and not eof and Fill():
+                    # A value ending at the buffer edge may be truncated
+                    continue
+                return value, index
+        
+        def Fill():
+            """Read past the range, returning 'False' at the end of file."""
+            nonlocal buffer, eof
+            data = infile.read(READ_BYTES)
+            if not data:
+                eof = True
+                return False
+            buffer += utf8.decode(data)
+            return True
+        
+        def NextChar():
+            """Skip whitespace and return the next character, if any."""
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos].isspace():
+                    pos += 1
+                if pos < len(buffer):
+                    return buffer[pos]
+                if not Fill():
+                    return ''
+        
+        def Offset(index):
+            """Return the byte offset of a position in the buffer."""
+            return start + lead + len(buffer[:index].encode('utf-8'))
+        
+        try:
+            if start == 0:
+                if NextChar() != '[':
+                    return None
+                pos += 1
+                if NextChar() == ']':
+                    return result
+            else:
+                # Find the first record that begins within the range
+                while True:
+                    index = buffer.find('{', pos, limit)
+                    if index < 0:
+                        return result
+                    pos = index
+                    try:
+                        entry, pos = Decode()
+                    except ValueError:
+                        pos = index + 1
+                        continue
+                    if type(entry) is dict and NextChar() in (',', ']'):
+                        pos = index
+                        break
+                    pos = index + 1
+            
+            result['first'] = Offset(pos)
+            errors = result['errors']
+            while True:
+                entry, pos = Decode()
+                for message in CheckEntry(entry):
+                    if len(errors) < MAX_ERRORS:
+                        errors.append((result['records'], message))
+                    else:
+                        result['truncated'] += 1
+                result['records'] += 1
+                
+                char = NextChar()
+                if char == ']':
+                    return result
+                if char != ',':
+                    return None
+                pos += 1
+                NextChar()
+                if pos >= limit:
+                    result['next'] = Offset(pos)
+                    return result
+        except (OSError, ValueError):
+            return None
+
+
+def ValidateTask(task):
+    """Check a whole quiz file or a range of one on a worker process.
+    
+    Arguments:
+        task: a (path, start, end) tuple, where 'start' and 'end' are 'None'
+              to check the whole file
+    
+    Returns:
+        The result of 'ValidateFile' or 'ValidateRange'.
+    """
+    
+    path, start, end = task
+    if start is None:
+        return ValidateFile(path)
+    return ValidateRange(path, start, end)
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='+',
+                        help='quiz files, or folders holding quiz files')
+    parser.add_argument('--workers', type=int,
+                        help='processes used to check files')
+    parser.add_argument('--json', action='store_true',
+                        help='print the reports as JSON')
+    args = parser.parse_args(argv)
+    
+    reports = ValidateFiles(FindFiles(args.paths), workers=args.workers)
+    if args.json:
+        json.dump(reports, sys.stdout, indent=4)
+        print()
+    else:
+        PrintReport(reports)
+    
+    failed = any(report['error'] or report['errors'] for report in reports)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,345 @@
+"""Grade a batch of answer sheets against quiz files.
+
+Answer sheets are read from a CSV file with one row per student. The first
+    column holds the student's name, and each other column holds the answers
+    given to one question. A column is headed either by the question's
+    number, counting from 1 through the quiz files in the order given, or by
+    the question's ID as returned by 'Question.Key'. Answers are written as
+    answer numbers, counting from 1 in the order the answers appear in the
+    quiz file, separated by spaces or semicolons. A blank cell means the
+    question wasn't answered.
+
+Sheets are graded the same way as answers given in a quiz window: a question
+    left blank isn't counted, a single-answer question is graded on the first
+    answer listed, and a multiple-answer question is correct only if exactly
+    the correct answers were given. Each student's score is the fraction of
+    answered questions answered correctly.
+
+NumPy is used to grade many sheets at once when it's installed. Without it,
+    sheets are graded one at a time with the same results.
+
+Usage:
+    python BatchGrader.py SHEET_FILE QUIZ_FILE [QUIZ_FILE ...] [--json]
+"""
+
+import argparse
+import csv
+import json
+import re
+import sys
+
+import Question
+import QuizLoader
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Question IDs are 24 hexadecimal digits
+KEY_PATTERN = re.compile('[0-9a-f]{24}')
+
+# Chosen answers are encoded as 64 bit masks, so questions with more answers
+#   are graded without NumPy
+MAX_ENCODED_ANSWERS = 64
+
+# Maximum number of answers graded at once, which bounds the memory used to
+#   grade a large batch of sheets
+CHUNK_CELLS = 1 << 24
+
+
+class AnswerKey():
+    """The correct answers to a list of questions, ready for grading.
+    
+    The correct answers are kept as a boolean matrix with a row for each
+        question and a column for each answer index, where an entry is true
+        if that answer is correct. Each row is also packed into a bitmask of
+        its correct answers, and a sheet is a list holding a bitmask of the
+        answers chosen for each question, as returned by 'Mask'. A batch of
+        sheets is then a matrix with a row per sheet and a column per
+        question, and every sheet in the batch is graded with a few
+        whole-matrix comparisons against the key.
+    
+    Arguments:
+        questions: the Questions to grade, in sheet order
+    """
+    
+    def __init__(self, questions):
+    
+        self.questions = list(questions)
+        self.rows = {}
+        for row, question in enumerate(self.questions, 0):
+            self.rows.setdefault(question.Key(), row)
+        self.width = max((len(question.answers)
+                          for question in self.questions), default=0)
+        
+        if numpy is not None:
+            self.correct = numpy.zeros((len(self.questions), self.width),
+                                       dtype=bool)
+            for row, question in enumerate(self.questions, 0):
+                self.correct[row, list(question.correct)] = True
+            
+            # Each row packed into a bitmask, as 'Mask' packs a sheet's
+            #   answers, so a whole sheet is compared one question at a time
+            if self.width <= MAX_ENCODED_ANSWERS:
+                self.masks = numpy.array([question.correct_mask
+                                          for question in self.questions],
+                                         dtype=numpy.uint64)
+            self.single = numpy.array([question.q_type == 'single'
+                                       for question in self.questions],
+                                      dtype=bool)
+    
+    
+    def Grade(self, sheets):
+        """Grade a batch of answer sheets.
+        
+        Arguments:
+            sheets: a list of sheets, as returned by 'ReadSheets'
+        
+        Returns:
+            A list of (correct answers, answered questions) tuples, one for
+                each sheet.
+        """
+        
+        # An empty key has no columns to reshape the sheets into
+        if numpy is None or not self.questions or \
+                self.width > MAX_ENCODED_ANSWERS:
+            return [self.GradeSheet(sheet) for sheet in sheets]
+        
+        results = []
+        chunk_size = max(1, CHUNK_CELLS // len(self.questions))
+        for start in range(0, len(sheets), chunk_size):
+            chosen = numpy.array(sheets[start:start+chunk_size],
+                                 dtype=numpy.uint64)
+            chosen = chosen.reshape(-1, len(self.questions))
+            correct, answered = self.GradeMasks(chosen)
+            results.extend(zip(correct.tolist(), answered.tolist()))
+        return results
+    
+    
+    def GradeMasks(self, chosen):
+        """Grade answer sheets encoded as a matrix of answer bitmasks.
+        
+        Arguments:
+            chosen: a NumPy array of shape (sheets, questions) holding the
+                    bitmask of the answers chosen on each sheet, as returned
+                    by 'Mask'
+        
+        Returns:
+            NumPy arrays of the number of correct answers and the number of
+                answered questions on each sheet.
+        """
+        
+        answered = chosen != 0
+        exact = chosen == self.masks
+        overlap = (chosen & self.masks) != 0
+        right = numpy.where(self.single, overlap, exact) & answered
+        return right.sum(axis=1), answered.sum(axis=1)
+    
+    
+    def GradeMatrix(self, submissions):
+        """Grade answer sheets encoded as a boolean matrix.
+        
+        This suits sheets that are already marked per answer, such as the
+            output of a scanner.
+        
+        Arguments:
+            submissions: a NumPy boolean array of shape (sheets, questions,
+                         answers) that is true where an answer was chosen,
+                         with one answer chosen for a single-answer question
+        
+        Returns:
+            NumPy arrays of the number of correct answers and the number of
+                answered questions on each sheet.
+        """
+        
+        answered = submissions.any(axis=2)
+        exact = (submissions == self.correct).all(axis=2)
+        overlap = (submissions & self.correct).any(axis=2)
+        right = numpy.where(self.single, overlap, exact) & answered
+        return right.sum(axis=1), answered.sum(axis=1)
+    
+    
+    def GradeSheet(self, sheet):
+        """Grade a single answer sheet without NumPy.
+        
+        Arguments:
+            sheet: a sheet, as returned by 'ReadSheets'
+        
+        Returns:
+            The number of correct answers and the number of answered
+                questions.
+        """
+        
+        correct = answered = 0
+        for question, chosen in zip(self.questions, sheet):
+            if not chosen:
+                continue
+            answered += 1
+            if question.q_type == 'single':
+                correct += bool(chosen & question.correct_mask)
+            else:
+                correct += chosen == question.correct_mask
+        return correct, answered
+    
+    
+    def Mask(self, row, choices):
+        """Return the answers chosen for a question as a bitmask.
+        
+        Only the first answer chosen for a single-answer question is kept,
+            since that is the answer that's graded. Answers are matched to the
+            first answers holding their text, as 'Question.MatchChoices'
+            does, so the mask can be compared with the key's.
+        
+        Arguments:
+            row: the question's row in the key
+            choices: the indices of the chosen answers, in the order given
+        
+        Returns:
+            An integer with bit 'n' set if answer 'n' was chosen, which is 0
+                if the question wasn't answered.
+        """
+        
+        question = self.questions[row]
+        if choices and question.q_type == 'single':
+            choices = choices[:1]
+        return Question.ChoiceMask(question.MatchChoices(choices))
+    
+    
+    def Row(self, heading):
+        """Return the question row named by an answer sheet column heading.
+        
+        Raises:
+            ValueError if the heading names no question.
+        """
+        
+        heading = heading.strip().lower()
+        if KEY_PATTERN.fullmatch(heading):
+            if heading not in self.rows:
+                raise ValueError(f'No question has the ID {heading}')
+            return self.rows[heading]
+        try:
+            number = int(heading)
+        except ValueError:
+            raise ValueError(f'Invalid question column {heading!r}')
+        if not 1 <= number <= len(self.questions):
+            raise ValueError(f'No question number {number}')
+        return number - 1
+
+
+def GradeFiles(sheet_file, quiz_files):
+    """Grade a file of answer sheets against quiz files.
+    
+    Arguments:
+        sheet_file: the CSV file of answer sheets
+        quiz_files: the quiz files the sheets were answered from
+    
+    Returns:
+        A list of (student, correct answers, answered questions, score)
+            tuples in sheet order, where the score is 'None' if no questions
+            were answered.
+    
+    Raises:
+        IOError if a file can't be read.
+        ValueError if a file can't be decoded or is invalid.
+    """
+    
+    key = AnswerKey(LoadQuestions(quiz_files))
+    students, sheets = ReadSheets(sheet_file, key)
+    results = []
+    for student, (correct, answered) in zip(students, key.Grade(sheets)):
+        score = correct / answered if answered else None
+        results.append((student, correct, answered, score))
+    return results
+
+
+def LoadQuestions(quiz_files):
+    """Load every question from quiz files, in order.
+    
+    Arguments:
+        quiz_files: JSON quiz files or binary banks
+    
+    Returns:
+        A list of Question objects.
+    """
+    
+    questions = []
+    for path in quiz_files:
+        questions.extend(QuizLoader.LoadBank(path))
+    return questions
+
+
+def ReadSheets(sheet_file, key):
+    """Read a CSV file of answer sheets.
+    
+    Arguments:
+        sheet_file: the CSV file to read
+        key: the AnswerKey the sheets will be graded with
+    
+    Returns:
+        A list of student names, and a list of sheets holding the answers
+            chosen for each question in the key, as returned by
+            'AnswerKey.Mask'. Questions without a column are left unanswered.
+    
+    Raises:
+        IOError if the file can't be read.
+        ValueError if a column or answer doesn't match the quiz files.
+    """
+    
+    students, sheets = [], []
+    with open(sheet_file, newline='', encoding='utf-8') as infile:
+        reader = csv.reader(infile)
+        header = next(reader, None)
+        if not header:
+            raise ValueError('Answer sheet file is empty')
+        rows = [key.Row(heading) for heading in header[1:]]
+        
+        for line, record in enumerate(reader, 2):
+            if not record:
+                continue
+            sheet = [0] * len(key.questions)
+            for row, cell in zip(rows, record[1:]):
+                num_answers = len(key.questions[row].answers)
+                choices = []
+                for text in cell.replace(';', ' ').split():
+                    if not text.isdecimal() or \
+                            not 1 <= int(text) <= num_answers:
+                        raise ValueError(f'Line {line}: invalid answer '
+                                         f'{text!r} to question {row + 1}')
+                    choices.append(int(text) - 1)
+                sheet[row] = key.Mask(row, choices)
+            students.append(record[0])
+            sheets.append(sheet)
+    return students, sheets
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('sheet_file', help='CSV file of answer sheets')
+    parser.add_argument('quiz_files', nargs='+',
+                        help='quiz files the sheets were answered from')
+    parser.add_argument('--json', action='store_true',
+                        help='print the scores as JSON')
+    args = parser.parse_args(argv)
+    
+    try:
+        results = GradeFiles(args.sheet_file, args.quiz_files)
+    except (OSError, ValueError) as e:
+        print(f'Unable to grade {args.sheet_file}: {e}', file=sys.stderr)
+        return 1
+    
+    if args.json:
+        json.dump([{'student': student, 'correct': correct,
+                    'answered': answered, 'score': score}
+                   for student, correct, answered, score in results],
+                  sys.stdout, indent=4)
+        print()
+    else:
+        for student, correct, answered, score in results:
+            score = 'n/a' if score is None else f'{score:.2%}'
+            print(f'{student}: {correct}/{answered} correct, {score}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
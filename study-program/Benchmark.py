@@ -0,0 +1,416 @@
+"""Benchmarks for the study program's data handling.
+
+Synthetic quiz files are generated in the format written by
+    'CreateDBWindow.SerializeDB', and the loading, quiz, and saving code paths
+    are timed at increasing sizes. Startup is timed as well: the time taken
+    to import the log in window, from '-X importtime', and the time from
+    starting Python until the log in window is first drawn, which is only
+    measured when a display is available. Results are written as JSON so
+    runs from different versions can be compared.
+
+Usage:
+    python Benchmark.py [--sizes N ...] [--accounts N ...] [--repeat N]
+                        [--output FILE] [--compare FILE]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import BankCache
+import BatchGrader
+import BinaryBank
+import FileHistory
+import NearDuplicates
+import QuizLoader
+import QuizSession
+import Scheduler
+import SearchIndex
+import UserStore
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+DEFAULT_ACCOUNTS = [10000, 100000, 1000000]
+
+# The directory holding the program's modules, which startup benchmarks run
+#   from
+PROGRAM_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Run in a new interpreter to draw the log in window once and exit
+FIRST_FRAME_SCRIPT = """
+import LogInWindow
+app = LogInWindow.LogInWindow()
+def Mapped(event):
+    print('mapped', flush=True)
+    app.destroy()
+app.bind('<Map>', Mapped)
+app.after(10000, app.destroy)
+app.mainloop()
+"""
+
+# A benchmark that slows down by more than this factor is a regression
+REGRESSION_THRESHOLD = 1.2
+
+# Vocabulary used to build synthetic question and answer text
+WORDS = ('mitochondria', 'photosynthesis', 'velocity', 'integral', 'theorem',
+         'enzyme', 'equilibrium', 'vector', 'isotope', 'catalyst', 'matrix',
+         'derivative', 'electron', 'genome', 'protein', 'entropy', 'quantum',
+         'osmosis', 'polymer', 'hypothesis', 'the', 'of', 'and', 'which',
+         'is', 'a', 'in', 'what', 'does', 'not')
+
+
+def BenchAccounts(work_dir, count, repeat):
+    """Time account lookups and saves with 'count' existing accounts.
+    
+    Returns:
+        A list of (benchmark name, seconds) tuples.
+    """
+    
+    results = []
+    
+    # User accounts, with a single login written as it is in 'LogIn'
+    store = UserStore.UserStore(os.path.join(work_dir, f'users{count}.db'))
+    store.conn.executemany('INSERT INTO users VALUES (?, ?, ?, ?)',
+                           ((f'user{i}', 'password', 'January 01, 2024', '')
+                            for i in range(count)))
+    store.Commit()
+    username = f'user{count // 2}'
+    
+    def Login():
+        store.GetUser(username)
+        store.SetLastLogIn(username, 'January 02, 2024')
+        store.Commit()
+    results.append(('users.login_save', Time(Login, repeat)))
+    store.Close()
+    
+    # File lists, migrated from a legacy file, then one user's list saved
+    #   and loaded as in 'MainWindow.SaveData' and 'LoadFileHistory'
+    legacy_file = os.path.join(work_dir, f'previousfiles{count}.json')
+    with open(legacy_file, 'w') as outfile:
+        json.dump({f'user{i}': [f'/home/user{i}/quiz{j}.json'
+                                for j in range(5)] for i in range(count)},
+                  outfile)
+    history_dir = os.path.join(work_dir, f'history{count}')
+    start = time.perf_counter()
+    file_db = FileHistory.FileHistory(history_dir, legacy_file=legacy_file)
+    results.append(('files.migrate', time.perf_counter() - start))
+    
+    files = [f'/home/{username}/quiz{j}.json' for j in range(6)]
+    results.append(('files.save',
+                    Time(lambda: file_db.Set(username, files), repeat)))
+    results.append(('files.load',
+                    Time(lambda: file_db.Get(username), repeat)))
+    
+    return results
+
+
+def BenchBanks(work_dir, count, repeat):
+    """Time loading, quizzing, and saving a bank of 'count' questions.
+    
+    Returns:
+        A list of (benchmark name, seconds) tuples.
+    """
+    
+    results = []
+    entries = MakeEntries(count)
+    bank = os.path.join(work_dir, f'bank{count}.json')
+    
+    results.append(('bank.serialize',
+                    Time(lambda: WriteBank(bank, entries), repeat)))
+    del entries
+    
+    def JsonLoad():
+        with open(bank, 'r') as infile:
+            json.load(infile)
+    results.append(('bank.json_load', Time(JsonLoad, repeat)))
+    results.append(('bank.load', Time(lambda: QuizLoader.LoadBank(bank),
+                                      repeat)))
+    
+    # Load through the stream as the quiz does, without and with a cache
+    cache_dir = os.path.join(work_dir, f'cache{count}')
+    
+    def StreamLoad(cache):
+        stream = QuizLoader.BankStream([bank], cache=cache)
+        stream.Start()
+        while stream.loading:
+            stream.Wait()
+    results.append(('bank.stream_load', Time(lambda: StreamLoad(None),
+                                             repeat)))
+    cache = BankCache.BankCache(cache_dir, max_bytes=1 << 40)
+    StreamLoad(cache)
+    results.append(('bank.cached_load', Time(lambda: StreamLoad(cache),
+                                             repeat)))
+    
+    # Convert to a binary bank, then open it and ask a short quiz from it
+    binary_bank = os.path.join(work_dir, f'bank{count}.qbank')
+    results.append(('bank.binary_convert',
+                    Time(lambda: BinaryBank.Convert(bank, binary_bank),
+                         repeat)))
+    
+    def BinaryQuiz():
+        session = QuizSession.QuizSession(rng=random.Random(0))
+        quiz_bank = BinaryBank.BinaryBank(binary_bank)
+        session.AddBank(quiz_bank)
+        for _ in range(100):
+            session.NextQuestion()
+        quiz_bank.Close()
+    results.append(('bank.binary_quiz100', Time(BinaryQuiz, repeat)))
+    os.remove(binary_bank)
+    
+    # Index the bank for searching, then search it for two common words
+    def Index():
+        index = SearchIndex.SearchIndex(':memory:')
+        index.Update([bank])
+        return index
+    results.append(('search.index', Time(Index, repeat)))
+    index = Index()
+    results.append(('search.query',
+                    Time(lambda: index.Search('enzyme velocity', [bank]),
+                         repeat)))
+    index.Close()
+    
+    questions = QuizLoader.LoadBank(bank)
+    
+    def Draw():
+        session = QuizSession.QuizSession(questions, random.Random(0))
+        while session.NextQuestion() is not None:
+            pass
+    results.append(('quiz.draw_all', Time(Draw, repeat)))
+    
+    def Grade():
+        session = QuizSession.QuizSession(questions, random.Random(0))
+        while session.NextQuestion() is not None:
+            session.SubmitAnswer(session.current.correct)
+    results.append(('quiz.grade_all', Time(Grade, repeat)))
+    
+    # Grade a batch of answer sheets against the whole bank at once
+    key = BatchGrader.AnswerKey(questions)
+    sheet = [key.Mask(row, question.correct)
+             for row, question in enumerate(questions, 0)]
+    results.append(('quiz.batch_grade100',
+                    Time(lambda: key.Grade([sheet] * 100), repeat)))
+    del key, sheet
+    
+    # Ask and answer every question in review order, as with spaced
+    #   repetition enabled
+    def Review():
+        scheduler = Scheduler.Scheduler(None)
+        session = QuizSession.QuizSession(questions, random.Random(0),
+                                          scheduler=scheduler)
+        while session.NextQuestion() is not None:
+            session.SubmitAnswer(session.current.correct)
+        scheduler.Close()
+    results.append(('quiz.review_all', Time(Review, repeat)))
+    
+    results.append(('bank.near_duplicates',
+                    Time(lambda: NearDuplicates.FindGroups(questions),
+                         repeat)))
+    
+    os.remove(bank)
+    return results
+
+
+def BenchStartup(repeat):
+    """Time importing the log in window and drawing its first frame.
+    
+    Each run starts a new interpreter, so modules imported by earlier runs
+        aren't reused.
+    
+    Returns:
+        A list of (benchmark name, seconds) tuples. The first frame isn't
+            timed if the window can't be shown.
+    """
+    
+    def ImportTime():
+        output = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                                 'import LogInWindow'],
+                                cwd=PROGRAM_DIR, capture_output=True,
+                                text=True, check=True).stderr
+        for line in output.splitlines():
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].strip() == 'LogInWindow':
+                return int(fields[1]) / 1e6
+        raise ValueError('LogInWindow import time not reported')
+    
+    def FirstFrame():
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, '-c', FIRST_FRAME_SCRIPT],
+                                   cwd=PROGRAM_DIR, stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL, text=True)
+        mapped = process.stdout.readline().strip() == 'mapped'
+        elapsed = time.perf_counter() - start
+        process.wait()
+        return elapsed if mapped else None
+    
+    results = [('startup.import', min(ImportTime() for _ in range(repeat)))]
+    frames = [FirstFrame() for _ in range(repeat)]
+    if None not in frames:
+        results.append(('startup.first_frame', min(frames)))
+    return results
+
+
+def CompareResults(baseline_file, results):
+    """Print benchmarks that slowed down compared to an earlier run.
+    
+    Arguments:
+        baseline_file: a results file written by an earlier run
+        results: the results of this run
+    
+    Returns:
+        The number of regressions found.
+    """
+    
+    with open(baseline_file, 'r') as infile:
+        baseline = json.load(infile)
+    previous = {}
+    for result in baseline['results']:
+        previous[(result['benchmark'], result['size'])] = result['seconds']
+    
+    regressions = 0
+    for result in results:
+        key = (result['benchmark'], result['size'])
+        if key not in previous or not previous[key]:
+            continue
+        ratio = result['seconds'] / previous[key]
+        if ratio > REGRESSION_THRESHOLD:
+            regressions += 1
+            print(f'REGRESSION {key[0]} [{key[1]}]: {previous[key]:.6f}s -> '
+                  f'{result["seconds"]:.6f}s ({ratio:.2f}x)', file=sys.stderr)
+    return regressions
+
+
+def MakeEntries(count, seed=0):
+    """Return a list of 'count' synthetic quiz entries."""
+    
+    rng = random.Random(seed)
+    return [MakeEntry(rng, i) for i in range(count)]
+
+
+def MakeEntry(rng, index):
+    """Create a synthetic quiz entry matching 'CreateQuizEntry' output.
+    
+    Arguments:
+        rng: the random.Random used to vary the entry
+        index: a number used to make the question text unique
+    
+    Returns:
+        A quiz entry dictionary.
+    """
+    
+    num_answers = rng.randint(2, 6)
+    answers = []
+    for i in range(num_answers):
+        words = rng.randint(1, 12)
+        answers.append(f'Answer {i+1} to question {index}: ' +
+                       ' '.join(rng.choice(WORDS) for _ in range(words)))
+    correct = rng.sample(range(num_answers), rng.randint(1, num_answers))
+    correct.sort()
+    
+    entry = {}
+    entry.update({'Type': 'multi' if len(correct) > 1 else 'single'})
+    entry.update({'Question': f'Question {index}: ' +
+                  ' '.join(rng.choice(WORDS) for _ in range(12))})
+    char_count = 0
+    for i, answer in enumerate(answers, 1):
+        char_count += len(answer)
+        entry.update({'Answer'+str(i): answer})
+    entry.update({'NumOfAnswers': num_answers})
+    entry.update({'CharCount': char_count})
+    if len(correct) == 1:
+        entry.update({'Correct': answers[correct[0]]})
+    else:
+        entry.update({'Correct': [answers[i] for i in correct]})
+    return entry
+
+
+def Revision():
+    """Return the git revision of the working tree, if available."""
+    
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)),
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def Time(func, repeat):
+    """Return the fastest of 'repeat' timed calls of 'func', in seconds."""
+    
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def WriteBank(path, entries):
+    """Write quiz entries the same way 'CreateDBWindow.SerializeDB' does."""
+    
+    with open(path, 'w') as outfile:
+        json.dump(entries, outfile, indent=4)
+        outfile.truncate()
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='question counts for bank benchmarks')
+    parser.add_argument('--accounts', type=int, nargs='+',
+                        default=DEFAULT_ACCOUNTS,
+                        help='account counts for save benchmarks')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timed runs per benchmark, the fastest is kept')
+    parser.add_argument('--output', help='write JSON results to this file')
+    parser.add_argument('--compare',
+                        help='report regressions against a results file')
+    args = parser.parse_args(argv)
+    
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for count in args.sizes:
+            for name, seconds in BenchBanks(work_dir, count, args.repeat):
+                results.append({'benchmark': name, 'size': count,
+                                'seconds': seconds})
+                print(f'{name:20} {count:>9} {seconds:12.6f}s',
+                      file=sys.stderr)
+        for count in args.accounts:
+            for name, seconds in BenchAccounts(work_dir, count, args.repeat):
+                results.append({'benchmark': name, 'size': count,
+                                'seconds': seconds})
+                print(f'{name:20} {count:>9} {seconds:12.6f}s',
+                      file=sys.stderr)
+    for name, seconds in BenchStartup(args.repeat):
+        results.append({'benchmark': name, 'size': 1, 'seconds': seconds})
+        print(f'{name:20} {1:>9} {seconds:12.6f}s', file=sys.stderr)
+    
+    report = {
+        'revision': Revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as outfile:
+            json.dump(report, outfile, indent=4)
+    else:
+        json.dump(report, sys.stdout, indent=4)
+        print()
+    
+    if args.compare:
+        return 1 if CompareResults(args.compare, results) else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
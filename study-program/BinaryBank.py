@@ -0,0 +1,202 @@
+"""A binary quiz file format that can be read without decoding it first.
+
+A binary bank holds a fixed size header, the packed UTF-8 records of every
+    question, and an index of where each record starts. The file is mapped
+    into memory when opened, so opening it takes the same time regardless of
+    its size, and a question is only decoded when it's asked.
+
+Usage:
+    python BinaryBank.py JSON_FILE [BANK_FILE]
+
+Converts a quiz file written by 'CreateDBWindow.SerializeDB' into a binary
+    bank, named after the JSON file with a '.qbank' extension by default.
+"""
+
+import array
+import mmap
+import os
+import struct
+import sys
+
+import Question
+import QuizLoader
+
+BANK_MAGIC = b'QBB1'
+BANK_EXTENSION = '.qbank'
+
+# Magic, question count, and offset of the record index
+HEADER = struct.Struct('<4sQQ')
+
+# Each record starts with the question type, number of answers, number of
+#   correct answers, total answer characters, and question text length,
+#   followed by the length of each answer, the index of each correct answer,
+#   the question text, and the answer texts
+RECORD = struct.Struct('<BBBxII')
+OFFSET = struct.Struct('<Q')
+
+TYPES = ('single', 'multi')
+
+
+class BinaryBank():
+    """A read-only binary bank whose questions are decoded on demand.
+    
+    The bank behaves as a sequence of Question objects. Indexing it decodes
+        just the requested question from the mapped file, so the memory used
+        depends on the questions read rather than the size of the file.
+    
+    Arguments:
+        path: the binary bank file to open
+    
+    Raises:
+        IOError if the file can't be read.
+        ValueError if the file isn't a binary bank.
+    """
+    
+    def __init__(self, path):
+    
+        self.path = path
+        with open(path, 'rb') as infile:
+            try:
+                self.data = mmap.mmap(infile.fileno(), 0,
+                                      access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError('Empty file')
+        
+        if len(self.data) < HEADER.size:
+            self.Close()
+            raise ValueError('Not a binary bank')
+        magic, self.count, self.index_offset = HEADER.unpack_from(self.data)
+        if magic != BANK_MAGIC or \
+                self.index_offset + self.count * OFFSET.size > len(self.data):
+            self.Close()
+            raise ValueError('Not a binary bank')
+    
+    
+    def __getitem__(self, index):
+    
+        if not 0 <= index < self.count:
+            raise IndexError('Question index out of range')
+        offset, = OFFSET.unpack_from(self.data,
+                                     self.index_offset + index * OFFSET.size)
+        return self.Decode(offset)
+    
+    
+    def __len__(self):
+    
+        return self.count
+    
+    
+    def Close(self):
+        """Unmap the file. Questions already decoded remain usable."""
+        
+        self.data.close()
+    
+    
+    def Decode(self, offset):
+        """Decode the question record starting at 'offset'."""
+        
+        data = self.data
+        q_type, num_answers, num_correct, char_count, question_len = \
+            RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        lengths = struct.unpack_from(f'<{num_answers}I', data, offset)
+        offset += 4 * num_answers
+        correct = tuple(data[offset:offset+num_correct])
+        offset += num_correct
+        
+        question = data[offset:offset+question_len].decode('utf-8')
+        offset += question_len
+        answers = []
+        for length in lengths:
+            answers.append(data[offset:offset+length].decode('utf-8'))
+            offset += length
+        return Question.Question(TYPES[q_type], question, answers, correct,
+                                 char_count, self.path)
+
+
+def Convert(json_file, bank_file=None):
+    """Convert a JSON quiz file into a binary bank.
+    
+    The JSON file is read one entry at a time and every entry is validated,
+        so no partial bank is written for an invalid file.
+    
+    Arguments:
+        json_file: a quiz file written by 'CreateDBWindow.SerializeDB'
+        bank_file: the binary bank to write (default: 'json_file' with a
+                   '.qbank' extension)
+    
+    Returns:
+        The path of the binary bank written.
+    
+    Raises:
+        IOError if either file can't be accessed.
+        ValueError if the JSON file can't be decoded or an entry is invalid.
+    """
+    
+    if bank_file is None:
+        bank_file = os.path.splitext(json_file)[0] + BANK_EXTENSION
+    temp_file = f'{bank_file}.{os.getpid()}.tmp'
+    
+    offsets = array.array('Q')
+    try:
+        with open(temp_file, 'wb') as outfile:
+            outfile.write(HEADER.pack(BANK_MAGIC, 0, 0))
+            position = HEADER.size
+            for entry in QuizLoader.IterQuestions(json_file):
+                QuizLoader.ValidateEntry(entry, len(offsets))
+                record = Pack(Question.FromEntry(entry))
+                offsets.append(position)
+                outfile.write(record)
+                position += len(record)
+            
+            if sys.byteorder != 'little':
+                offsets.byteswap()
+            outfile.write(offsets.tobytes())
+            outfile.seek(0)
+            outfile.write(HEADER.pack(BANK_MAGIC, len(offsets), position))
+        os.replace(temp_file, bank_file)
+    except:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+    return bank_file
+
+
+def IsBinaryBank(path):
+    """Return 'True' if a path names a binary bank rather than a JSON file."""
+    
+    return path.lower().endswith(BANK_EXTENSION)
+
+
+def Pack(question):
+    """Return the binary record for a Question."""
+    
+    question_text = question.question.encode('utf-8')
+    answers = [answer.encode('utf-8') for answer in question.answers]
+    return b''.join([
+        RECORD.pack(TYPES.index(question.q_type), len(answers),
+                    len(question.correct), question.char_count,
+                    len(question_text)),
+        struct.pack(f'<{len(answers)}I', *(len(answer) for answer in answers)),
+        bytes(question.correct),
+        question_text
+    ] + answers)
+
+
+def main(argv=None):
+
+    argv = sys.argv[1:] if argv is None else argv
+    if not 1 <= len(argv) <= 2:
+        print('Usage: python BinaryBank.py JSON_FILE [BANK_FILE]',
+              file=sys.stderr)
+        return 2
+    try:
+        bank_file = Convert(*argv)
+    except (OSError, ValueError) as e:
+        print(f'Unable to convert {argv[0]}: {e}', file=sys.stderr)
+        return 1
+    print(f'Wrote {bank_file}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
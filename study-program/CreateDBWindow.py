@@ -4,16 +4,23 @@ import os
 import tkinter as tk
 from tkinter import messagebox
 
+import BankValidator
+import QuizLoader
 import Widgets
 
 class CreateDBWindow():
     
-    def __init__(self, root_window, user_files, parent_listbox):
+    def __init__(self, root_window, user_files, parent_listbox,
+                 file_keys=None):
         
         self.root = root_window
         self.user_files = user_files
         self.listbox = parent_listbox
         
+        # The keys of the files in 'user_files', as returned by
+        #   'QuizLoader.PathKey', which are kept up to date if provided
+        self.file_keys = file_keys
+        
         self.question_num = 1
         self.file_data  = []
         self.init_q_text = 'Enter question here...'
@@ -26,7 +33,8 @@ class CreateDBWindow():
         """Initialize the widgets for a single answer entry set.
         
         This function is called 4 times when initializing the window and by
-            the 'Add Answer Box' button.
+            the 'Add Answer Box' button. A question can't have more answers
+            than the quiz file format allows.
         """
         
         def ClearField(event):
@@ -40,6 +48,11 @@ class CreateDBWindow():
                 text.insert('1.0', self.init_a_text)
         
         
+        if self.ans_index == BankValidator.MAX_ANSWERS:
+            tk.messagebox.showerror('Error', 'A question can have at most '
+                                    f'{BankValidator.MAX_ANSWERS} answers.',
+                                    parent=self.window)
+            return
         self.ans_index += 1
         
         label_frame = Widgets.CreateFrame(self.answers_frame, _padx=1, _pady=1)
@@ -359,7 +372,12 @@ class CreateDBWindow():
                                f'{os.path.basename(file)} created.',
                                parent=self.window)
         
-        # Add the file to the files list and listbox and exit the window
-        self.listbox.insert('end', os.path.basename(file))
-        self.user_files.append(file)
+        # Add the file to the files list and listbox, unless it was already
+        #   listed, and exit the window
+        key = QuizLoader.PathKey(file)
+        if self.file_keys is None or key not in self.file_keys:
+            if self.file_keys is not None:
+                self.file_keys.add(key)
+            self.listbox.insert('end', os.path.basename(file))
+            self.user_files.append(file)
         self.window.destroy()
\ No newline at end of file
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+
+import Journal
+
+# Marks a history directory that has already imported the legacy file
+MIGRATED_MARKER = '.migrated'
+
+
+class FileHistory():
+    """Each user's quiz file history, stored as one small file per user.
+    
+    A user's history lives in its own JSON file named after a hash of the
+        username, spread across subdirectories so no single directory grows
+        too large. Loading or saving a user's files reads or replaces only
+        that user's file, so the cost doesn't depend on the number of users
+        and users on the same machine don't write to a shared file.
+    
+    The first time a history directory is opened, the histories held in a
+        legacy 'previousfiles.json' file (and its journal) are copied into it.
+    """
+    
+    def __init__(self, history_dir, legacy_file=None):
+    
+        self.history_dir = history_dir
+        os.makedirs(history_dir, exist_ok=True)
+        
+        marker = os.path.join(history_dir, MIGRATED_MARKER)
+        if legacy_file and not os.path.exists(marker):
+            self.Migrate(legacy_file)
+            with open(marker, 'w'):
+                pass
+    
+    
+    def Close(self):
+        """Close the store. Each save is already complete on disk."""
+        
+        pass
+    
+    
+    def Get(self, username, default=None):
+        """Return a user's list of quiz files, or 'default' if none exists.
+        
+        Raises:
+            JSONDecodeError if the user's history file is corrupt.
+        """
+        
+        try:
+            with open(self.ShardPath(username), 'r') as infile:
+                record = json.load(infile)
+        except FileNotFoundError:
+            return default
+        return record['Files']
+    
+    
+    def Migrate(self, legacy_file):
+        """Copy every user's history from a legacy file into the store.
+        
+        Users that already have a history file keep it.
+        
+        Arguments:
+            legacy_file: a 'previousfiles.json' style file mapping usernames
+                         to file lists
+        
+        Returns:
+            The number of users copied.
+        """
+        
+        # A legacy history that was never compacted only has a journal
+        if not any(os.path.exists(legacy_file + suffix)
+                   for suffix in ('', '.journal', '.journal.old')):
+            return 0
+        
+        # Reading through the journal picks up changes not yet compacted,
+        #   without truncating or compacting the legacy files
+        legacy = Journal.JournaledDict(legacy_file, read_only=True)
+        
+        copied = []
+        for username, files in legacy.data.items():
+            path = self.ShardPath(username)
+            if os.path.exists(path):
+                continue
+            self.Set(username, files, sync=False)
+            copied.append(path)
+        
+        # Flush the copied files once they're all written, so the disk
+        #   isn't waited on between files, then the directories naming them
+        for path in copied:
+            SyncPath(path)
+        directories = {os.path.dirname(path) for path in copied}
+        if copied:
+            directories.add(self.history_dir)
+        for directory in sorted(directories):
+            SyncPath(directory)
+        return len(copied)
+    
+    
+    def Set(self, username, files, sync=True):
+        """Save a user's list of quiz files.
+        
+        The file is written under a temporary name and moved into place, so
+            a crash leaves either the old or the new list intact.
+        
+        Arguments:
+            username: the user whose files are saved
+            files: the list of quiz file paths
+            sync: 'False' to skip waiting for the file to reach the disk
+                  (default: True)
+        """
+        
+        path = self.ShardPath(username)
+        temp_file = f'{path}.{os.getpid()}.tmp'
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp_file, 'w') as outfile:
+            json.dump({'User': username, 'Files': files}, outfile)
+            if sync:
+                outfile.flush()
+                os.fsync(outfile.fileno())
+        os.replace(temp_file, path)
+    
+    
+    def ShardPath(self, username):
+        """Return the path of the file holding a user's history."""
+        
+        digest = hashlib.sha1(username.encode('utf-8')).hexdigest()
+        return os.path.join(self.history_dir, digest[:2], digest + '.json')
+
+
+def SyncPath(path):
+    """Flush a file, or the entries of a directory, to disk.
+    
+    Not every platform can flush a directory, so a directory that can't be
+        opened or flushed is skipped.
+    """
+    
+    if not os.path.isdir(path):
+        with open(path, 'r+b') as outfile:
+            os.fsync(outfile.fileno())
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
\ No newline at end of file
@@ -0,0 +1,227 @@
+import json
+import os
+import threading
+
+
+class JournaledDict():
+    """A dictionary persisted as a JSON snapshot plus an append-only journal.
+    
+    Each change appends one compact line to the journal instead of rewriting
+        the whole snapshot. Once the journal grows past a size threshold it is
+        rotated aside and folded into a new snapshot by a background thread.
+        When loading, any incomplete record left by a crash mid-write is
+        discarded and the journal is truncated back to the last whole record.
+        If a compaction fails, the error is raised by the next 'Set', and
+        compaction isn't tried again until the journal has grown by another
+        threshold.
+    
+    A dictionary opened read-only replays the journals without truncating
+        them and never writes, so files still used elsewhere are unchanged.
+    
+    Arguments:
+        snapshot_file: the snapshot file, or 'None' to keep the dictionary
+                       in memory only
+        compact_size: the journal size in bytes that starts a compaction
+                      (default: 1 MB)
+        read_only: 'True' to read the files without changing them
+                   (default: False)
+    
+    Files used, for a snapshot named 'data.json':
+        data.json: the last compacted snapshot
+        data.json.journal: changes made since the snapshot
+        data.json.journal.old: a rotated journal still being compacted
+    """
+    
+    def __init__(self, snapshot_file, compact_size=1 << 20, read_only=False):
+    
+        self.snapshot_file = snapshot_file
+        self.compact_size = compact_size
+        self.read_only = read_only
+        self.data = {}
+        self.lock = threading.Lock()
+        self.compactor = None
+        self.journal = None
+        
+        # The journal size that starts the next compaction, and the error
+        #   raised by a failed compaction until it's reported
+        self.next_compact = compact_size
+        self.compact_error = None
+        
+        if snapshot_file is None:
+            # Memory-only dictionary, nothing is written to disk
+            return
+        self.journal_file = snapshot_file + '.journal'
+        self.old_journal_file = self.journal_file + '.old'
+        
+        self.data = self.LoadSnapshot()
+        self.ReplayJournal(self.old_journal_file)
+        self.ReplayJournal(self.journal_file)
+        if read_only:
+            return
+        self.journal = open(self.journal_file, 'a')
+        
+        # A rotated journal means the process stopped mid-compaction
+        if os.path.exists(self.old_journal_file):
+            self.StartCompaction(rotate=False)
+    
+    
+    def Close(self):
+        """Wait for any compaction to finish and close the journal."""
+        
+        if self.compactor is not None:
+            self.compactor.join()
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+    
+    
+    def Compact(self, snapshot):
+        """Write a new snapshot and remove the rotated journal.
+        
+        This function runs on the compaction thread. The snapshot is written
+            to a temporary file and moved into place so that a crash leaves
+            either the old or the new snapshot intact.
+        
+        Arguments:
+            snapshot: a copy of the dictionary taken when the journal was
+                      rotated
+        """
+        
+        temp_file = self.snapshot_file + '.tmp'
+        try:
+            with open(temp_file, 'w') as outfile:
+                json.dump(snapshot, outfile, separators=(',', ':'))
+                outfile.flush()
+                os.fsync(outfile.fileno())
+            os.replace(temp_file, self.snapshot_file)
+        except Exception as e:
+            # The rotated journal is kept, so no change is lost
+            self.compact_error = e
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+            return
+        try:
+            os.remove(self.old_journal_file)
+        except FileNotFoundError:
+            pass
+    
+    
+    def Get(self, key, default=None):
+        """Return the value stored for a key, or 'default' if missing."""
+        
+        return self.data.get(key, default)
+    
+    
+    def LoadSnapshot(self):
+        """Load the snapshot file into a dictionary.
+        
+        Returns:
+            The snapshot contents, or an empty dictionary if the file is
+                missing or empty.
+        
+        Raises:
+            JSONDecodeError if the snapshot exists but can't be decoded.
+        """
+        
+        try:
+            with open(self.snapshot_file, 'r') as infile:
+                contents = infile.read()
+        except FileNotFoundError:
+            return {}
+        if not contents.strip():
+            return {}
+        return json.loads(contents)
+    
+    
+    def ReplayJournal(self, journal_file):
+        """Apply the records held in a journal file to the dictionary.
+        
+        Replay stops at the first incomplete or undecodable record, and the
+            file is truncated to drop it unless the dictionary is read-only.
+        
+        Arguments:
+            journal_file: path to the journal to replay
+        """
+        
+        try:
+            infile = open(journal_file, 'rb' if self.read_only else 'rb+')
+        except FileNotFoundError:
+            return
+        
+        with infile:
+            good_offset = 0
+            for line in infile:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    key, value = json.loads(line)
+                except (ValueError, TypeError):
+                    break
+                if value is None:
+                    self.data.pop(key, None)
+                else:
+                    self.data[key] = value
+                good_offset += len(line)
+            if not self.read_only:
+                infile.truncate(good_offset)
+    
+    
+    def Set(self, key, value):
+        """Store a value and append the change to the journal.
+        
+        Arguments:
+            key: the dictionary key, which must be a string
+            value: any JSON-serializable value, or 'None' to delete the key
+        
+        Raises:
+            The error raised by a failed compaction, once, after the change
+                has been appended to the journal.
+        """
+        
+        with self.lock:
+            if value is None:
+                self.data.pop(key, None)
+            else:
+                self.data[key] = value
+            if self.journal is None:
+                return
+            
+            record = json.dumps([key, value], separators=(',', ':'))
+            self.journal.write(record + '\n')
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+            
+            if self.compact_error is not None:
+                error = self.compact_error
+                self.compact_error = None
+                self.next_compact = self.journal.tell() + self.compact_size
+                raise error
+            
+            if (self.journal.tell() >= self.next_compact and
+                    (self.compactor is None or
+                     not self.compactor.is_alive())):
+                self.next_compact = self.compact_size
+                self.StartCompaction(rotate=True)
+    
+    
+    def StartCompaction(self, rotate):
+        """Rotate the journal and compact it on a background thread.
+        
+        Arguments:
+            rotate: 'True' to move the active journal aside first, 'False' if
+                    a rotated journal is already waiting to be compacted. A
+                    journal left over from a failed compaction is never
+                    overwritten.
+        """
+        
+        if rotate and not os.path.exists(self.old_journal_file):
+            self.journal.close()
+            os.replace(self.journal_file, self.old_journal_file)
+            self.journal = open(self.journal_file, 'a')
+        
+        snapshot = dict(self.data)
+        self.compactor = threading.Thread(target=self.Compact,
+                                          args=(snapshot,), daemon=True)
+        self.compactor.start()
@@ -1,14 +1,15 @@
-import json
-from json.decoder import JSONDecodeError
-import os
 from datetime import date
 import tkinter as tk
 from tkinter import messagebox
 from tkinter import Tk
 
-import MainWindow
+import Background
 import Widgets
 
+# 'MainWindow' and 'UserStore' are imported when first used, on the worker
+#   threads running account operations, so the log in window appears without
+#   waiting on modules it doesn't need
+
 
 class LogInWindow(Tk):
 
@@ -24,23 +25,38 @@ class LogInWindow(Tk):
         self.password = tk.StringVar()
         self.confirm_pass = tk.StringVar()
         
-        # Load the user accounts info
+        # The user accounts info, which isn't opened until an account
+        #   operation is attempted. Accounts from an older 'users.json' file
+        #   are imported into the keyed store the first time it's opened
         self.users_file = 'users.json'
-        self.user_db = self.LoadDatabase()
+        self.store_file = 'users.db'
+        self.user_db = None
+        self.db_error = None
+        
+        # Account lookups and writes run on a worker thread while the window
+        #   shows a busy indicator. Closing the window while the worker is
+        #   using the account store waits for it to finish
+        self.busy = False
+        self.closing = False
         
         # Load the window and the initial 'Log In' widgets
         self.InitializeWindow()
         self.LoadLogInWindow()
     
     
-    def ChangePassword(self):
+    def ChangePassword(self, on_success):
         """Update a user's password using the user-provided information.
         
+        The fields are checked on the Tk thread, then the account is looked up
+            and updated on a worker thread.
+        
+        Arguments:
+            on_success: called once the password has been changed
+        
         Returns:
-            'True' if the password is successfully changed.
+            'True' if the password change has begun.
             'False' if any fields are left blank, the password fields don't
-                match, the new password is identical to the old password, or
-                the user isn't found in the database.
+                match, or another account operation is still running.
         """
         
         username = self.username.get().lstrip().rstrip()
@@ -53,76 +69,105 @@ class LogInWindow(Tk):
             return False
         password = self.password.get().lstrip().rstrip()
         
-        for user in self.user_db:
-            if user['User'] == username:
-                if user['Password'] == password:
-                    messagebox.showerror('Error',
-                                         'New password unchanged from the ' \
-                                         'old password.')
-                    return False
-                user['Password'] = password
-                messagebox.showinfo('Success!', 'Password updated!')
-                return True
+        def Update():
+            """Store the new password, returning an error message on failure.
+            
+            This function runs on a worker thread.
+            """
+            import UserStore
+            user_db = self.LoadDatabase()
+            user = user_db.GetUser(username)
+            if user is None:
+                return f'{username} not found in database.'
+            if UserStore.PasswordMatches(user['Password'], password):
+                return 'New password unchanged from the old password.'
+            user_db.SetPassword(username, password)
+            user_db.Commit()
+            return None
+        
+        def Done(error):
+            """Report the outcome of the password change."""
+            if error:
+                messagebox.showerror('Error', error)
+                return
+            messagebox.showinfo('Success!', 'Password updated!')
+            on_success()
         
-        messagebox.showerror('Error', f'{username} not found in database.')
-        return False
+        return self.RunTask(Update, Done)
     
     
-    def CheckLogin(self):
-        """Verify the user-provided credentials and retrieve last log-in date.
+    def CheckLogin(self, username, password):
+        """Verify the provided credentials and retrieve last log-in date.
+        
+        This function runs on a worker thread and must not use any widgets.
+            On success, the user's last log-in date is updated to today and
+            saved.
+        
+        Arguments:
+            username: the entered username
+            password: the entered password
         
         Returns:
-            'True', the username, and the date of the user's last login if the
+            'True', the date of the user's last login, and 'None' if the
                 provided information is valid.
-            'False', 'None', and 'None' if the username or password fields
-                aren't populated, the password is incorrect, or the user
-                wasn't found in the database.
+            'False', 'None', and an error message if the password is incorrect
+                or the user wasn't found in the database.
         """
         
-        username = self.username.get().lstrip().rstrip()
-        if not username:
-            messagebox.showerror('Error', 'No username entered.')
-            return False, None, None
+        import UserStore
+        user_db = self.LoadDatabase()
+        user = user_db.GetUser(username)
+        if user is None:
+            return False, None, f'User {username} does not exist.'
         
-        password = self.password.get().lstrip().rstrip()
-        if not password:
-            messagebox.showerror('Error', 'No password entered.')
-            return False, None, None
+        if not UserStore.PasswordMatches(user['Password'], password):
+            return False, None, 'The provided password is incorrect.'
         
-        for user in self.user_db:
-            if user['User'] == username:
-                if user['Password'] == password:
-                    # Retrive the last log-in date, then update value to now
-                    prev_login = user['LastLogIn']
-                    user['LastLogIn'] = date.today().strftime('%B %d, %Y')
-                    return True, username, prev_login
-                else:
-                    messagebox.showerror('Error',
-                                         'The provided password is incorrect.')
-                    return False, None, None
+        # Retrive the last log-in date, then update value to now
+        prev_login = user['LastLogIn']
+        user_db.SetLastLogIn(username, date.today().strftime('%B %d, %Y'))
+        user_db.Commit()
+        return True, prev_login, None
+    
+    
+    def CloseDatabase(self):
+        """Commit pending user account changes and close the account store.
         
-        messagebox.showerror('Error', f'User {username} does not exist.')
-        return False, None, None
+        This function is called when the program exits or the user logs out,
+            so each log in window's store is closed before another is opened.
+        """
+        
+        if self.user_db is None:
+            return
+        try:
+            self.user_db.Close()
+        except:
+            messagebox.showerror('Error',
+                                 f'{self.store_file} could not be accessed.' \
+                                 'New user information won\'t be saved')
+        self.user_db = None
     
     
-    def CreateAccount(self):
-        """Add a new user account to the database list.
+    def CreateAccount(self, on_created):
+        """Add a new user account to the account store.
+        
+        The fields are checked on the Tk thread, then the account is added
+            on a worker thread.
+        
+        Arguments:
+            on_created: called with the new username once the account has
+                        been created
         
         Returns:
-            'True' if the user provided a valid username and the passwords
-                are identical.
-            'False' if no username was provided, no password was provided,
-                or the passwords don't match.
+            'True' if account creation has begun.
+            'False' if no username was provided, the passwords don't match,
+                or another account operation is still running.
         """
         
         username = self.username.get().lstrip().rstrip()
         if not username:
             messagebox.showerror('Error', 'No username entered!')
             return False
-        for user in self.user_db:
-            if user['User'] == username:
-                messagebox.showerror('Error', f'{username} already exists!')
-                return False
         
         if not self.PasswordMatch():
             messagebox.showerror('Error', 'Passwords must match!')
@@ -135,8 +180,26 @@ class LogInWindow(Tk):
             'CreationDate': date.today().strftime('%B %d, %Y'),
             'LastLogIn': ''
         }
-        self.user_db.append(user_data)
-        return True
+        
+        def Add():
+            """Add and save the account, returning 'False' if it exists.
+            
+            This function runs on a worker thread.
+            """
+            user_db = self.LoadDatabase()
+            if not user_db.AddUser(user_data):
+                return False
+            user_db.Commit()
+            return True
+        
+        def Done(added):
+            """Report a duplicate username or continue with the new account."""
+            if not added:
+                messagebox.showerror('Error', f'{username} already exists!')
+                return
+            on_created(username)
+        
+        return self.RunTask(Add, Done)
     
     
     def InitializeWindow(self):
@@ -169,10 +232,31 @@ class LogInWindow(Tk):
         self.canvas_window = self.main_canvas.create_window(win_width / 2,
                                                             win_height / 2)
         
+        # Text shown below the widgets while account information is loading
+        self.busy_text = self.main_canvas.create_text(win_width / 2,
+                                                      bottom_right_y + 20,
+                                                      text='',
+                                                      font=('georgia', 12))
+        
         # Function to save user data if the window is exited
         self.protocol('WM_DELETE_WINDOW', self.OnClose)
     
     
+    def LaunchMainWindow(self, username, login_date, history):
+        """Replace the 'Log In' widgets with the main program.
+        
+        Arguments:
+            username: the logged in user
+            login_date: the date of the user's previous login, if any
+            history: the user's file history from 'LoadFileHistory'
+        """
+        
+        import MainWindow
+        self.main_frame.destroy()
+        MainWindow.MainWindow(self, username, login_date=login_date,
+                              history=history)
+    
+    
     def LoadCreateAccountWindow(self):
         """Initialize the widgets used to create a new user account.
         
@@ -190,17 +274,19 @@ class LogInWindow(Tk):
                 to the initial 'Log In' window.
             """
             
-            if not self.CreateAccount():
-                return
+            self.CreateAccount(on_created=Created)
+        
+        def Created(username):
+            """Offer to log the new user account in."""
             
-            # Offer to log the new user account in
             ask = messagebox.askyesno('Success!',
                                      f'Account created. Log in as {username}?')
             if ask:
-                # Save data to the file and load the main program
-                self.SaveData()
-                self.main_frame.destroy()
-                MainWindow.MainWindow(self, username, login_date=None)
+                # Load the user's file history and the main program
+                self.RunTask(lambda: LoadFileHistory(username),
+                             lambda history: self.LaunchMainWindow(username,
+                                                                   None,
+                                                                   history))
             else:
                 # Clear variable fields and return to initial 'Log In' window
                 self.username.set('')
@@ -277,43 +363,42 @@ class LogInWindow(Tk):
     
     
     def LoadDatabase(self):
-        """Load the user accounts information from the database file.
+        """Open the store holding user account information, if not yet open.
         
-        This function opens the file containing user account information and
-            loads the contents into a list. In the event that a new user is
-            created or a user's password is updated, the information will be
-            saved back to the database either before the main program launches
-            or before the window is closed.
+        Accounts are kept in a keyed store so that logging in, creating an
+            account, or changing a password only reads and writes the record
+            for that user. Changes are committed to disk either before the
+            main program launches or before the window is closed.
+        
+        The store is opened by the first account operation, on its worker
+            thread, so no widgets are used here. If it can't be opened, the
+            error is kept in 'db_error' and reported by 'RunTask' once the
+            operation finishes.
         
         Returns:
-            db_data: If the user accounts file exists and is accessible, this
-                        list contains the contents
-                     If the file doesn't exist or is inaccessible, this list
-                        is empty
+            A UserStore backed by the account database file if it is
+                accessible, otherwise a UserStore held in memory whose
+                contents won't be saved
         """
         
-        db_data = []
+        if self.user_db is not None:
+            return self.user_db
+        
+        import sqlite3
+        import UserStore
         try:
-            with open(self.users_file, 'r') as infile:
-                db_data = json.load(infile)
-        except IOError:
-            # The database file is nonexistent or corrupt and should be
-            #   created as a fresh file
-            try:
-                with open(self.users_file, 'x') as infile:
-                    pass
-            except:
-                messagebox.showerror('Error', 'File creation operations not ' \
-                                              'allowed in the current ' \
-                                              'directory.\n User account ' \
-                                              'information will not be saved.')
-        except JSONDecodeError:
-            messagebox.showerror('Error',
-                                 f'Unable to load data from {self.users_file}')
+            self.user_db = UserStore.UserStore(self.store_file,
+                                               legacy_file=self.users_file)
+            return self.user_db
+        except sqlite3.Error:
+            self.db_error = 'File creation operations not allowed in the ' \
+                            'current directory.\n User account information ' \
+                            'will not be saved.'
         except:
-            messagebox.showerror('Error', 'Unexpected error encountered.')
+            self.db_error = 'Unexpected error encountered.'
         
-        return db_data
+        self.user_db = UserStore.UserStore(':memory:')
+        return self.user_db
     
     
     def LoadForgotPasswordWindow(self):
@@ -328,13 +413,13 @@ class LogInWindow(Tk):
             
             This function is called by the 'Change Password' button.
             """
-            if self.ChangePassword():
-                # Update successful, return to main screen
-                self.confirm_pass.set('')
-                self.password.set('')
-                Return()
-            else:
-                return
+            self.ChangePassword(on_success=Updated)
+        
+        def Updated():
+            """Update successful, return to main screen."""
+            self.confirm_pass.set('')
+            self.password.set('')
+            Return()
         
         def Return():
             """Erase 'Forgot Password' widgets to load 'Log In' widgets.
@@ -424,18 +509,6 @@ class LogInWindow(Tk):
             login_frame.forget()
             self.LoadForgotPasswordWindow()
         
-        def LogIn():
-            """Verify the user's credentials and load the main program.
-            
-            This function is called by the  'Log In' button.
-            """
-            result, user, date = self.CheckLogin()
-            if result:
-                # Save the database file and load the program
-                self.SaveData()
-                self.main_frame.destroy()
-                MainWindow.MainWindow(self, user, login_date=date)
-        
         login_frame = Widgets.CreateFrame(self.main_canvas)
         self.main_canvas.itemconfigure(self.canvas_window, window=login_frame)
         
@@ -444,7 +517,7 @@ class LogInWindow(Tk):
         button_frame.pack(side='bottom')
         login_button = Widgets.CreateButton(button_frame,
                                             _text='Log In',
-                                            _cmd=LogIn,
+                                            _cmd=self.LogIn,
                                             _height=self.button_height)
         login_button.pack(side='left')
         create_button = Widgets.CreateButton(button_frame,
@@ -483,9 +556,61 @@ class LogInWindow(Tk):
             widget.lift()
     
     
+    def LogIn(self):
+        """Verify the user's credentials and load the main program.
+        
+        This function is called by the 'Log In' button. The credentials are
+            checked and the user's file history is loaded on a worker thread,
+            and the main program is loaded once both have finished.
+        
+        Returns:
+            'True' if the log in has begun.
+            'False' if the username or password fields aren't populated or
+                another account operation is still running.
+        """
+        
+        username = self.username.get().lstrip().rstrip()
+        if not username:
+            messagebox.showerror('Error', 'No username entered.')
+            return False
+        
+        password = self.password.get().lstrip().rstrip()
+        if not password:
+            messagebox.showerror('Error', 'No password entered.')
+            return False
+        
+        def Verify():
+            """Check the credentials, then load the user's file history.
+            
+            This function runs on a worker thread.
+            """
+            result, prev_login, error = self.CheckLogin(username, password)
+            if not result:
+                return False, None, error, None
+            history = LoadFileHistory(username)
+            return True, prev_login, None, history
+        
+        def Done(outcome):
+            """Report a failed log in or load the main program."""
+            result, prev_login, error, history = outcome
+            if not result:
+                messagebox.showerror('Error', error)
+                return
+            self.LaunchMainWindow(username, prev_login, history)
+        
+        return self.RunTask(Verify, Done)
+    
+    
     def OnClose(self):
-        """Save user account data before exiting the program."""
-        self.SaveData()
+        """Save user account data before exiting the program.
+        
+        If an account operation is still running, the program exits once it
+            finishes, so the store isn't closed while the worker uses it.
+        """
+        if self.busy:
+            self.closing = True
+            return
+        self.CloseDatabase()
         self.destroy()
     
     
@@ -513,14 +638,70 @@ class LogInWindow(Tk):
             return False
     
     
-    def SaveData(self):
-        """Save user account information to the database file."""
+    def ReportDatabaseError(self):
+        """Show the error raised opening the account store, if any, once."""
         
-        try:
-            with open(self.users_file, 'r+') as outfile:
-                json.dump(self.user_db, outfile, indent=4)
-                outfile.truncate()
-        except:
-            messagebox.showerror('Error',
-                                 f'{self.users_file} could not be accessed.' \
-                                 'New user information won\'t be saved')
\ No newline at end of file
+        if self.db_error:
+            messagebox.showerror('Error', self.db_error)
+            self.db_error = None
+    
+    
+    def RunTask(self, func, on_done):
+        """Run account work on a worker thread and show a busy indicator.
+        
+        Arguments:
+            func: the function to run on the worker thread
+            on_done: called on the Tk thread with the function's result
+        
+        Returns:
+            'True' if the task was started.
+            'False' if another task is still running.
+        """
+        
+        if self.busy:
+            return False
+        
+        def Done(result):
+            """Hide the busy indicator and hand over the result."""
+            self.SetBusy(False)
+            if self.closing:
+                self.OnClose()
+                return
+            self.ReportDatabaseError()
+            on_done(result)
+        
+        def Failed(error):
+            """Hide the busy indicator and report an unexpected error."""
+            self.SetBusy(False)
+            if self.closing:
+                self.OnClose()
+                return
+            self.ReportDatabaseError()
+            messagebox.showerror('Error', 'Unexpected error encountered.')
+        
+        self.SetBusy(True)
+        Background.BackgroundTask(self, func, Done, Failed)
+        return True
+    
+    
+    def SetBusy(self, busy):
+        """Show or hide the busy indicator while account work is running."""
+        
+        self.busy = busy
+        self.config(cursor='watch' if busy else '')
+        self.main_canvas.itemconfigure(self.busy_text,
+                                       text='Please wait...' if busy else '')
+
+
+def LoadFileHistory(username):
+    """Load a user's file history, importing 'MainWindow' if needed.
+    
+    This function runs on a worker thread, so the main program's modules are
+        imported while the log in window stays responsive.
+    
+    Returns:
+        The result of 'MainWindow.LoadFileHistory'.
+    """
+    
+    import MainWindow
+    return MainWindow.LoadFileHistory(username)
\ No newline at end of file
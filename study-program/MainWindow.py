@@ -1,20 +1,38 @@
-import json
 from json.decoder import JSONDecodeError
 import os
+import threading
 import tkinter as tk
-from tkinter import filedialog
 from tkinter import messagebox
 from tkinter import Tk
 
-import CreateDBWindow
+import Background
+import AnswerLog
+import BankCache
+import FileHistory
+import Journal
 import LogInWindow
-import QuizWindow
+import QuizLoader
+import Scheduler
+import SearchIndex
 import Widgets
 
+# The other windows, and 'filedialog', are imported when they're first opened
+#   so logging in doesn't wait on them
+
+# Maximum number of invalid files named after importing a folder, and of the
+#   problems listed for each
+MAX_LISTED_FILES = 10
+MAX_LISTED_PROBLEMS = 3
+
+# The directory holding each user's quiz file history, and the single file
+#   that held every user's history in earlier versions
+HISTORY_DIR = 'history'
+DB_FILE = 'previousfiles.json'
+
 
 class MainWindow():
 
-    def __init__(self, root_window, username, login_date):
+    def __init__(self, root_window, username, login_date, history=None):
     
         self.root = root_window
         self.current_user = username
@@ -24,15 +42,51 @@ class MainWindow():
         self.button_height = 3
         self.button_width = 30
         
-        # Load the user files info
-        self.DB_FILE = 'previousfiles.json'
-        self.user_files = self.LoadDatabase()
+        # Load the user files info, unless it was already loaded by the log in
+        #   window. Only the current user's history file is read or written
+        self.HISTORY_DIR = HISTORY_DIR
+        self.file_db = None
+        self.user_files = self.LoadDatabase(history)
+        
+        # Keys identifying the files in the user's list, as returned by
+        #   'QuizLoader.PathKey', so a file can be checked against the list
+        #   without comparing every path
+        self.file_keys = {QuizLoader.PathKey(file) for file in self.user_files}
+        
+        # Saves are written by a background thread, which combines saves made
+        #   in quick succession into a single write
+        self.writer = Background.CoalescingWriter(self.file_db.Set)
+        
+        # Quiz files currently being loaded in the background, and a cache of
+        #   previously loaded files so they don't need to be decoded again
+        self.quiz_stream = None
+        self.bank_cache = BankCache.BankCache('cache')
+        
+        # The user's review schedule, which isn't loaded until the first quiz
+        #   that uses it is launched
+        self.scheduler = None
+        self.scheduler_loading = False
+        
+        # The user's history of answered questions, opened with the first quiz
+        self.answer_log = None
+        
+        # The full-text index of quiz files, which is opened and brought up
+        #   to date on worker threads after logging in and before each
+        #   search. 'search_lock' guards opening and closing it, and an
+        #   error opening it is held in 'search_error' until it's reported
+        #   on the Tk thread
+        self.search_index = None
+        self.search_available = True
+        self.search_error = None
+        self.search_lock = threading.Lock()
+        self.searching = False
         
         # Function to save user data if the window is exited
         self.root.protocol('WM_DELETE_WINDOW', self.OnClose)
         
         # Load the window and widgets
         self.InitializeWindow()
+        self.UpdateSearchIndex()
     
     
     def AddFile(self):
@@ -41,19 +95,64 @@ class MainWindow():
         This function is called by the 'Add New File' button.
         """
         
+        from tkinter import filedialog
         new_file = filedialog.askopenfilename(title='Select a file...',
-                                          filetypes=[('JSON Files', '*.json')])
+                                          filetypes=[('Quiz Files',
+                                                      '*.json *.qbank'),
+                                                     ('JSON Files', '*.json'),
+                                                     ('Binary Banks',
+                                                      '*.qbank')])
         if not new_file:
             return
         
         # Verify the file isn't already in the user's list
-        for file in self.user_files:
-            if file == new_file:
-                messagebox.showerror('Error', 'File already present.')
-                return
+        key = QuizLoader.PathKey(new_file)
+        if key in self.file_keys:
+            messagebox.showerror('Error', 'File already present.')
+            return
         
+        self.file_keys.add(key)
         self.user_files.append(new_file)
         self.listbox.insert('end', os.path.basename(new_file))
+        self.UpdateSearchIndex()
+    
+    
+    def CancelLoading(self):
+        """Stop loading quiz files if a load is still in progress."""
+        
+        if self.quiz_stream is not None:
+            self.quiz_stream.Close()
+            self.quiz_stream = None
+    
+    
+    def CloseDatabase(self):
+        """Finish writing saved file information and close the database."""
+        
+        if self.writer.Close():
+            tk.messagebox.showerror('Error',
+                                    f'{self.HISTORY_DIR} could not be ' \
+                                    'accessed. Altered file information ' \
+                                    'won\'t be saved')
+        self.file_db.Close()
+        
+        if self.scheduler is not None and self.scheduler.Close():
+            tk.messagebox.showerror('Error',
+                                    f'{Scheduler.SCHEDULE_DIR} could not be ' \
+                                    'accessed. Review progress won\'t be ' \
+                                    'saved')
+        self.scheduler = None
+        
+        if self.answer_log is not None:
+            self.answer_log.Close()
+            self.answer_log = None
+        
+        # Keep workers still running from opening the index again
+        with self.search_lock:
+            self.search_available = False
+            self.search_error = None
+            if self.search_index is not None:
+                self.search_index.Close()
+                self.search_index = None
     
     
     def CreateNewDatabaseFile(self):
@@ -62,9 +161,79 @@ class MainWindow():
         This function is called by the 'Create New Database File' button.
         """
         
+        import CreateDBWindow
         CreateDBWindow.CreateDBWindow(root_window=self.root,
                                       user_files=self.user_files,
-                                      parent_listbox=self.listbox)
+                                      parent_listbox=self.listbox,
+                                      file_keys=self.file_keys)
+    
+    
+    def ImportFolder(self):
+        """Add every valid quiz file within a folder to the user's file list.
+        
+        This function is called by the 'Import Folder' button. The folder and
+            its subdirectories are searched and each '.json' file is validated
+            in the background. Files already in the list are skipped, and the
+            valid files are then added together.
+        """
+        
+        from tkinter import filedialog
+        folder = filedialog.askdirectory(title='Select a folder...')
+        if not folder:
+            return
+        
+        def Failed(error):
+            """Report a folder that couldn't be searched."""
+            
+            self.import_button['state'] = 'normal'
+            self.status_label['text'] = ''
+            messagebox.showerror('Error', 'Unable to search '
+                                          f'{os.path.basename(folder)}')
+        
+        def Imported(result):
+            """Add the valid files found and report the invalid ones."""
+            
+            self.import_button['state'] = 'normal'
+            self.status_label['text'] = ''
+            valid, invalid = result
+            
+            # Files added while the folder was searched aren't added twice
+            new_files = []
+            for file in valid:
+                key = QuizLoader.PathKey(file)
+                if key not in self.file_keys:
+                    self.file_keys.add(key)
+                    new_files.append(file)
+            valid = new_files
+            self.user_files.extend(valid)
+            self.listbox.insert('end', *(os.path.basename(file)
+                                         for file in valid))
+            if valid:
+                self.UpdateSearchIndex()
+            
+            msg = f'{len(valid)} new quiz file(s) added.'
+            if invalid:
+                msg += '\n\nThe following files aren\'t valid quiz files:\n'
+                for file, problems in invalid[:MAX_LISTED_FILES]:
+                    msg += f'{os.path.basename(file)}\n'
+                    for problem in problems[:MAX_LISTED_PROBLEMS]:
+                        msg += f'    {problem}\n'
+                    more = len(problems) - MAX_LISTED_PROBLEMS
+                    if more > 0:
+                        msg += f'    and {more} more\n'
+                if len(invalid) > MAX_LISTED_FILES:
+                    msg += f'and {len(invalid) - MAX_LISTED_FILES} more'
+            messagebox.showinfo('Import Folder', msg)
+        
+        
+        # The folder is searched on a worker thread, so it's given a copy
+        exclude = set(self.file_keys)
+        self.import_button['state'] = 'disabled'
+        self.status_label['text'] = f'Searching {os.path.basename(folder)}...'
+        Background.BackgroundTask(self.root,
+                                  lambda: QuizLoader.ScanFolder(folder,
+                                                                exclude),
+                                  Imported, Failed)
     
     
     def InitializeListbox(self, parent_frame):
@@ -98,8 +267,7 @@ class MainWindow():
         
         scrollbar = Widgets.CreateScrollbar(labelframe)
         self.listbox = Widgets.CreateListbox(labelframe, _scrollbar=scrollbar)
-        scrollbar.config(command=self.listbox.yview,
-                         scrollregion=self.listbox.bbox('end'))
+        scrollbar.config(command=self.listbox.yview)
         scrollbar.pack(side='right', fill='y')
         self.listbox.pack(fill='both', expand='true')
         
@@ -109,9 +277,10 @@ class MainWindow():
         self.listbox.bind('<Leave>',
                           lambda e: self.listbox.unbind_all('<MouseWheel>'))
         
-        # Fill the Listbox with the user's previously opened files
-        for file in self.user_files:
-            self.listbox.insert('end', os.path.basename(file))
+        # Fill the Listbox with the user's previously opened files. Only the
+        #   visible rows are drawn, so long file lists display immediately
+        self.listbox.insert('end', *(os.path.basename(file)
+                                     for file in self.user_files))
     
     
     def InitializeListboxButtons(self, parent_frame):
@@ -121,30 +290,26 @@ class MainWindow():
             parent_frame: the Frame that holds the Buttons
         """
         
-        def RemoveFile():
-            """Call the function to remove a file from the user's list.
-            
-            This function is called by the 'Remove Selected Files' button.
-            """
-            
-            if self.RemoveFile():
-                # Re-populate the listbox with the updated file list
-                self.listbox.delete(0, 'end')
-                for file in self.user_files:
-                    self.listbox.insert('end', os.path.basename(file))
-        
-        
         # Create a button to add files to the listbox
         add_button = Widgets.CreateButton(parent_frame,
                                           _text='Add\nNew File',
                                           _cmd=self.AddFile,
-                                          _height=self.button_height)
+                                          _height=self.button_height,
+                                          _width=12)
         add_button.pack(side='left', expand='true')
         
+        # Create a button to add every quiz file within a folder
+        self.import_button = Widgets.CreateButton(parent_frame,
+                                                  _text='Import\nFolder',
+                                                  _cmd=self.ImportFolder,
+                                                  _height=self.button_height,
+                                                  _width=12)
+        self.import_button.pack(side='left', expand='true')
+        
         # Create a button to remove a file from the listbox
         remove_button = Widgets.CreateButton(parent_frame,
                                              _text='Remove\n Selected File(s)',
-                                             _cmd=RemoveFile,
+                                             _cmd=self.RemoveFile,
                                              _height=self.button_height)
         remove_button.pack(side='right', expand='true')
     
@@ -156,29 +321,86 @@ class MainWindow():
             parent_frame: the Frame that holds the buttons.
         """
         
-        def Load():
-            """Call the function to load selected quiz files and launch quiz.
-        
-            This function is called by the 'Load Files & Launch Quiz' button.
-            """
-            result, quiz = self.LoadQuizFiles()
-            if result:
-                self.SaveData()
-                QuizWindow.QuizWindow(self.root, quiz)
-        
-        
         launch_button = Widgets.CreateButton(parent_frame,
                                              _text='Load Files & Launch Quiz',
-                                             _cmd=Load,
+                                             _cmd=self.LoadQuizFiles,
                                              _height=self.button_height,
                                              _width=self.button_width)
         launch_button.pack(expand='true')
+        self.launch_button = launch_button
         create_button = Widgets.CreateButton(parent_frame,
                                              _text='Create New Database File',
                                              _cmd=self.CreateNewDatabaseFile,
                                              _height=self.button_height,
                                              _width=self.button_width)
         create_button.pack(expand='true')
+        
+        # Create a label to report progress while quiz files are loading
+        self.status_label = Widgets.CreateLabel(parent_frame, _text='',
+                                                _font=('georgia', 10),
+                                                _anchor='center')
+        self.status_label.pack(fill='x')
+    
+    
+    def InitializeQuizOptions(self, parent_frame):
+        """Initialize the options controlling how many questions are asked.
+        
+        Arguments:
+            parent_frame: the Frame that holds the option widgets
+        """
+        
+        size_frame = Widgets.CreateFrame(parent_frame, _pady=0)
+        size_frame.pack(fill='x')
+        size_label = Widgets.CreateLabel(size_frame,
+                                         _text='Questions per quiz (blank '
+                                               'for all):',
+                                         _anchor='w')
+        size_label.config(width=0)
+        size_label.pack(side='left')
+        self.quiz_size_var = tk.StringVar()
+        size_entry = Widgets.CreateEntry(size_frame, _var=self.quiz_size_var)
+        size_entry.config(width=8)
+        size_entry.pack(side='left')
+        
+        self.stratify_var = tk.IntVar()
+        stratify_check = Widgets.CreateCheckButton(parent_frame,
+                                                   _text='Draw an equal share '
+                                                         'from each file',
+                                                   _var=self.stratify_var)
+        stratify_check.pack(fill='x')
+        
+        self.review_var = tk.IntVar(value=1)
+        review_check = Widgets.CreateCheckButton(parent_frame,
+                                                 _text='Ask questions due for '
+                                                       'review first',
+                                                 _var=self.review_var)
+        review_check.pack(fill='x')
+        
+        self.merge_var = tk.IntVar()
+        merge_check = Widgets.CreateCheckButton(parent_frame,
+                                                _text='Leave out reworded '
+                                                      'copies of questions',
+                                                _var=self.merge_var)
+        merge_check.pack(fill='x')
+    
+    
+    def InitializeSearchBox(self, parent_frame):
+        """Initialize the box used to search the user's quiz files.
+        
+        Arguments:
+            parent_frame: the Frame that holds the search widgets
+        """
+        
+        self.search_var = tk.StringVar()
+        search_entry = Widgets.CreateEntry(parent_frame, _var=self.search_var)
+        search_entry.bind('<Return>', lambda e: self.SearchFiles())
+        search_entry.pack(side='left', fill='x', expand='true')
+        self.search_button = Widgets.CreateButton(parent_frame,
+                                                  _text='Search',
+                                                  _cmd=self.SearchFiles,
+                                                  _height=1,
+                                                  _width=10)
+        self.search_button.pack(side='right')
     
     
     def InitializeWelcomeMessage(self, parent_frame):
@@ -196,6 +418,9 @@ class MainWindow():
             """
             
             self.SaveData()
+            self.CancelLoading()
+            self.CloseDatabase()
+            self.root.CloseDatabase()
             self.root.destroy()
             LogInWindow.LogInWindow()
         
@@ -265,9 +490,23 @@ class MainWindow():
                                        window=welcome_frame)
         self.InitializeWelcomeMessage(welcome_frame)
         
+        # Create the quiz size options
+        topx = 455
+        topy = 165
+        botx = 885
+        boty = 287
+        self.main_canvas.create_rectangle(topx, topy, botx, boty,
+                                          fill=white)
+        options_frame = Widgets.CreateFrame(self.main_canvas)
+        self.main_canvas.create_window(topx + 2, topy + 2, anchor='nw',
+                                       height=boty - topy - 2,
+                                       width=botx - topx - 2,
+                                       window=options_frame)
+        self.InitializeQuizOptions(options_frame)
+        
         # Create the main program buttons
         topx = 455
-        topy = 267
+        topy = 297
         botx = 885
         boty = 492
         self.main_canvas.create_rectangle(topx, topy, botx, boty,
@@ -278,96 +517,245 @@ class MainWindow():
                                        width=botx - topx - 2,
                                        window=main_buttons_frame)
         self.InitializeMainButtons(main_buttons_frame)
+        
+        # Create the search box
+        topx = 455
+        topy = 502
+        botx = 885
+        boty = 570
+        self.main_canvas.create_rectangle(topx, topy, botx, boty,
+                                          fill=white)
+        search_frame = Widgets.CreateFrame(self.main_canvas)
+        self.main_canvas.create_window(topx + 2, topy + 2, anchor='nw',
+                                       height=boty - topy - 2,
+                                       width=botx - topx - 2,
+                                       window=search_frame)
+        self.InitializeSearchBox(search_frame)
     
     
-    def LoadDatabase(self):
-        """Load the user's quiz file history from the database file.
+    def LaunchSearchQuiz(self, selection):
+        """Begin loading a quiz made of questions found by a search.
         
-        This function opens the file containing the quiz database files each
-            user has utilized in the past and loads the files associated with
-            the current user into a list. If any changes are made to this list,
-            they will be saved back to the file once a quiz begins.
+        Arguments:
+            selection: a dictionary mapping each quiz file to a list of the
+                       positions of the questions to ask from it
+        
+        Returns:
+            'True' if loading has begun.
+            'False' if files are already loading.
         """
         
-        db_data = []
-        try:
-            with open(self.DB_FILE, 'r') as infile:
-                db_data = json.load(infile)
-            db_data = db_data[self.current_user]
-        except IOError:
-            # The database file is nonexistent or corrupt and should be
-            #   created as a fresh file
-            with open(self.DB_FILE, 'w') as infile:
-                pass
-        except JSONDecodeError:
-            tk.messagebox.showerror('Error',
-                                    f'Unable to load data from {self.DB_FILE}')
-        except:
-            tk.messagebox.showerror('Error', 'Unexpected error encountered')
+        if self.quiz_stream is not None:
+            return False
+        self.StartQuiz(QuizLoader.BankStream(list(selection),
+                                             cache=self.bank_cache,
+                                             selection=selection,
+                                             merge_similar=bool(
+                                                 self.merge_var.get())))
+        return True
+    
+    
+    def LoadDatabase(self, history=None):
+        """Load the user's quiz file history from the database file.
+        
+        If any changes are made to the returned list, they will be saved back
+            to the user's history file once a quiz begins.
+        
+        Arguments:
+            history: the result of 'LoadFileHistory' if it has already been
+                     called on a worker thread (default: load it now)
+        
+        Returns:
+            A list of the current user's quiz files, which is empty if the
+                user has no history or the database can't be loaded
+        """
         
-        return db_data
+        if history is None:
+            history = LoadFileHistory(self.current_user)
+        self.file_db, user_files, error = history
+        if error:
+            tk.messagebox.showerror('Error', error)
+        return user_files
     
     
     def LoadQuizFiles(self):
-        """Load the selected quiz files into a list.
+        """Begin loading the selected quiz files in the background.
+        
+        This function is called by the 'Load Files & Launch Quiz' button. The
+            selected files are decoded and validated concurrently, and the
+            quiz launches once every file has either produced questions or
+            failed to load. If a quiz size is entered, only that many
+            questions are drawn from the selected files.
         
         Returns:
-            'True' and a list containing file contents if files were selected
-                and at least one file was able to be loaded.
-            'False' and 'None' if no files were selected, no files could be
-                accessed, or the user chose not to proceed after encountering
-                errors loading the files.
+            'True' if files were selected and loading has begun.
+            'False' if no files were selected, the quiz size is invalid, or
+                files are already loading.
         """
         
+        if self.quiz_stream is not None:
+            return False
+        
         selections = self.listbox.curselection()
         if not selections:
             tk.messagebox.showerror('Error', 'No files selected!\nSelect ' \
                                              'files from the listbox prior ' \
                                              'to launching a quiz.')
-            return False, None
-        
-        # Load the contents of selected files
-        quiz = []
-        error_msg = 'Error accessing the following files:\n'
-        errors_flag = False
-        for index in selections:
-            try:
-                with open(self.user_files[index], 'r') as infile:
-                    quiz.extend(json.load(infile))
-            except:
-                # Create a composite error message for inaccessible files
-                errors_flag = True
-                error_msg += f'{os.path.basename(self.user_files[index])}\n'
-        
-        if not quiz:
-            tk.messagebox.showerror('Error', 'No files could be accessed')
-            return False, None
+            return False
         
-        if errors_flag:
-            error_msg += 'Contents from those files won\'t be added. Continue?'
-            ask = tk.messagebox.askyesno('Error', error_msg)
-            if not ask:
-                return False, None
+        sample_size = None
+        size_text = self.quiz_size_var.get().strip()
+        if size_text:
+            sample_size = int(size_text) if size_text.isdecimal() else 0
+            if sample_size < 1:
+                tk.messagebox.showerror('Error', 'Enter a positive number ' \
+                                                 'of questions per quiz, ' \
+                                                 'or leave it blank to use ' \
+                                                 'every question.')
+                return False
+        
+        self.StartQuiz(QuizLoader.BankStream([self.user_files[index]
+                                              for index in selections],
+                                             cache=self.bank_cache,
+                                             sample_size=sample_size,
+                                             stratify=bool(
+                                                 self.stratify_var.get()),
+                                             merge_similar=bool(
+                                                 self.merge_var.get())))
+        return True
+    
+    
+    def LoadSchedule(self):
+        """Load the user's review schedule in the background, if needed.
+        
+        The schedule is only loaded the first time a quiz uses it, so logging
+            in doesn't wait on it. Quiz files load at the same time.
+        """
         
-        return True, quiz
+        if self.scheduler is not None or self.scheduler_loading:
+            return
+        
+        def Loaded(result):
+            """Keep the loaded schedule and report any error."""
+            
+            self.scheduler, error = result
+            self.scheduler_loading = False
+            if error:
+                tk.messagebox.showerror('Error', error)
+        
+        def Failed(error):
+            """Fall back to a schedule held in memory only."""
+            
+            self.scheduler = Scheduler.Scheduler(None)
+            self.scheduler_loading = False
+            tk.messagebox.showerror('Error', 'Unexpected error encountered')
+        
+        
+        self.scheduler_loading = True
+        Background.BackgroundTask(self.root,
+                                  lambda: Scheduler.LoadScheduler(
+                                      self.current_user),
+                                  Loaded, Failed)
     
     
     def OnClose(self):
-        """Save user file data before exiting the program."""
+        """Save user file and account data before exiting the program."""
         
         self.SaveData()
+        self.CancelLoading()
+        self.CloseDatabase()
+        self.root.CloseDatabase()
         self.root.destroy()
     
     
+    def OpenSearchIndex(self):
+        """Return the search index, opening it the first time it's needed.
+        
+        This function is called on worker threads, so an error opening the
+            index is left in 'search_error' for 'ReportSearchError'.
+        
+        Returns:
+            The SearchIndex, or 'None' if searching isn't available.
+        """
+        
+        with self.search_lock:
+            if self.search_index is None and self.search_available:
+                self.search_index, self.search_error = \
+                                   SearchIndex.LoadSearchIndex()
+                self.search_available = self.search_index is not None
+            return self.search_index
+    
+    
+    def PollQuizFiles(self):
+        """Report loading progress and launch the quiz once files are open.
+        
+        This function reschedules itself until every selected file has either
+            produced its first questions or failed to load, or when sampling
+            or selecting questions, until every file has been read. Files that
+            couldn't be loaded are reported in a single composite message
+            before the quiz launches. Files that no longer hold the questions
+            a search selected are indexed again.
+        """
+        
+        stream = self.quiz_stream
+        if stream is None:
+            # Loading was cancelled
+            return
+        stream.Update()
+        if not stream.IsReady() or self.scheduler_loading:
+            opened = len(stream.paths) - len(stream.unopened)
+            self.status_label['text'] = f'Loading files: {opened} of ' \
+                                        f'{len(stream.paths)}'
+            self.root.after(50, self.PollQuizFiles)
+            return
+        
+        self.quiz_stream = None
+        self.status_label['text'] = ''
+        self.launch_button['state'] = 'normal'
+        
+        if stream.selection is not None and stream.failed:
+            self.UpdateSearchIndex()
+        
+        if stream.IsEmpty():
+            tk.messagebox.showerror('Error', 'No files could be accessed')
+            return
+        
+        # Create a composite error message for inaccessible files
+        if stream.failed:
+            error_msg = 'Error accessing the following files:\n'
+            for path in stream.failed:
+                error_msg += f'{os.path.basename(path)}: ' \
+                             f'{stream.reasons.get(path, "")}\n'
+            error_msg += 'Contents from those files won\'t be added. Continue?'
+            ask = tk.messagebox.askyesno('Error', error_msg)
+            if not ask:
+                stream.Close()
+                return
+        
+        if self.answer_log is None:
+            self.answer_log, error = AnswerLog.LoadAnswerLog(self.current_user)
+            if error:
+                tk.messagebox.showerror('Error', error)
+        
+        self.SaveData()
+        scheduler = self.scheduler if self.review_var.get() else None
+        import QuizWindow
+        QuizWindow.QuizWindow(self.root, stream, scheduler=scheduler,
+                              answer_log=self.answer_log)
+    
+    
     def RemoveFile(self):
-        """Remove selected file(s) from the user's file list.
+        """Remove selected file(s) from the user's file list and the Listbox.
         
-        Files must be selected in the Listbox prior to clicking the button.
+        This function is called by the 'Remove Selected File(s)' button. Files
+            must be selected in the Listbox prior to clicking the button. The
+            selected files are deleted in place, last first, so no new list
+            is built, and only their keys are removed from the set of file
+            keys.
         
         Returns:
             'True' if files were selected and removed from the list.
-            'False' if no files from the Listbox were selected or files weren't
-                able to be removed from the list.
+            'False' if no files from the Listbox were selected.
         """
         
         selections = self.listbox.curselection()
@@ -375,29 +763,164 @@ class MainWindow():
             messagebox.showerror('Error', 'Select one or more files first')
             return False
         
-        new_files = []
-        for i, file in enumerate(self.user_files, 0):
-            if i in selections:
-                continue
-            new_files.append(file)
-        if new_files == self.user_files:
-            messagebox.showerror('Error', 'Files were not able to be removed.')
-            return False
-        self.user_files = new_files
+        # The list is changed in place, since other windows hold a reference
+        #   to it
+        for index in sorted(selections, reverse=True):
+            self.file_keys.discard(QuizLoader.PathKey(self.user_files[index]))
+            del self.user_files[index]
+        self.listbox.DeleteIndices(selections)
         return True
     
     
+    def ReportSearchError(self):
+        """Show any error opening the search index, on the Tk thread.
+        
+        The Search button is disabled if the index couldn't be opened at all.
+        """
+        
+        with self.search_lock:
+            error = self.search_error
+            self.search_error = None
+        if error is None:
+            return
+        messagebox.showerror('Error', error)
+        if not self.search_available:
+            self.search_button['state'] = 'disabled'
+    
+    
     def SaveData(self):
-        """Save the user's file information to the database file."""
-        
-        try:
-            with open(self.DB_FILE, 'r+') as outfile:
-                existing_data = json.load(outfile)
-                existing_data[self.current_user] = self.user_files
-                outfile.seek(0)
-                json.dump(existing_data, outfile, indent=4)
-                outfile.truncate()
-        except:
-            tk.messagebox.showerror('Error',
-                                    f'{self.DB_FILE} could not be accessed.' \
-                                    'Altered file information won\'t be saved')
\ No newline at end of file
+        """Queue the user's file information to be saved in the background.
+        
+        The information is written to the user's history file by the writer
+            thread. Any errors are reported when the database is closed.
+        """
+        
+        self.writer.Submit(self.current_user, list(self.user_files))
+    
+    
+    def SearchFiles(self):
+        """Search the user's quiz files for the words in the search box.
+        
+        This function is called by the 'Search' button. Files that changed
+            since they were indexed are indexed again in the background
+            before searching, and the matches are shown in a SearchWindow.
+        """
+        
+        query = self.search_var.get().strip()
+        if not query:
+            messagebox.showerror('Error', 'Enter words to search for')
+            return
+        if not self.user_files:
+            messagebox.showerror('Error', 'Add quiz files to search first')
+            return
+        if self.searching or not self.search_available:
+            return
+        
+        def Failed(error):
+            """Report a search that couldn't be completed."""
+            
+            self.searching = False
+            self.search_button['state'] = 'normal'
+            self.status_label['text'] = ''
+            messagebox.showerror('Error', 'Unable to search quiz files')
+        
+        def Found(results):
+            """Show the matching questions."""
+            
+            self.searching = False
+            self.search_button['state'] = 'normal'
+            self.status_label['text'] = ''
+            self.ReportSearchError()
+            if results is None:
+                return
+            if not results:
+                messagebox.showinfo('Search', 'No questions match '
+                                              f'\'{query}\'')
+                return
+            import SearchWindow
+            SearchWindow.SearchWindow(self.root, query, results,
+                                      self.LaunchSearchQuiz)
+        
+        def Search():
+            """Update the index and search it on a worker thread."""
+            
+            index = self.OpenSearchIndex()
+            if index is None:
+                return None
+            index.Update(paths)
+            return index.Search(query, paths)
+        
+        
+        paths = list(self.user_files)
+        self.searching = True
+        self.search_button['state'] = 'disabled'
+        self.status_label['text'] = 'Searching...'
+        Background.BackgroundTask(self.root, Search, Found, Failed)
+    
+    
+    def StartQuiz(self, stream):
+        """Begin loading a quiz's files and launch it once they're opened.
+        
+        Arguments:
+            stream: the BankStream loading the quiz's questions
+        """
+        
+        self.quiz_stream = stream
+        self.quiz_stream.Start()
+        self.launch_button['state'] = 'disabled'
+        if self.review_var.get():
+            self.LoadSchedule()
+        self.PollQuizFiles()
+    
+    
+    def UpdateSearchIndex(self):
+        """Index any of the user's quiz files that changed, in the background.
+        
+        The index is opened on the worker thread the first time. Files that
+            can't be indexed are left out of searches, so only an error
+            opening the index is reported.
+        """
+        
+        def Update():
+            """Open the index if needed and update it on a worker thread."""
+            
+            index = self.OpenSearchIndex()
+            if index is not None:
+                index.Update(paths)
+        
+        
+        if not self.search_available:
+            return
+        paths = list(self.user_files)
+        Background.BackgroundTask(self.root, Update,
+                                  lambda result: self.ReportSearchError(),
+                                  lambda error: self.ReportSearchError())
+
+
+def LoadFileHistory(username):
+    """Open the file history store and retrieve a user's quiz files.
+    
+    This function opens the store holding the quiz files each user has
+        utilized in the past, importing the older 'previousfiles.json' file
+        the first time. It doesn't use any widgets, so it can run on a worker
+        thread while the log in window stays responsive.
+    
+    Arguments:
+        username: the user whose files are retrieved
+    
+    Returns:
+        The store holding every user's files, which is held in memory only if
+            the history couldn't be loaded, a list of the user's files, and
+            an error message or 'None'
+    """
+    
+    try:
+        file_db = FileHistory.FileHistory(HISTORY_DIR, legacy_file=DB_FILE)
+        return file_db, list(file_db.Get(username, [])), None
+    except JSONDecodeError:
+        error = f'Unable to load data from {HISTORY_DIR}'
+    except:
+        error = 'Unexpected error encountered'
+    
+    # Keep working from memory so the session can continue
+    return Journal.JournaledDict(None), [], error
@@ -0,0 +1,352 @@
+"""Find questions that are reworded copies of each other.
+
+Each question is broken into shingles, the pairs of adjacent words in its
+    normalized question text plus each of its normalized answers, and
+    summarized by a MinHash signature. Questions whose signatures agree in
+    every row of at least one band are compared, so near-duplicates are found
+    without comparing every pair of questions. Two questions are reported as
+    near-duplicates if their signatures estimate that at least 'threshold' of
+    their shingles are shared.
+
+Usage:
+    python NearDuplicates.py PATH [PATH ...] [--threshold T] [--json]
+
+Each PATH may be a quiz file or a folder, which is searched for quiz files.
+    The exit status is 1 if any near-duplicates were found.
+"""
+
+import argparse
+import array
+import json
+import operator
+import random
+import sys
+import zlib
+
+import BankValidator
+import Question
+import QuizLoader
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Number of hash values in a signature, split into bands of rows. Questions
+#   sharing all the rows of any band are compared, which finds most pairs
+#   sharing at least half their shingles
+NUM_HASHES = 48
+BANDS = 16
+ROWS = NUM_HASHES // BANDS
+
+# Default fraction of shingles two questions must share to be near-duplicates
+THRESHOLD = 0.6
+
+# Buckets that would hold more questions than this are treated as common
+#   phrasing rather than duplicates and ignored, so crowded buckets can't make
+#   the search quadratic
+MAX_BUCKET = 50
+
+
+class NearDuplicateIndex():
+    """An LSH index of question signatures.
+    
+    Questions are added one at a time. Each band of a question's signature is
+        hashed to a bucket, and 'Match' only compares a question against the
+        questions sharing one of its buckets. Signatures are kept in a packed
+        array of 32 bit values.
+    
+    Arguments:
+        threshold: the estimated fraction of shingles two questions must
+                   share to be near-duplicates (default: THRESHOLD)
+        seed: the seed used to choose the MinHash functions (default: 0)
+    """
+    
+    def __init__(self, threshold=THRESHOLD, seed=0):
+    
+        self.threshold = threshold
+        rng = random.Random(seed)
+        self.masks = [rng.getrandbits(32) for _ in range(NUM_HASHES)]
+        if numpy is not None:
+            self.mask_array = numpy.array(self.masks, dtype=numpy.uint32)
+        
+        # Every question's signature, one after another, the hash of its
+        #   type and correct answers, and the questions in each bucket
+        self.signatures = array.array('I')
+        self.answer_keys = []
+        self.buckets = {}
+    
+    
+    def Add(self, question, signature=None):
+        """Add a question to the index.
+        
+        Arguments:
+            question: the Question to add
+            signature: the question's signature, if it has already been
+                       computed (default: compute it now)
+        
+        Returns:
+            The question's number within the index, counting from 0.
+        """
+        
+        if signature is None:
+            signature = self.Signature(question)
+        number = len(self.answer_keys)
+        self.signatures.extend(signature)
+        self.answer_keys.append(AnswerKey(question))
+        for bucket in BucketKeys(signature):
+            members = self.buckets.get(bucket)
+            if members is None:
+                self.buckets[bucket] = number
+            elif type(members) is int:
+                self.buckets[bucket] = [members, number]
+            elif len(members) == MAX_BUCKET:
+                # The bucket is full, so it's ignored from now on
+                self.buckets[bucket] = ()
+            elif members:
+                members.append(number)
+        return number
+    
+    
+    def Candidates(self, signature):
+        """Return the indexed questions sharing a bucket with a signature."""
+        
+        candidates = set()
+        for bucket in BucketKeys(signature):
+            members = self.buckets.get(bucket)
+            if members is None:
+                continue
+            if type(members) is int:
+                candidates.add(members)
+            else:
+                candidates.update(members)
+        return candidates
+    
+    
+    def Match(self, question, signature=None):
+        """Find an indexed question that the question could be merged into.
+        
+        A question is only merged into a near-duplicate of the same type whose
+            correct answers have the same normalized text, so rewording a
+            question never changes which answers are marked correct.
+        
+        Arguments:
+            question: the Question to look for
+            signature: the question's signature, if it has already been
+                       computed (default: compute it now)
+        
+        Returns:
+            The number of the matching question, or 'None'.
+        """
+        
+        if signature is None:
+            signature = self.Signature(question)
+        answer_key = AnswerKey(question)
+        for number in sorted(self.Candidates(signature)):
+            if self.answer_keys[number] == answer_key and \
+                    self.Similarity(number, signature) >= self.threshold:
+                return number
+        return None
+    
+    
+    def Pairs(self):
+        """Return every pair of indexed near-duplicates.
+        
+        Returns:
+            A list of (first number, second number, similarity) tuples with
+                the first number lower, sorted by question number.
+        """
+        
+        pairs = set()
+        for members in self.buckets.values():
+            if type(members) is int:
+                continue
+            for i, first in enumerate(members, 0):
+                for second in members[i+1:]:
+                    pairs.add((first, second))
+        
+        results = []
+        for first, second in sorted(pairs):
+            similarity = self.Similarity(first, self.SignatureOf(second))
+            if similarity >= self.threshold:
+                results.append((first, second, similarity))
+        return results
+    
+    
+    def Signature(self, question):
+        """Return the MinHash signature of a question's shingles.
+        
+        Each hash value is the smallest shingle hash after mixing it with one
+            of the index's random masks, so two questions' values agree with
+            probability equal to the fraction of shingles they share. Shingles
+            are hashed with CRC-32 rather than 'hash', which changes between
+            runs for strings, so a seed always gives the same signatures.
+            NumPy is used to mix every shingle with every mask at once when
+            it's installed.
+        """
+        
+        hashes = [zlib.crc32(shingle.encode('utf-8'))
+                  for shingle in Shingles(question)]
+        if not hashes:
+            return [0] * NUM_HASHES
+        if numpy is not None:
+            hashes = numpy.array(hashes, dtype=numpy.uint32)
+            return numpy.bitwise_xor.outer(hashes, self.mask_array).min(
+                axis=0).tolist()
+        return [min(map(mask.__xor__, hashes)) for mask in self.masks]
+    
+    
+    def SignatureOf(self, number):
+        """Return the signature of an indexed question."""
+        
+        start = number * NUM_HASHES
+        return self.signatures[start:start+NUM_HASHES]
+    
+    
+    def Similarity(self, number, signature):
+        """Estimate the shingles shared by an indexed question and another."""
+        
+        start = number * NUM_HASHES
+        stored = self.signatures[start:start+NUM_HASHES]
+        return sum(map(operator.eq, stored, signature)) / NUM_HASHES
+
+
+def AnswerKey(question):
+    """Return a hash of a question's type and correct answer text."""
+    
+    correct = sorted(Question.Normalize(question.answers[index])
+                     for index in question.correct)
+    return zlib.crc32('\x1f'.join((question.q_type, *correct)).encode('utf-8'))
+
+
+def BucketKeys(signature):
+    """Yield the bucket of each band of a signature.
+    
+    The buckets are hashes of integers, which are the same in every run.
+    """
+    
+    for band in range(BANDS):
+        start = band * ROWS
+        yield hash((band, *signature[start:start+ROWS]))
+
+
+def FindGroups(questions, threshold=THRESHOLD):
+    """Group questions that are near-duplicates of each other.
+    
+    Arguments:
+        questions: a list of Question objects
+        threshold: the estimated fraction of shingles two questions must
+                   share to be near-duplicates (default: THRESHOLD)
+    
+    Returns:
+        A list of groups, each a sorted list of the positions in 'questions'
+            of two or more near-duplicates, ordered by their first position.
+    """
+    
+    index = NearDuplicateIndex(threshold)
+    for question in questions:
+        index.Add(question)
+    
+    # Join near-duplicate pairs into groups
+    parents = list(range(len(questions)))
+    
+    def Find(number):
+        """Return the first question in a question's group."""
+        
+        while parents[number] != number:
+            parents[number] = parents[parents[number]]
+            number = parents[number]
+        return number
+    
+    for first, second, _ in index.Pairs():
+        parents[Find(second)] = Find(first)
+    
+    groups = {}
+    for number in range(len(questions)):
+        root = Find(number)
+        groups.setdefault(root, []).append(number)
+    return sorted(group for group in groups.values() if len(group) > 1)
+
+
+def Merge(questions, threshold=THRESHOLD):
+    """Drop questions that are reworded copies of earlier questions.
+    
+    Arguments:
+        questions: a list of Question objects
+        threshold: the estimated fraction of shingles two questions must
+                   share to be near-duplicates (default: THRESHOLD)
+    
+    Returns:
+        A list of the questions kept, in order.
+    """
+    
+    index = NearDuplicateIndex(threshold)
+    kept = []
+    for question in questions:
+        signature = index.Signature(question)
+        if index.Match(question, signature) is None:
+            index.Add(question, signature)
+            kept.append(question)
+    return kept
+
+
+def Shingles(question):
+    """Return the set of shingles describing a question.
+    
+    The shingles are each pair of adjacent words in the normalized question
+        text, or the single word of a one word question, plus each normalized
+        answer.
+    """
+    
+    words = Question.Normalize(question.question).split()
+    shingles = {' '.join(words[i:i+2]) for i in range(max(1, len(words)-1))}
+    shingles.update('\x1f' + Question.Normalize(answer)
+                    for answer in question.answers)
+    shingles.discard('')
+    return shingles
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='+',
+                        help='quiz files, or folders holding quiz files')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='fraction of shingles near-duplicates share '
+                             f'(default: {THRESHOLD})')
+    parser.add_argument('--json', action='store_true',
+                        help='print the groups as JSON')
+    args = parser.parse_args(argv)
+    
+    questions = []
+    locations = []
+    for path in BankValidator.FindFiles(args.paths):
+        try:
+            bank = QuizLoader.LoadBank(path)
+        except (OSError, ValueError) as e:
+            print(f'Unable to load {path}: {e}', file=sys.stderr)
+            continue
+        questions.extend(bank)
+        locations.extend((path, position) for position in range(len(bank)))
+    
+    groups = FindGroups(questions, args.threshold)
+    if args.json:
+        json.dump([[{'path': locations[number][0],
+                     'position': locations[number][1],
+                     'question': questions[number].question}
+                    for number in group] for group in groups],
+                  sys.stdout, indent=4)
+        print()
+    else:
+        for group in groups:
+            print(f'{len(group)} near-duplicate questions:')
+            for number in group:
+                path, position = locations[number]
+                print(f'    {path} #{position + 1}: '
+                      f'{" ".join(questions[number].question.split())}')
+        print(f'{len(groups)} group(s) of near-duplicates found in '
+              f'{len(questions)} questions')
+    return 1 if groups else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
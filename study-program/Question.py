@@ -0,0 +1,181 @@
+import hashlib
+import unicodedata
+
+
+class Question():
+    """A single quiz question.
+    
+    Questions are stored with '__slots__' rather than as the dictionaries
+        found in quiz files. Answers are kept in a list in file order, and the
+        correct answers are kept as a tuple of indices into that list. The
+        correct answers are also kept as a bitmask of those indices, computed
+        once when the question is created, so answers can be graded without
+        comparing any text. Answers that share their text are interchangeable,
+        so chosen answers are matched to the first answers holding their text
+        by 'MatchChoices' before they're graded.
+    
+    Attributes:
+        q_type: 'single' or 'multi'
+        question: the question text
+        answers: a list of the answer texts
+        correct: a tuple of the indices of the correct answers
+        correct_mask: an integer with bit 'n' set if answer 'n' is correct
+        char_count: the total number of characters in the answers
+        source: the quiz file the question was loaded from, or 'None'
+        key: the question's ID, as returned by 'Key', or 'None' until it's
+             first needed
+    """
+    
+    __slots__ = ('q_type', 'question', 'answers', 'correct', 'correct_mask',
+                 'char_count', 'source', 'key')
+    
+    def __init__(self, q_type, question, answers, correct, char_count,
+                 source=None, key=None):
+    
+        self.q_type = q_type
+        self.question = question
+        self.answers = answers
+        self.correct = correct
+        self.correct_mask = ChoiceMask(correct)
+        self.char_count = char_count
+        self.source = source
+        self.key = key
+    
+    
+    def Key(self):
+        """Return the question's ID, a hash of its normalized content.
+        
+        The question text, the set of answers, and the set of correct answers
+            are hashed after normalizing their Unicode form, case, and
+            whitespace. The same question has the same ID in every file,
+            whatever order its answers are listed in, so the ID can be used
+            to recognize a question across files and sessions. The ID is
+            computed once and kept with the question.
+        
+        Returns:
+            The ID as a string of 24 hexadecimal digits.
+        """
+        
+        if self.key is None:
+            answers = [Normalize(answer) for answer in self.answers]
+            correct = sorted(answers[index] for index in self.correct)
+            content = '\x1e'.join([Normalize(self.question),
+                                   '\x1f'.join(sorted(answers)),
+                                   '\x1f'.join(correct)])
+            self.key = hashlib.blake2b(content.encode('utf-8'),
+                                       digest_size=12).hexdigest()
+        return self.key
+    
+    
+    def MatchChoices(self, choices):
+        """Match chosen answers to the first answers holding their text.
+        
+        Each correct answer in a quiz file names an answer by its text, and
+            is matched to the first answer with that text not already matched
+            by another. Chosen answers are matched the same way, so choosing
+            either of two answers with the same text grades alike.
+        
+        Arguments:
+            choices: the indices of the chosen answers
+        
+        Returns:
+            A list of the matched answer indices, in the order chosen, with
+                any answer chosen twice matched once.
+        """
+        
+        positions = {}
+        for index, answer in enumerate(self.answers, 0):
+            positions.setdefault(answer, []).append(index)
+        used = {}
+        matched = []
+        for index in dict.fromkeys(choices):
+            answer = self.answers[index]
+            count = used.get(answer, 0)
+            used[answer] = count + 1
+            matched.append(positions[answer][count])
+        return matched
+    
+    
+    def Record(self):
+        """Return the question as a tuple of plain values for serializing."""
+        
+        return (self.q_type, self.question, tuple(self.answers),
+                self.correct, self.char_count, self.Key())
+
+
+def ChoiceMask(choices):
+    """Return an integer with a bit set for each answer index in 'choices'."""
+    
+    mask = 0
+    for index in choices:
+        mask |= 1 << index
+    return mask
+
+
+def FromEntry(entry, source=None):
+    """Convert a quiz file entry into a Question.
+    
+    Arguments:
+        entry: a quiz entry dictionary in the format created by
+               'CreateDBWindow.CreateQuizEntry'
+        source: the quiz file the entry was read from (default: None)
+    
+    Returns:
+        The equivalent Question, with its ID already computed.
+    """
+    
+    answers = []
+    for i in range(1, entry['NumOfAnswers']+1):
+        answers.append(entry['Answer'+str(i)])
+    
+    correct_text = entry['Correct']
+    if entry['Type'] == 'single':
+        correct_text = [correct_text]
+    # Each correct answer is matched to its own answer, so answers sharing
+    #   their text are only all correct if the text is listed for each
+    positions = {}
+    for index, answer in enumerate(answers, 0):
+        positions.setdefault(answer, []).append(index)
+    correct = []
+    for answer in correct_text:
+        indices = positions.get(answer)
+        if indices:
+            correct.append(indices.pop(0))
+    correct.sort()
+    
+    # 'single' and 'multi' are interned so every question shares one copy
+    q_type = 'single' if entry['Type'] == 'single' else 'multi'
+    question = Question(q_type, entry['Question'], answers, tuple(correct),
+                        entry.get('CharCount', 0), source)
+    
+    # Compute the ID now, on the loading thread, so it's cached with the file
+    question.Key()
+    return question
+
+
+def FromRecord(record, source=None):
+    """Convert a tuple created by 'Question.Record' back into a Question.
+    
+    Arguments:
+        record: the tuple returned by 'Question.Record'
+        source: the quiz file the record was loaded from (default: None)
+    """
+    
+    q_type, question, answers, correct, char_count, key = record
+    q_type = 'single' if q_type == 'single' else 'multi'
+    return Question(q_type, question, list(answers), tuple(correct),
+                    char_count, source, key)
+
+
+def Normalize(text):
+    """Return text with its Unicode form, case, and whitespace normalized."""
+    
+    # Most text is ASCII, which is already in normal form, and has no runs of
+    #   whitespace to collapse, so those steps are skipped where possible
+    if not text.isascii():
+        text = unicodedata.normalize('NFKC', text)
+    text = text.casefold()
+    if ('  ' in text or not text.isprintable() or text[:1] == ' ' or
+            text[-1:] == ' '):
+        text = ' '.join(text.split())
+    return text
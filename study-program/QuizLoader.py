@@ -0,0 +1,779 @@
+import bisect
+from concurrent.futures import ThreadPoolExecutor
+import json
+from json.decoder import JSONDecodeError
+import os
+import queue
+import random
+import threading
+
+import BankValidator
+import BinaryBank
+import Question
+
+# Number of characters read from a quiz file at a time
+CHUNK_SIZE = 1 << 16
+
+# Number of questions handed from a loading thread to the quiz at a time
+BATCH_SIZE = 500
+
+# Maximum number of files loaded at once
+MAX_WORKERS = 32
+
+
+def IterQuestions(path, _chunk_size=CHUNK_SIZE):
+    """Yield the entries of a quiz file one at a time.
+    
+    Quiz files hold a single JSON array of question dictionaries. Rather than
+        decoding the whole file at once, the file is read in chunks and each
+        array element is decoded as soon as it is complete, so memory use is
+        bounded by the size of a single question rather than the whole file.
+    
+    Arguments:
+        path: the quiz file to read
+        _chunk_size: the number of characters read at a time
+    
+    Yields:
+        Each question dictionary in the order it appears in the file
+    
+    Raises:
+        IOError if the file can't be read.
+        JSONDecodeError if the file doesn't contain a JSON array or an entry
+            can't be decoded.
+    """
+    
+    decoder = json.JSONDecoder()
+    with open(path, 'r') as infile:
+        buffer = ''
+        pos = 0
+        eof = False
+        
+        def Fill():
+            """Read the next chunk, returning 'False' at the end."""
+            nonlocal buffer, pos, eof
+            chunk = infile.read(_chunk_size)
+            if not chunk:
+                eof = True
+                return False
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            return True
+        
+        def NextChar():
+            """Skip whitespace and return the next character, if any."""
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos].isspace():
+                    pos += 1
+                if pos < len(buffer):
+                    return buffer[pos]
+                if not Fill():
+                    return ''
+        
+        char = NextChar()
+        if char != '[':
+            raise JSONDecodeError('Expected a JSON array', buffer, pos)
+        pos += 1
+        
+        if NextChar() == ']':
+            return
+        
+        while True:
+            # Decode the next entry, reading more of the file until the
+            #   entry is complete
+            NextChar()
+            while True:
+                try:
+                    entry, end = decoder.raw_decode(buffer, pos)
+                except JSONDecodeError:
+                    if eof or not Fill():
+                        raise
+                    continue
+                if end == len(buffer) and not eof and Fill():
+                    # A value ending at the buffer edge may be truncated
+                    continue
+                break
+            pos = end
+            yield entry
+            
+            char = NextChar()
+            if char == ']':
+                return
+            if char != ',':
+                raise JSONDecodeError('Expected \',\' or \']\'', buffer, pos)
+            pos += 1
+
+
+def LoadBank(path):
+    """Load and validate every question in a quiz file.
+    
+    Binary banks are decoded in full, since they were validated when they
+        were converted.
+    
+    Arguments:
+        path: the quiz file or binary bank to load
+    
+    Returns:
+        A list of Question objects in file order.
+    
+    Raises:
+        IOError if the file can't be read.
+        ValueError if the file can't be decoded or an entry is invalid.
+    """
+    
+    if BinaryBank.IsBinaryBank(path):
+        bank = BinaryBank.BinaryBank(path)
+        try:
+            return list(bank)
+        finally:
+            bank.Close()
+    
+    questions = []
+    for entry in IterQuestions(path):
+        ValidateEntry(entry, len(questions))
+        questions.append(Question.FromEntry(entry, path))
+    return questions
+
+
+def PathKey(path):
+    """Return a key identifying a file however its path is written."""
+    
+    return os.path.normcase(os.path.abspath(path))
+
+
+def ScanFolder(folder, exclude=()):
+    """Find every valid quiz file within a directory tree.
+    
+    The tree is walked for '.json' files and binary banks, and each file
+        found is validated on a pool of threads. This function doesn't use
+        any widgets, so it can run on a worker thread.
+    
+    Arguments:
+        folder: the directory to search, including its subdirectories
+        exclude: a set of file keys, as returned by 'PathKey', to skip
+    
+    Returns:
+        A sorted list of the valid quiz files found, and a sorted list of
+            (path, problems) tuples for the files that aren't valid quiz
+            files, where 'problems' is a list of messages as returned by
+            'BankValidator.ReportProblems'.
+    """
+    
+    candidates = []
+    seen = set(exclude)
+    for dirpath, dirnames, filenames in os.walk(folder):
+        for name in filenames:
+            if not name.lower().endswith(('.json',
+                                          BinaryBank.BANK_EXTENSION)):
+                continue
+            path = os.path.join(dirpath, name)
+            key = PathKey(path)
+            if key in seen:
+                continue
+            seen.add(key)
+            candidates.append(path)
+    
+    def Check(path):
+        """Return a list of the file's problems, which is empty if valid."""
+        if not BinaryBank.IsBinaryBank(path):
+            report = BankValidator.ValidateFile(path)
+            problems = BankValidator.ReportProblems(report)
+            if report['truncated']:
+                problems.append(f'{report["truncated"]} more problems')
+            return problems
+        try:
+            ValidateBank(path)
+        except (OSError, ValueError) as e:
+            return [str(e)]
+        except:
+            return ['Unexpected error encountered']
+        return []
+    
+    valid = []
+    invalid = []
+    if candidates:
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS,
+                                                len(candidates))) as executor:
+            for path, problems in zip(candidates,
+                                      executor.map(Check, candidates)):
+                if problems:
+                    invalid.append((path, problems))
+                else:
+                    valid.append(path)
+    return sorted(valid), sorted(invalid)
+
+
+def ValidateBank(path):
+    """Verify that every entry of a quiz file is valid.
+    
+    Arguments:
+        path: the quiz file to check
+    
+    Returns:
+        The number of questions in the file.
+    
+    Raises:
+        IOError if the file can't be read.
+        ValueError if the file can't be decoded, an entry is invalid, or the
+            file holds no questions.
+    """
+    
+    if BinaryBank.IsBinaryBank(path):
+        # Binary banks are validated when they're converted
+        bank = BinaryBank.BinaryBank(path)
+        count = len(bank)
+        bank.Close()
+    else:
+        count = 0
+        for entry in IterQuestions(path):
+            ValidateEntry(entry, count)
+            count += 1
+    if not count:
+        raise ValueError('File holds no questions')
+    return count
+
+
+def ValidateEntry(entry, index=None):
+    """Verify that a quiz entry matches the format written by the program.
+    
+    Arguments:
+        entry: a decoded quiz file entry
+        index: the entry's position in its file, counting from 0, which is
+               named in the error (default: don't name it)
+    
+    Raises:
+        ValueError describing the first problem found with the entry.
+    """
+    
+    errors = BankValidator.CheckEntry(entry)
+    if errors and index is not None:
+        raise ValueError(f'record {index}: {errors[0]}')
+    if errors:
+        raise ValueError(errors[0])
+
+
+class BankStream():
+    """Load the questions of several quiz files concurrently.
+    
+    Each file is decoded and validated on its own thread, and questions are
+        handed back in batches through a queue that the Tk thread drains with
+        'Update' or 'Poll'. A file is 'opened' once its first batch arrives or
+        it finishes loading, so inaccessible files can be reported before a
+        quiz starts while the rest of each file is still loading. Files that
+        fail before contributing any questions are recorded in 'failed', and
+        files that fail part-way through are recorded in 'errors'. The
+        problem that stopped each of those files is kept in 'reasons'.
+    
+    Questions that appear in more than one file, or more than once in a file,
+        are only handed over the first time they arrive. Duplicates are found
+        by their IDs, as returned by 'Question.Key', which are computed on the
+        loading threads and kept in the cache. If 'merge_similar' is set,
+        questions that are reworded copies of a question already handed over
+        are left out as well, as found by a NearDuplicateIndex. Their MinHash
+        signatures are computed on the loading threads.
+    
+    Binary banks aren't decoded at all. Each is opened on a loading thread
+        and handed over whole through 'TakeBanks', so its questions can be
+        decoded one at a time as they're asked. Their questions aren't
+        checked for duplicates, since that would mean decoding every one.
+        The stream keeps every bank it opens until 'Close' is called once the
+        quiz is over.
+    
+    If a BankCache is provided, files found in the cache are loaded from it
+        without decoding any JSON, and files that miss are added to it once
+        they have loaded successfully.
+    
+    If 'sample_size' is given, only that many questions are kept, drawn at
+        random without replacement. Each file keeps a reservoir sample while
+        it's read, and binary banks decode only the questions drawn, so memory
+        use depends on the sample size rather than the size of the files. The
+        questions are handed over together once every file has been read.
+        Every file keeps a full sample, so when the sample is shared equally
+        between the files, the share of a file that fails or holds too few
+        questions is made up from the others.
+    
+    If 'selection' is given, only the questions at the listed positions of
+        each file are kept, such as the matches found by a SearchIndex. JSON
+        files are still read in full, but only the selected questions are
+        converted to Question objects, and binary banks decode only the
+        selected questions.
+    
+    Arguments:
+        paths: the quiz files to load
+        cache: a BankCache used to skip decoding files loaded before
+               (default: no cache)
+        sample_size: the number of questions to keep (default: keep all)
+        stratify: 'True' to draw an equal share of the sample from each file
+                  rather than sampling the files' questions as one pool
+                  (default: False)
+        selection: a dictionary mapping each path to a list of the positions
+                   of the questions kept from it (default: keep all)
+        merge_similar: 'True' to leave out reworded copies of questions
+                       (default: False)
+    """
+    
+    def __init__(self, paths, cache=None, sample_size=None, stratify=False,
+                 selection=None, merge_similar=False):
+    
+        self.paths = paths
+        self.cache = cache
+        self.failed = []
+        self.errors = []
+        self.reasons = {}
+        self.files_done = 0
+        self.loading = bool(paths)
+        
+        # Paths that haven't produced a batch, failed, or finished yet
+        self.unopened = set(paths)
+        
+        # Questions and binary banks drained from the queue but not yet
+        #   handed to the quiz
+        self.buffer = []
+        self.banks = []
+        
+        # The IDs of every question handed over, and the number of duplicate
+        #   questions left out. When merging reworded copies, an index of the
+        #   questions handed over and the number of copies left out
+        self.seen = set()
+        self.duplicates = 0
+        self.similar = None
+        if merge_similar:
+            # Imported here since it loads NumPy, when installed
+            import NearDuplicates
+            self.similar = NearDuplicates.NearDuplicateIndex()
+        self.near_duplicates = 0
+        
+        # The number of questions to sample, and the (sample, question count)
+        #   reported by each file
+        self.sample_size = sample_size
+        self.stratify = stratify
+        self.samples = {}
+        self.rng = random.Random()
+        self.selection = selection
+        
+        self.results = queue.Queue()
+        self.stop = threading.Event()
+        
+        # Every binary bank opened, so they can be closed together. The lock
+        #   keeps a bank from being opened after the stream is closed
+        self.opened = []
+        self.lock = threading.Lock()
+    
+    
+    def Cancel(self):
+        """Stop the loading threads once their current question is done."""
+        
+        self.stop.set()
+    
+    
+    def Close(self):
+        """Stop loading and close every binary bank the stream has opened.
+        
+        Questions already decoded from the banks remain usable, but no more
+            can be drawn from them.
+        """
+        
+        with self.lock:
+            self.stop.set()
+            banks = self.opened
+            self.opened = []
+        for bank in banks:
+            bank.Close()
+    
+    
+    def HandleResult(self, result):
+        """Apply a message from a loading thread to the stream's state.
+        
+        Arguments:
+            result: a (path, status, batch) tuple from a loading thread,
+                    where 'batch' holds the problem found for an 'error'
+        """
+        
+        path, status, batch = result
+        if status == 'batch':
+            self.buffer.extend(self.Unique(*batch))
+            self.unopened.discard(path)
+            return
+        if status == 'bank':
+            self.banks.append(batch)
+            self.unopened.discard(path)
+            return
+        if status == 'sample':
+            self.samples[path] = batch
+            self.unopened.discard(path)
+            return
+        
+        self.files_done += 1
+        if status == 'error':
+            self.reasons[path] = batch
+            if path in self.unopened:
+                self.failed.append(path)
+            else:
+                self.errors.append(path)
+        self.unopened.discard(path)
+        if self.files_done == len(self.paths):
+            self.loading = False
+            if self.sample_size is not None:
+                self.buffer.extend(self.MergeSamples())
+    
+    
+    def IsEmpty(self):
+        """Return 'True' if loading finished without producing questions."""
+        
+        return not self.buffer and not self.banks and not self.loading
+    
+    
+    def IsOpened(self):
+        """Return 'True' once every file has produced questions or ended."""
+        
+        return not self.unopened
+    
+    
+    def IsReady(self):
+        """Return 'True' once the quiz can start from the stream.
+        
+        A quiz usually starts once every file is opened, but a sample is only
+            handed over once every file has been read. A selection waits for
+            every file as well, so files that no longer hold the selected
+            questions are reported before the quiz starts.
+        """
+        
+        if self.sample_size is not None or self.selection is not None:
+            return not self.loading
+        return self.IsOpened()
+    
+    
+    def LoadFile(self, path):
+        """Decode and validate a single quiz file.
+        
+        This function runs on a loading thread. Entries are converted to
+            Question objects and put on the results queue in batches, followed
+            by a 'done' or 'error' message.
+        
+        Arguments:
+            path: the quiz file to load
+        """
+        
+        try:
+            if self.sample_size is not None:
+                self.SampleFile(path)
+                self.results.put((path, 'done', None))
+                return
+            
+            if self.selection is not None:
+                self.SelectFile(path)
+                self.results.put((path, 'done', None))
+                return
+            
+            if BinaryBank.IsBinaryBank(path):
+                bank = BinaryBank.BinaryBank(path)
+                with self.lock:
+                    if len(bank) and not self.stop.is_set():
+                        self.opened.append(bank)
+                        self.results.put((path, 'bank', bank))
+                    else:
+                        bank.Close()
+                self.results.put((path, 'done', None))
+                return
+            
+            # The file is examined before reading so that a file changed
+            #   while loading isn't cached under its new size and time
+            st = os.stat(path)
+            questions = None
+            if self.cache is not None:
+                questions = self.cache.Get(path, st)
+            
+            if questions is not None:
+                for i in range(0, len(questions), BATCH_SIZE):
+                    if self.stop.is_set():
+                        break
+                    batch = [Question.FromRecord(record, path) for record
+                             in questions[i:i+BATCH_SIZE]]
+                    self.PutBatch(path, batch)
+            else:
+                questions = []
+                for entry in IterQuestions(path):
+                    if self.stop.is_set():
+                        break
+                    ValidateEntry(entry, len(questions))
+                    questions.append(Question.FromEntry(entry, path))
+                    if len(questions) % BATCH_SIZE == 0:
+                        self.PutBatch(path, questions[-BATCH_SIZE:])
+                else:
+                    remainder = len(questions) % BATCH_SIZE
+                    if remainder:
+                        self.PutBatch(path, questions[-remainder:])
+                    if self.cache is not None:
+                        self.cache.Put(path, st, [question.Record() for
+                                                  question in questions])
+        except (OSError, ValueError) as e:
+            self.results.put((path, 'error', str(e)))
+            return
+        except:
+            self.results.put((path, 'error', 'Unexpected error encountered'))
+            return
+        
+        self.results.put((path, 'done', None))
+    
+    
+    def MergeSamples(self):
+        """Combine each file's sample into the questions for the quiz.
+        
+        When sampling the files as one pool, the number of questions taken
+            from each file is chosen by drawing positions uniformly from all
+            of the files' questions together, so every question is equally
+            likely to be asked. A stratified sample is shared equally between
+            the files that loaded, smallest first, so a share that a file has
+            too few questions for passes on to the larger files.
+        
+        Duplicates are left out as each file's questions are drawn, and any
+            questions lost to them are made up from the questions the files'
+            samples hold beyond their share.
+        
+        Returns:
+            A list of the sampled Question objects, none of which duplicates
+                another.
+        """
+        
+        paths = [path for path in self.paths if path in self.samples]
+        if not paths:
+            return []
+        counts = [0] * len(paths)
+        if self.stratify:
+            by_size = sorted(range(len(paths)),
+                             key=lambda i: len(self.samples[paths[i]][0]))
+            remaining = self.sample_size
+            for done, i in enumerate(by_size, 0):
+                counts[i] = min(len(self.samples[paths[i]][0]),
+                                remaining // (len(paths) - done))
+                remaining -= counts[i]
+        else:
+            # Count how many of the drawn positions fall within each file
+            ends = []
+            total = 0
+            for path in paths:
+                total += self.samples[path][1]
+                ends.append(total)
+            for position in self.rng.sample(range(total),
+                                            min(self.sample_size, total)):
+                counts[bisect.bisect_right(ends, position)] += 1
+        
+        questions = []
+        spare = []
+        for path, count in zip(paths, counts):
+            sample = self.samples[path][0]
+            self.rng.shuffle(sample)
+            taken = 0
+            for i, question in enumerate(sample, 0):
+                if taken == count:
+                    spare.extend(sample[i:])
+                    break
+                if self.Unique([question]):
+                    questions.append(question)
+                    taken += 1
+        
+        self.rng.shuffle(spare)
+        for question in spare:
+            if len(questions) >= self.sample_size:
+                break
+            questions.extend(self.Unique([question]))
+        return questions
+    
+    
+    def Poll(self):
+        """Collect the questions loaded since the last call without blocking.
+        
+        Returns:
+            A list of newly loaded Question objects, which may be empty.
+        """
+        
+        self.Update()
+        questions = self.buffer
+        self.buffer = []
+        return questions
+    
+    
+    def PutBatch(self, path, questions):
+        """Put a batch of a file's questions on the results queue.
+        
+        This function runs on a loading thread. The questions' signatures are
+            sent with them when reworded copies are being merged.
+        
+        Arguments:
+            path: the quiz file the questions came from
+            questions: a list of Question objects
+        """
+        
+        signatures = None
+        if self.similar is not None:
+            signatures = [self.similar.Signature(question)
+                          for question in questions]
+        self.results.put((path, 'batch', (questions, signatures)))
+    
+    
+    def SampleFile(self, path):
+        """Draw a random sample of a single quiz file's questions.
+        
+        This function runs on a loading thread. JSON files are read and
+            validated in full, but only the questions kept in the reservoir
+            are converted to Question objects. Binary banks decode only the
+            questions drawn. The sample and the file's question count are put
+            on the results queue unless loading is cancelled.
+        
+        Arguments:
+            path: the quiz file to sample
+        """
+        
+        quota = self.sample_size
+        rng = random.Random()
+        if BinaryBank.IsBinaryBank(path):
+            bank = BinaryBank.BinaryBank(path)
+            total = len(bank)
+            sample = [bank[index] for index
+                      in rng.sample(range(total), min(quota, total))]
+            bank.Close()
+        else:
+            sample = []
+            total = 0
+            for entry in IterQuestions(path):
+                if self.stop.is_set():
+                    return
+                ValidateEntry(entry, total)
+                if total < quota:
+                    sample.append(Question.FromEntry(entry, path))
+                else:
+                    # Keep this question with probability quota / total
+                    index = rng.randrange(total + 1)
+                    if index < quota:
+                        sample[index] = Question.FromEntry(entry, path)
+                total += 1
+        
+        self.results.put((path, 'sample', (sample, total)))
+    
+    
+    def SelectFile(self, path):
+        """Load the selected questions of a single quiz file.
+        
+        This function runs on a loading thread. The selected questions are
+            put on the results queue in file order unless loading is
+            cancelled.
+        
+        Arguments:
+            path: the quiz file to load from
+        
+        Raises:
+            ValueError if a position is past the end of the file, since the
+                file has changed since the positions were found.
+        """
+        
+        positions = self.selection.get(path, ())
+        if BinaryBank.IsBinaryBank(path):
+            bank = BinaryBank.BinaryBank(path)
+            wanted = sorted(set(positions))
+            if wanted and wanted[-1] >= len(bank):
+                bank.Close()
+                raise ValueError('file changed since it was searched')
+            questions = [bank[index] for index in wanted]
+            bank.Close()
+        else:
+            wanted = set(positions)
+            questions = []
+            for position, entry in enumerate(IterQuestions(path), 0):
+                if self.stop.is_set():
+                    return
+                if position in wanted:
+                    ValidateEntry(entry, position)
+                    questions.append(Question.FromEntry(entry, path))
+                    if len(questions) == len(wanted):
+                        break
+            if len(questions) < len(wanted):
+                raise ValueError('file changed since it was searched')
+        
+        for i in range(0, len(questions), BATCH_SIZE):
+            self.PutBatch(path, questions[i:i+BATCH_SIZE])
+    
+    
+    def Start(self):
+        """Begin loading every file on a pool of threads."""
+        
+        if not self.paths:
+            return
+        executor = ThreadPoolExecutor(max_workers=min(MAX_WORKERS,
+                                                      len(self.paths)))
+        for path in self.paths:
+            executor.submit(self.LoadFile, path)
+        executor.shutdown(wait=False)
+    
+    
+    def TakeBanks(self):
+        """Return the binary banks opened since the last call.
+        
+        Returns:
+            A list of BinaryBank objects, which may be empty.
+        """
+        
+        self.Update()
+        banks = self.banks
+        self.banks = []
+        return banks
+    
+    
+    def Unique(self, questions, signatures=None):
+        """Return the questions whose IDs haven't been seen before.
+        
+        When merging reworded copies, questions that are near-duplicates of a
+            question already handed over are also left out.
+        
+        Arguments:
+            questions: a list of Question objects
+            signatures: the questions' MinHash signatures, if they have
+                        already been computed (default: compute them as
+                        needed)
+        
+        Returns:
+            A list of the questions not already handed over, in order.
+        """
+        
+        seen = self.seen
+        similar = self.similar
+        unique = []
+        for i, question in enumerate(questions, 0):
+            key = question.Key()
+            if key in seen:
+                self.duplicates += 1
+                continue
+            if similar is not None:
+                signature = signatures[i] if signatures else \
+                    similar.Signature(question)
+                if similar.Match(question, signature) is not None:
+                    self.near_duplicates += 1
+                    continue
+                similar.Add(question, signature)
+            seen.add(key)
+            unique.append(question)
+        return unique
+    
+    
+    def Update(self):
+        """Drain the results queue into the buffer without blocking."""
+        
+        while True:
+            try:
+                result = self.results.get_nowait()
+            except queue.Empty:
+                return
+            self.HandleResult(result)
+    
+    
+    def Wait(self):
+        """Block until more questions arrive or every file has finished.
+        
+        Returns:
+            A list of newly loaded questions, which is empty if loading has
+                finished or only binary banks arrived.
+        """
+        
+        self.Update()
+        while not self.buffer and not self.banks and self.loading:
+            self.HandleResult(self.results.get())
+        return self.Poll()
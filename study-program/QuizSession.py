@@ -0,0 +1,252 @@
+import heapq
+import itertools
+import random
+import time
+
+import Question
+
+# Most bank questions drawn looking for one that's due before the question in
+#   the queue due soonest is asked instead, so drawing a question never
+#   decodes much of a bank
+MAX_BANK_DRAWS = 16
+
+
+class QuizSession():
+    """The state of a quiz, independent of any window.
+    
+    A session holds the pool of questions still to be asked, the question
+        currently being asked, and the running score. Questions are drawn at
+        random from the pool, and more questions can be added while the quiz
+        is running. Questions can also come from banks, such as a BinaryBank,
+        whose questions are only decoded once they're drawn. Answers are
+        graded by index against each question's precomputed correct answers:
+        a single-answer question is correct if the chosen answer is one of the
+        correct answers, and a multiple-answer question is correct if exactly
+        the correct answers were chosen.
+    
+    With a Scheduler, questions are kept in a priority queue ordered by when
+        they're due for review instead. Overdue questions are asked first,
+        then questions that have never been answered, in random order, then
+        the questions due soonest. Bank questions are only decoded when drawn,
+        so they're drawn at random once nothing in the queue is due, and put
+        back in the queue if they aren't due yet. At most MAX_BANK_DRAWS are
+        drawn for each question asked.
+    
+    Arguments:
+        questions: the Question objects available when the session starts
+        rng: the random.Random used for drawing questions and ordering
+             answers (default: a new, randomly seeded generator)
+        scheduler: the Scheduler that orders questions and records answers
+                   (default: ask questions in random order)
+        answer_log: the AnswerLog each answer is recorded in (default: don't
+                    record answers)
+    """
+    
+    def __init__(self, questions=(), rng=None, scheduler=None,
+                 answer_log=None):
+    
+        self.pool = []
+        self.rng = rng if rng is not None else random.Random()
+        
+        # A heap of (due time, random tie-breaker, insertion number, Question)
+        #   entries when a scheduler is used. Questions never answered share
+        #   the session's start time so they follow any overdue questions
+        self.scheduler = scheduler
+        self.queue = []
+        self.start_time = time.time()
+        self.counter = itertools.count()
+        self.answer_log = answer_log
+        
+        # Banks still holding questions to ask, as [bank, remaining, moved]
+        #   lists. The questions not yet asked from a bank are the first
+        #   'remaining' positions of a shuffle that is only recorded in
+        #   'moved' for the positions it has changed
+        self.banks = []
+        
+        # The question being asked, the order its answers are displayed in,
+        #   whether an answer has been submitted for it, and when it was drawn
+        self.current = None
+        self.answer_order = []
+        self.submitted = False
+        self.drawn_at = 0
+        
+        self.answered_questions = 0
+        self.correct = 0
+        self.question_num = 0
+        
+        self.AddQuestions(questions)
+    
+    
+    def AddBank(self, bank):
+        """Add every question of a bank to the questions to be asked.
+        
+        Arguments:
+            bank: a sequence of Question objects, such as a BinaryBank, which
+                  is only indexed for the questions drawn
+        """
+        
+        if len(bank):
+            self.banks.append([bank, len(bank), {}])
+    
+    
+    def AddQuestions(self, questions):
+        """Add more questions to the pool of questions to be asked."""
+        
+        if self.scheduler is None:
+            self.pool.extend(questions)
+            return
+        for question in questions:
+            self.Enqueue(question)
+    
+    
+    def DrawFromBank(self, index):
+        """Remove and return the question at a position among the banks.
+        
+        Arguments:
+            index: the position of the question among the questions not yet
+                   asked from every bank
+        """
+        
+        for i, (bank, remaining, moved) in enumerate(self.banks):
+            if index >= remaining:
+                index -= remaining
+                continue
+            
+            # Swap the chosen position with the last remaining one, as in a
+            #   Fisher-Yates shuffle, recording only the positions changed
+            last = remaining - 1
+            question_index = moved.pop(index, index)
+            if index != last:
+                moved[index] = moved.pop(last, last)
+            else:
+                moved.pop(last, None)
+            
+            if last:
+                self.banks[i][1] = last
+            else:
+                del self.banks[i]
+            return bank[question_index]
+    
+    
+    def Enqueue(self, question):
+        """Add a question to the scheduled queue in order of its due time."""
+        
+        due = self.scheduler.Due(question.Key())
+        if due is None:
+            due = self.start_time
+        heapq.heappush(self.queue, (due, self.rng.random(),
+                                    next(self.counter), question))
+    
+    
+    def NextQuestion(self):
+        """Draw the next question and make it current.
+        
+        Returns:
+            The new current Question, or 'None' if the pool is empty.
+        """
+        
+        remaining = self.Remaining()
+        if not remaining:
+            self.current = None
+            return None
+        
+        if self.scheduler is not None:
+            self.current = self.NextScheduled()
+        else:
+            index = self.rng.randrange(remaining)
+            if index < len(self.pool):
+                # Swap the chosen question to the end so it can be popped
+                #   cheaply
+                self.pool[index], self.pool[-1] = \
+                    self.pool[-1], self.pool[index]
+                self.current = self.pool.pop()
+            else:
+                self.current = self.DrawFromBank(index - len(self.pool))
+        
+        self.question_num += 1
+        self.submitted = False
+        self.drawn_at = time.monotonic()
+        self.answer_order = list(range(len(self.current.answers)))
+        self.rng.shuffle(self.answer_order)
+        return self.current
+    
+    
+    def NextScheduled(self):
+        """Remove and return the question most in need of review.
+        
+        Returns:
+            The first due question in the queue. If none is due, a question
+                drawn from the banks that's due or has never been answered,
+                or failing that the question in the queue due soonest. Up to
+                MAX_BANK_DRAWS questions are drawn from the banks.
+        """
+        
+        now = time.time()
+        for _ in range(MAX_BANK_DRAWS):
+            if not self.banks or (self.queue and self.queue[0][0] <= now):
+                break
+            remaining = sum(bank[1] for bank in self.banks)
+            question = self.DrawFromBank(self.rng.randrange(remaining))
+            due = self.scheduler.Due(question.Key())
+            if due is None or due <= now:
+                return question
+            heapq.heappush(self.queue, (due, self.rng.random(),
+                                        next(self.counter), question))
+        return heapq.heappop(self.queue)[-1]
+    
+    
+    def Remaining(self):
+        """Return the number of questions not yet asked."""
+        
+        return (len(self.pool) + len(self.queue) +
+                sum(bank[1] for bank in self.banks))
+    
+    
+    def Score(self):
+        """Return the quiz score.
+        
+        Returns:
+            The number of correct answers, the number of answered questions,
+                and the fraction answered correctly, which is 'None' if no
+                questions were answered.
+        """
+        
+        if not self.answered_questions:
+            return self.correct, self.answered_questions, None
+        return (self.correct, self.answered_questions,
+                self.correct / self.answered_questions)
+    
+    
+    def SubmitAnswer(self, choices):
+        """Grade the chosen answers for the current question.
+        
+        Arguments:
+            choices: the indices of the chosen answers within the current
+                     question's answer list
+        
+        Returns:
+            'True' or 'False' for a correct or incorrect answer.
+            'None' if no question is current, no answers were chosen, or the
+                question has already been answered.
+        """
+        
+        question = self.current
+        if question is None or self.submitted or not choices:
+            return None
+        
+        matched = question.MatchChoices(choices)
+        if question.q_type == 'single':
+            result = bool(question.correct_mask >> matched[0] & 1)
+        else:
+            result = Question.ChoiceMask(matched) == question.correct_mask
+        
+        self.submitted = True
+        if self.scheduler is not None:
+            self.scheduler.Record(question.Key(), result)
+        if self.answer_log is not None:
+            self.answer_log.Append(question, choices, result,
+                                   time.monotonic() - self.drawn_at)
+        self.answered_questions += 1
+        if result:
+            self.correct += 1
+        return result
@@ -1,22 +1,27 @@
-import random
+import os
 import tkinter as tk
 from tkinter import messagebox
 
+import Question
+import QuizSession
 import Widgets
 
 class QuizWindow():
     
-    def __init__(self, root_window, quiz_list):
+    def __init__(self, root_window, quiz_stream, scheduler=None,
+                 answer_log=None):
         
         self.root = root_window
-        self.quiz = quiz_list
         
-        self.answered_questions = 0
-        self.correct = 0
-        self.question_num = 0
+        # The session's question pool is filled from the quiz stream as files
+        #   load in the background, so large files don't need to be fully
+        #   decoded before the first question is shown. With a scheduler,
+        #   questions due for review are asked first, and with an answer log
+        #   every answer is kept in the user's history
+        self.session = QuizSession.QuizSession(scheduler=scheduler,
+                                               answer_log=answer_log)
+        self.quiz_stream = quiz_stream
         
-        # Shuffle the quiz order so each quiz is unique
-        random.shuffle(self.quiz)
         self.InitializeWindow()
     
     
@@ -26,45 +31,39 @@ class QuizWindow():
         This function is called by the 'Check Answer' button.
         """
         
-        answer = False
-        if self.quiz_entry['Type'] == 'single':
+        # Convert the user's selections to answer indices
+        if self.quiz_entry.q_type == 'single':
+            # Radiobutton values are offset by one so '0' means no selection
             user_choice = self.radio_var.get()
-            if user_choice == 0:
-                return
-            
-            user_answer = self.quiz_entry['Answer'+str(user_choice)]
-            correct_answer = self.quiz_entry['Correct']
-            if user_answer == correct_answer:
-                answer = True
+            choices = [user_choice-1] if user_choice else []
         else:
-            # Convert the user's selected answers to text
-            user_answer = []
+            choices = []
             for index, cb_var in enumerate(self.cb_vars, 0):
                 if cb_var.get() == 1:
-                    answer_index = self.answer_indeces[index]
-                    answer_str = self.quiz_entry['Answer'+str(answer_index)]
-                    user_answer.append(answer_str)
-            if not user_answer:
-                return
-            
-            correct_answer = self.quiz_entry['Correct'].copy()
-            correct_answer.sort()
-            user_answer.sort()
-            if user_answer == correct_answer:
-                answer = True
+                    choices.append(self.answer_indeces[index])
+        
+        answer = self.session.SubmitAnswer(choices)
+        if answer is None:
+            return
         
         # Disable the 'Check Answer' button until a new question is loaded
         self.check_button['state'] = 'disabled'
         self.next_button['state'] = 'normal'
-        self.answered_questions += 1
         if answer:
-            self.correct += 1
             self.result_label.config(text='Correct!', bg='#000000',
                                      fg='#f8f8ff')
         else:
             self.result_label.config(text='Sorry, your answer is incorrect.',
                                      bg='#000000', fg='#f8f8ff')
-            self.HighlightIncorrects(user_answer, correct_answer)
+            self.HighlightIncorrects(Question.ChoiceMask(choices))
+    
+    
+    def FillPool(self):
+        """Add the questions and binary banks loaded so far to the session."""
+        
+        self.session.AddQuestions(self.quiz_stream.Poll())
+        for bank in self.quiz_stream.TakeBanks():
+            self.session.AddBank(bank)
     
     
     def GradeQuiz(self):
@@ -74,13 +73,13 @@ class QuizWindow():
             when the quiz list is empty.
         """
         
-        if not self.answered_questions:
+        correct, answered_questions, score = self.session.Score()
+        if not answered_questions:
             msg = 'No questions have been answered.\n' \
                   'Are you sure you want to exit?'
         else:
-            score = self.correct / self.answered_questions
-            msg = f'You answered {self.correct} out of ' \
-                  f'{self.answered_questions} questions correctly.\n' \
+            msg = f'You answered {correct} out of ' \
+                  f'{answered_questions} questions correctly.\n' \
                   f'Your score is {score:.2%}.\n\nExit quiz?'
         
         ask = messagebox.askyesno('Exit', msg, parent=self.window)
@@ -88,36 +87,78 @@ class QuizWindow():
             self.window.destroy()
     
     
-    def HighlightIncorrects(self, user_answer, correct_answer):
+    def HighlightIncorrects(self, chosen):
         """Change answer label backgrounds to highlight incorrect answers.
         
         This function is called when a user answers a question incorrectly.
             Chosen answers that are incorrect are given a red background, and
-            answers that are correct are given a green background.
+            answers that are correct are given a green background. An answer
+            sharing its text with a correct answer is also correct, as in
+            'Question.MatchChoices'.
         
         Arguments:
-            user_answer: the text string(s) for the user's answer(s)
-            correct_answer: the text string(s) for the correct answer(s)
+            chosen: a bitmask of the indices of the user's answers, as
+                    returned by 'Question.ChoiceMask'
         """
         
         green = '#00cc66'
         red = '#f25a5a'
-        if self.quiz_entry['Type'] == 'single':
-            for rb in self.rb_list:
-                if rb['text'] == user_answer:
-                    rb['bg'] = red
-                if rb['text'] == correct_answer:
-                    rb['bg'] = green
+        answers = self.quiz_entry.answers
+        correct = {answers[index] for index in self.quiz_entry.correct}
+        if self.quiz_entry.q_type == 'single':
+            widgets = self.rb_list
         else:
-            for cb in self.cb_list:
-                for answer in user_answer:
-                    if cb['text'] == answer:
-                        cb['bg'] = red
-                        break
-                for answer in correct_answer:
-                    if cb['text'] == answer:
-                        cb['bg'] = green
-                        break
+            widgets = self.cb_list
+        for widget, index in zip(widgets, self.answer_indeces):
+            if answers[index] in correct:
+                widget['bg'] = green
+            elif chosen >> index & 1:
+                widget['bg'] = red
+    
+    
+    def InitializeAnswers(self):
+        """Initialize the scrollable Canvas that holds the answer widgets.
+        
+        The answers Canvas, Frame, and Scrollbar are created once for the
+            quiz. Answer widgets are kept in pools that are reconfigured for
+            each question and only grow when a question has more answers than
+            any question before it.
+        """
+        
+        def FrameConfigure(event):
+            """Recalculate the answer canvas scroll region."""
+            
+            self.ans_canvas.configure(scrollregion=self.ans_canvas.bbox('all'))
+        
+        
+        white = '#f8f8ff'
+        self.ans_canvas = Widgets.CreateCanvas(self.a_frame, _bg=white)
+        self.ans_canvas.pack(fill='both', expand='true')
+        self.widget_frame = Widgets.CreateFrame(self.ans_canvas)
+        self.widget_frame.pack(fill='both', expand='true')
+        self.ans_canvas.create_window(0, 0, anchor='nw', width=620,
+                                      window=self.widget_frame)
+        
+        scrollbar = Widgets.CreateScrollbar(self.ans_canvas)
+        scrollbar.config(command=self.ans_canvas.yview)
+        self.ans_canvas.configure(yscrollcommand=scrollbar.set,
+                                  scrollregion=self.ans_canvas.bbox('all'))
+        scrollbar.pack(side='right', fill='y')
+        
+        # Update the scroll region whenever the displayed answers change
+        self.ans_canvas.bind('<Configure>', FrameConfigure)
+        self.widget_frame.bind('<Configure>', FrameConfigure)
+        
+        # Pools of answer widgets, each Checkbutton with its own variable
+        self.cb_pool = []
+        self.cb_var_pool = []
+        self.rb_pool = []
+        self.radio_var = tk.IntVar(self.window)
+        
+        # The pooled widgets displaying the current question's answers
+        self.cb_list = []
+        self.cb_vars = []
+        self.rb_list = []
     
     
     def InitializeWindow(self):
@@ -185,19 +226,76 @@ class QuizWindow():
         self.a_frame = Widgets.CreateFrame(self.main_canvas)
         self.main_canvas.create_window(657, 7, anchor='nw', height=578,
                                        width=628, window=self.a_frame)
+        self.InitializeAnswers()
         
-        # Begin populating the window
-        self.quiz_entry = self.quiz.pop()
-        self.PopulateWindow()
+        # Close the stream's binary banks once the window is gone
+        self.window.bind('<Destroy>', self.OnDestroy)
+        
+        # Begin populating the window with the questions loaded so far, then
+        #   keep collecting questions as they finish loading
+        self.quiz_entry = None
+        self.LoadNext()
+        self.root.after(50, self.LoadMore)
+    
+    
+    def LoadMore(self):
+        """Add newly loaded questions from the quiz stream to the pool.
+        
+        This function reschedules itself until every file has loaded. Files
+            that fail part-way through loading are reported once loading
+            completes.
+        """
+        
+        if not self.window.winfo_exists():
+            self.quiz_stream.Cancel()
+            return
+        
+        self.FillPool()
+        if self.quiz_stream.loading:
+            self.root.after(50, self.LoadMore)
+            return
+        
+        if self.quiz_stream.errors:
+            error_msg = 'Error loading the following files:\n'
+            for path in self.quiz_stream.errors:
+                error_msg += f'{os.path.basename(path)}: ' \
+                             f'{self.quiz_stream.reasons.get(path, "")}\n'
+            error_msg += 'Their remaining questions won\'t be added.'
+            messagebox.showerror('Error', error_msg, parent=self.window)
     
     
     def LoadNext(self):
         """Erase current widget contents to prepare for a new question.
         
-        This function is called by the 'Next Question' button.
+        This function is called by the 'Next Question' button. If every
+            question loaded so far has been asked while files are still
+            loading, the buttons are disabled and 'Loading...' is shown, and
+            this function reschedules itself until more questions arrive, so
+            the window never waits on the loading threads.
         """
         
-        if not self.quiz:
+        if not self.window.winfo_exists():
+            return
+        
+        self.FillPool()
+        if not self.session.Remaining() and self.quiz_stream.loading:
+            self.next_button['state'] = 'disabled'
+            self.check_button['state'] = 'disabled'
+            self.result_label.config(text='Loading...', bg='#f8f8ff',
+                                     fg='#000000')
+            self.root.after(50, self.LoadNext)
+            return
+        
+        quiz_entry = self.session.NextQuestion()
+        if quiz_entry is None and self.quiz_entry is None:
+            # None of the files held a question to ask
+            messagebox.showerror('Error', 'No files could be accessed',
+                                 parent=self.window)
+            self.window.destroy()
+            return
+        if quiz_entry is None:
+            self.next_button['state'] = 'normal'
+            self.result_label.config(text='', bg='#f8f8ff')
             self.GradeQuiz()
             return
         
@@ -205,77 +303,66 @@ class QuizWindow():
         self.next_button['state'] = 'disabled'
         self.check_button['state'] = 'normal'
         self.result_label.config(text='', bg='#f8f8ff')
-        self.ans_canvas.forget()
-        self.widget_frame.forget()
-        if self.quiz_entry['Type'] == 'multi':
-            for cb in self.cb_list:
-                cb.forget()
-        else:
-            for rb in self.rb_list:
-                rb.forget()
         
-        self.quiz_entry = self.quiz.pop()
+        self.quiz_entry = quiz_entry
         self.PopulateWindow()
+    
+    
+    def OnDestroy(self, event):
+        """Stop loading and close the quiz stream when the window closes."""
+        
+        # Every widget in the window reports its own destruction here too
+        if event.widget is self.window:
+            self.quiz_stream.Close()
         
     
     def PopulateWindow(self):
         """Use the current quiz question to populate the window widgets. """
         
-        def FrameConfigure(event):
-            """Recalculate the answer canvas scroll region."""
-            
-            self.ans_canvas.configure(scrollregion=self.ans_canvas.bbox('all'))
-        
-        
         # Update the question label
-        self.question_num += 1
-        q_text = f'Question {self.question_num}\n\n' \
-                 f'{self.quiz_entry["Question"]}'
+        q_text = f'Question {self.session.question_num}\n\n' \
+                 f'{self.quiz_entry.question}'
         self.question_label.config(text=q_text)
         
-        # Shuffle the order in which answers will appear
-        self.answer_indeces = []
-        for i in range(1, self.quiz_entry['NumOfAnswers']+1):
-            self.answer_indeces.append(i)
-        random.shuffle(self.answer_indeces)
-        
-        # Create the answers Canvas
-        white = '#f8f8ff'
-        self.ans_canvas = Widgets.CreateCanvas(self.a_frame, _bg=white)
-        self.ans_canvas.pack(fill='both', expand='true')
-        self.widget_frame = Widgets.CreateFrame(self.ans_canvas)
-        self.widget_frame.pack(fill='both', expand='true')
-        self.ans_canvas.create_window(0, 0, anchor='nw', width=620,
-                                      window=self.widget_frame)
+        # The session shuffles the order in which answers will appear
+        answers = self.quiz_entry.answers
+        self.answer_indeces = self.session.answer_order
         
-        scrollbar = Widgets.CreateScrollbar(self.ans_canvas)
-        scrollbar.config(command=self.ans_canvas.yview)
-        self.ans_canvas.configure(yscrollcommand=scrollbar.set,
-                                  scrollregion=self.ans_canvas.bbox('all'))
-        scrollbar.pack(side='right', fill='y')
+        # Hide the previous question's answers
+        for widget in self.cb_list + self.rb_list:
+            widget.pack_forget()
         
-        # Update the scroll region each time a new answer is added
-        self.ans_canvas.bind('<Configure>', FrameConfigure)
-        if self.quiz_entry['Type'] == 'multi':
-            self.cb_list = []
-            self.cb_vars = []
-            for index in self.answer_indeces:
+        # Reconfigure pooled widgets with the new answers, adding widgets
+        #   only if the pool is too small
+        num_answers = len(answers)
+        if self.quiz_entry.q_type == 'multi':
+            while len(self.cb_pool) < num_answers:
                 cb_var = tk.IntVar(self.window)
-                ans_text = self.quiz_entry['Answer'+str(index)]
-                cb = Widgets.CreateCheckButton(self.widget_frame,
-                                               _text=ans_text, _var=cb_var)
+                cb = Widgets.CreateCheckButton(self.widget_frame, _text='',
+                                               _var=cb_var)
+                self.cb_pool.append(cb)
+                self.cb_var_pool.append(cb_var)
+            self.cb_list = self.cb_pool[:num_answers]
+            self.cb_vars = self.cb_var_pool[:num_answers]
+            self.rb_list = []
+            for cb, cb_var, index in zip(self.cb_list, self.cb_vars,
+                                         self.answer_indeces):
+                cb_var.set(0)
+                cb.config(text=answers[index], bg=Widgets.WHITE)
                 cb.pack(fill='x')
-                self.cb_list.append(cb)
-                self.cb_vars.append(cb_var)
         else:
-            self.rb_list = []
-            self.radio_var = tk.IntVar(self.window)
-            for index in self.answer_indeces:
-                ans_text = self.quiz_entry['Answer'+str(index)]
-                rb = Widgets.CreateRadioButton(self.widget_frame,
-                                               _text=ans_text,
+            while len(self.rb_pool) < num_answers:
+                rb = Widgets.CreateRadioButton(self.widget_frame, _text='',
                                                _var=self.radio_var,
-                                               _index=index)
+                                               _index=0)
+                self.rb_pool.append(rb)
+            self.rb_list = self.rb_pool[:num_answers]
+            self.cb_list = []
+            self.cb_vars = []
+            for rb, index in zip(self.rb_list, self.answer_indeces):
+                rb.config(text=answers[index], value=index+1,
+                          bg=Widgets.WHITE)
                 rb.pack(fill='x')
-                self.rb_list.append(rb)
-            self.radio_var.set(0)
\ No newline at end of file
+            self.radio_var.set(0)
+        
+        self.ans_canvas.yview_moveto(0)
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import time
+
+import Background
+import Journal
+
+# The directory holding each user's review schedule
+SCHEDULE_DIR = 'schedules'
+
+# Seconds in a day, and the delay before a missed question is asked again
+DAY = 24 * 60 * 60
+RELEARN_DELAY = 10 * 60
+
+# Ease factors, which scale a question's review interval after each correct
+#   answer
+START_EASE = 2.5
+MIN_EASE = 1.3
+EASE_PENALTY = 0.2
+
+
+class Scheduler():
+    """A user's spaced repetition schedule.
+    
+    Each question the user has answered is given a due time using the SM-2
+        method. A correct answer pushes the next review further out, one day,
+        then six days, then the previous interval times the question's ease
+        factor. A wrong answer lowers the ease factor and brings the question
+        back after a few minutes. Questions that have never been answered
+        have no due time.
+    
+    Schedules are kept in a JournaledDict per user, so each answer appends
+        one small record to a journal. Records are written by a background
+        thread so answering a question doesn't wait on the disk.
+    
+    Arguments:
+        schedule_file: the file holding the schedule, or 'None' to keep the
+                       schedule in memory only
+    """
+    
+    def __init__(self, schedule_file):
+    
+        self.store = Journal.JournaledDict(schedule_file)
+        
+        # Each question's [interval, ease, due time, correct streak], keyed by
+        #   'Question.Key'. A copy is kept so the writer thread never changes
+        #   the dictionary being read
+        self.records = dict(self.store.data)
+        self.writer = Background.CoalescingWriter(self.store.Set)
+    
+    
+    def Close(self):
+        """Write any pending records and close the schedule.
+        
+        Returns:
+            A list of the exceptions raised while writing.
+        """
+        
+        errors = self.writer.Close()
+        self.store.Close()
+        return errors
+    
+    
+    def Due(self, key):
+        """Return when a question is due, or 'None' if it's unanswered."""
+        
+        record = self.records.get(key)
+        return None if record is None else record[2]
+    
+    
+    def Record(self, key, correct, now=None):
+        """Reschedule a question after it has been answered.
+        
+        Arguments:
+            key: the question's key
+            correct: 'True' if the question was answered correctly
+            now: the time the question was answered (default: the current
+                 time)
+        
+        Returns:
+            The question's new due time.
+        """
+        
+        if now is None:
+            now = time.time()
+        interval, ease, due, streak = self.records.get(key,
+                                                       [0, START_EASE, 0, 0])
+        if correct:
+            streak += 1
+            if streak == 1:
+                interval = DAY
+            elif streak == 2:
+                interval = 6 * DAY
+            else:
+                interval = interval * ease
+        else:
+            streak = 0
+            ease = max(MIN_EASE, ease - EASE_PENALTY)
+            interval = RELEARN_DELAY
+        
+        record = [interval, round(ease, 2), now + interval, streak]
+        self.records[key] = record
+        self.writer.Submit(key, record)
+        return record[2]
+
+
+def LoadScheduler(username):
+    """Open a user's review schedule.
+    
+    This function doesn't use any widgets, so it can run on a worker thread
+        while quiz files load.
+    
+    Arguments:
+        username: the user whose schedule is opened
+    
+    Returns:
+        The user's Scheduler, which keeps the schedule in memory only if it
+            couldn't be loaded, and an error message or 'None'.
+    """
+    
+    digest = hashlib.sha1(username.encode('utf-8')).hexdigest()
+    try:
+        os.makedirs(SCHEDULE_DIR, exist_ok=True)
+        return Scheduler(os.path.join(SCHEDULE_DIR, digest + '.json')), None
+    except:
+        return Scheduler(None), f'Unable to load data from {SCHEDULE_DIR}'
@@ -0,0 +1,266 @@
+import os
+import re
+import sqlite3
+import threading
+
+import BinaryBank
+import QuizLoader
+
+# The file holding the search index, which is shared by every user since a
+#   quiz file's questions don't depend on who is searching them
+INDEX_FILE = 'search_index.db'
+
+# Maximum number of matches returned by a search
+MAX_RESULTS = 1000
+
+# Number of questions written to the index at a time, so searches can run
+#   while a large file is being indexed
+INSERT_BATCH = 10000
+
+# Each question's row ID holds its file's ID in the high bits and its
+#   position within the file in the low bits, so a file's questions occupy a
+#   single range of row IDs
+POSITION_BITS = 32
+
+# Words in a search, which are matched as word prefixes
+WORD_PATTERN = re.compile(r'\w+')
+
+
+class SearchIndex():
+    """A full-text index of the questions and answers in quiz files.
+    
+    Questions are held in an SQLite FTS5 table, so a search only reads the
+        index entries for the words searched for rather than any quiz files.
+        Each indexed file's size and modification time are recorded, and
+        'Update' only re-reads the files that have changed since they were
+        indexed.
+    
+    The index may be used from worker threads. Only one update runs at a
+        time, and files are indexed in batches so searches can run between
+        batches while a large file is indexed.
+    
+    Arguments:
+        index_file: the file holding the index, or ':memory:'
+    """
+    
+    def __init__(self, index_file):
+    
+        self.index_file = index_file
+        self.lock = threading.RLock()
+        self.update_lock = threading.Lock()
+        self.stop = threading.Event()
+        self.conn = sqlite3.connect(index_file, check_same_thread=False)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS files ('
+                          'ID INTEGER PRIMARY KEY, '
+                          'Path TEXT UNIQUE NOT NULL, '
+                          'Size INTEGER NOT NULL, '
+                          'ModTime INTEGER NOT NULL)')
+        self.conn.execute('CREATE VIRTUAL TABLE IF NOT EXISTS questions '
+                          'USING fts5(Question, Answers, detail=column, '
+                          'prefix=3, '
+                          'tokenize="unicode61 remove_diacritics 2")')
+        self.conn.commit()
+    
+    
+    def Close(self):
+        """Stop any update in progress and close the index."""
+        
+        self.stop.set()
+        with self.lock:
+            self.conn.close()
+    
+    
+    def IndexFile(self, path, st):
+        """Replace the indexed questions of a single quiz file.
+        
+        Arguments:
+            path: the quiz file to index
+            st: the file's 'os.stat' result, taken before it's read
+        
+        Returns:
+            'True' if the file was indexed.
+            'False' if the index was closed while the file was read.
+        
+        Raises:
+            IOError if the file can't be read.
+            ValueError if the file can't be decoded.
+        """
+        
+        key = QuizLoader.PathKey(path)
+        with self.lock:
+            row = self.conn.execute('SELECT ID FROM files WHERE Path = ?',
+                                    (key,)).fetchone()
+            if row is None:
+                file_id = self.conn.execute('INSERT INTO files (Path, Size, '
+                                            'ModTime) VALUES (?, -1, -1)',
+                                            (key,)).lastrowid
+            else:
+                file_id = row[0]
+            
+            # The file is marked out of date until every question is written,
+            #   so an interrupted update is finished the next time
+            self.conn.execute('UPDATE files SET Size = -1 WHERE ID = ?',
+                              (file_id,))
+            first = file_id << POSITION_BITS
+            self.conn.execute('DELETE FROM questions '
+                              'WHERE rowid >= ? AND rowid < ?',
+                              (first, first + (1 << POSITION_BITS)))
+            self.conn.commit()
+        
+        rows = []
+        for position, (question, answers) in enumerate(IterText(path), 0):
+            rows.append((first + position, question, answers))
+            if len(rows) == INSERT_BATCH:
+                if not self.WriteRows(rows):
+                    return False
+                rows = []
+        if not self.WriteRows(rows):
+            return False
+        
+        with self.lock:
+            self.conn.execute('UPDATE files SET Size = ?, ModTime = ? '
+                              'WHERE ID = ?',
+                              (st.st_size, st.st_mtime_ns, file_id))
+            self.conn.commit()
+        return True
+    
+    
+    def Search(self, text, paths, limit=MAX_RESULTS):
+        """Find the questions in a set of files that contain every word.
+        
+        Each word searched for matches any word in a question or its answers
+            that begins with it, ignoring case and accents.
+        
+        Arguments:
+            text: the words to search for
+            paths: the quiz files to search
+            limit: the maximum number of matches returned
+                   (default: MAX_RESULTS)
+        
+        Returns:
+            A list of (path, position, question text) tuples, grouped by file
+                and in file order within each file. 'position' is the
+                question's index within its file, and 'path' is written as
+                it was in 'paths'.
+        """
+        
+        words = WORD_PATTERN.findall(text)
+        if not words or not paths:
+            return []
+        query = ' '.join(f'"{word}"*' for word in words)
+        
+        keys = {QuizLoader.PathKey(path): path for path in paths}
+        with self.lock:
+            files = {}
+            for file_id, key in self.conn.execute('SELECT ID, Path FROM '
+                                                  'files'):
+                if key in keys:
+                    files[file_id] = keys[key]
+            if not files:
+                return []
+            
+            marks = ', '.join('?' * len(files))
+            rows = self.conn.execute('SELECT rowid, Question FROM questions '
+                                     'WHERE questions MATCH ? AND '
+                                     f'(rowid >> {POSITION_BITS}) '
+                                     f'IN ({marks}) LIMIT ?',
+                                     (query, *files, limit)).fetchall()
+        
+        mask = (1 << POSITION_BITS) - 1
+        return [(files[rowid >> POSITION_BITS], rowid & mask, question)
+                for rowid, question in rows]
+    
+    
+    def Update(self, paths):
+        """Index any of a set of quiz files that changed since last indexed.
+        
+        Arguments:
+            paths: the quiz files to keep up to date
+        
+        Returns:
+            A list of the files that couldn't be indexed.
+        """
+        
+        failed = []
+        with self.update_lock:
+            for path in paths:
+                if self.stop.is_set():
+                    break
+                try:
+                    st = os.stat(path)
+                    with self.lock:
+                        row = self.conn.execute('SELECT Size, ModTime '
+                                                'FROM files WHERE Path = ?',
+                                                (QuizLoader.PathKey(path),)
+                                                ).fetchone()
+                    if row == (st.st_size, st.st_mtime_ns):
+                        continue
+                    self.IndexFile(path, st)
+                except:
+                    if not self.stop.is_set():
+                        failed.append(path)
+        return failed
+    
+    
+    def WriteRows(self, rows):
+        """Add a batch of (row ID, question, answers) rows to the index.
+        
+        Returns:
+            'False' if the index has been closed, otherwise 'True'.
+        """
+        
+        with self.lock:
+            if self.stop.is_set():
+                return False
+            self.conn.executemany('INSERT INTO questions (rowid, Question, '
+                                  'Answers) VALUES (?, ?, ?)', rows)
+            self.conn.commit()
+        return True
+
+
+def IterText(path):
+    """Yield the (question, answers) text of each question in a quiz file.
+    
+    Answers are joined into a single string. JSON files are read one entry at
+        a time without building Question objects.
+    
+    Arguments:
+        path: a JSON quiz file or binary bank
+    """
+    
+    if BinaryBank.IsBinaryBank(path):
+        bank = BinaryBank.BinaryBank(path)
+        try:
+            for index in range(len(bank)):
+                question = bank[index]
+                yield question.question, '\n'.join(question.answers)
+        finally:
+            bank.Close()
+        return
+    
+    for entry in QuizLoader.IterQuestions(path):
+        answers = [entry.get('Answer' + str(i), '')
+                   for i in range(1, entry.get('NumOfAnswers', 0) + 1)]
+        yield entry.get('Question', ''), '\n'.join(map(str, answers))
+
+
+def LoadSearchIndex():
+    """Open the search index.
+    
+    Returns:
+        The SearchIndex, which is held in memory only if the index file
+            couldn't be opened, or 'None' if SQLite can't build an index at
+            all, and an error message or 'None'.
+    """
+    
+    try:
+        return SearchIndex(INDEX_FILE), None
+    except:
+        pass
+    
+    # An index held in memory still fails if SQLite lacks full-text search
+    try:
+        index = SearchIndex(':memory:')
+        return index, f'Unable to load data from {INDEX_FILE}'
+    except:
+        return None, 'Searching isn\'t available on this system'
@@ -0,0 +1,126 @@
+import os
+import tkinter as tk
+
+import SearchIndex
+import Widgets
+
+# Maximum number of characters of a question shown in the results list
+MAX_ROW_LENGTH = 150
+
+
+class SearchWindow():
+
+    def __init__(self, root_window, query, results, on_launch):
+    
+        self.root = root_window
+        self.query = query
+        
+        # The (path, position, question text) matches from the SearchIndex
+        self.results = results
+        
+        # Called with a BankStream selection to launch a quiz on the matches
+        self.on_launch = on_launch
+        
+        self.InitializeWindow()
+    
+    
+    def InitializeButtons(self, parent_frame):
+        """Initialize the buttons to launch a quiz or close the window.
+        
+        Arguments:
+            parent_frame: the Frame that holds the buttons
+        """
+        
+        launch_button = Widgets.CreateButton(parent_frame,
+                                             _text='Launch Quiz on Matches',
+                                             _cmd=self.LaunchQuiz,
+                                             _height=2,
+                                             _width=30)
+        launch_button.pack(side='left', expand='true')
+        close_button = Widgets.CreateButton(parent_frame, _text='Close',
+                                            _cmd=self.window.destroy,
+                                            _height=2)
+        close_button.pack(side='right', expand='true')
+    
+    
+    def InitializeResults(self, parent_frame):
+        """Initialize the Listbox showing each matching question.
+        
+        Arguments:
+            parent_frame: the Frame that holds the Listbox
+        """
+        
+        count = f'{len(self.results)} matching question(s)'
+        if len(self.results) >= SearchIndex.MAX_RESULTS:
+            count = f'First {len(self.results)} matching questions'
+        labelframe = Widgets.CreateLabelFrame(parent_frame,
+                                              _text=f'{count} - select '
+                                                    'questions to quiz on, '
+                                                    'or none to use them all')
+        labelframe.pack(fill='both', expand='true')
+        
+        scrollbar = Widgets.CreateScrollbar(labelframe)
+        self.listbox = Widgets.CreateListbox(labelframe, _scrollbar=scrollbar)
+        scrollbar.config(command=self.listbox.yview)
+        scrollbar.pack(side='right', fill='y')
+        self.listbox.pack(fill='both', expand='true')
+        
+        rows = []
+        for path, _, question in self.results:
+            row = f'{os.path.basename(path)}: {" ".join(question.split())}'
+            rows.append(row[:MAX_ROW_LENGTH])
+        self.listbox.insert('end', *rows)
+    
+    
+    def InitializeWindow(self):
+        """Initialize the 'Search' window."""
+        
+        self.window = tk.Toplevel(self.root)
+        height = 600
+        width = 900
+        y = int((self.window.winfo_screenheight() / 2) - (height / 2))
+        x = int((self.window.winfo_screenwidth() / 2) - (width / 2))
+        self.window.geometry(f'{width}x{height}+{x}+{y}')
+        self.window.resizable(False, False)
+        self.window.title(f'Search: {self.query}')
+        
+        self.main_frame = Widgets.CreateFrame(self.window)
+        self.main_frame.pack(fill='both', expand='true')
+        self.main_canvas = Widgets.CreateCanvas(self.main_frame)
+        self.main_canvas.pack(fill='both', expand='true')
+        
+        white = '#f8f8ff'
+        
+        # Create a window to hold the matching questions
+        self.main_canvas.create_rectangle(5, 5, 885, 495, fill=white)
+        results_frame = Widgets.CreateFrame(self.main_canvas)
+        self.main_canvas.create_window(7, 7, anchor='nw', height=488,
+                                       width=878, window=results_frame)
+        self.InitializeResults(results_frame)
+        
+        # Create a window to hold the buttons
+        self.main_canvas.create_rectangle(5, 505, 885, 585, fill=white)
+        buttons_frame = Widgets.CreateFrame(self.main_canvas)
+        self.main_canvas.create_window(7, 507, anchor='nw', height=78,
+                                       width=878, window=buttons_frame)
+        self.InitializeButtons(buttons_frame)
+    
+    
+    def LaunchQuiz(self):
+        """Launch a quiz on the selected matches, or every match.
+        
+        This function is called by the 'Launch Quiz on Matches' button. The
+            window closes once the quiz begins loading.
+        """
+        
+        selections = self.listbox.curselection()
+        if selections:
+            matches = [self.results[index] for index in selections]
+        else:
+            matches = self.results
+        
+        selection = {}
+        for path, position, _ in matches:
+            selection.setdefault(path, []).append(position)
+        if self.on_launch(selection):
+            self.window.destroy()
@@ -0,0 +1,179 @@
+import hmac
+import json
+from json.decoder import JSONDecodeError
+import os
+import sqlite3
+import threading
+
+
+class UserStore():
+    """Keyed storage for user account records.
+    
+    Accounts are held in an SQLite table keyed by username, so looking up,
+        creating, or updating an account touches a single record no matter
+        how many accounts exist. Records are returned as dictionaries using
+        the same keys as the original 'users.json' file.
+    
+    The store may be used from worker threads, one operation at a time, so
+        that slow disks don't block the window.
+    """
+    
+    def __init__(self, db_file, legacy_file=None):
+    
+        self.db_file = db_file
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS users ('
+                          'User TEXT PRIMARY KEY, '
+                          'Password TEXT NOT NULL, '
+                          'CreationDate TEXT NOT NULL, '
+                          'LastLogIn TEXT NOT NULL) WITHOUT ROWID')
+        self.conn.commit()
+        
+        # Accounts from a previous 'users.json' file are brought over the
+        #   first time the store is created
+        if legacy_file and self.IsEmpty():
+            self.ImportJSON(legacy_file)
+    
+    
+    def AddUser(self, user_data):
+        """Add a new account record to the store.
+        
+        Arguments:
+            user_data: a dictionary with 'User', 'Password', 'CreationDate',
+                       and 'LastLogIn' keys
+        
+        Returns:
+            'True' if the account was added.
+            'False' if an account with the same username already exists.
+        """
+        
+        try:
+            with self.lock:
+                self.conn.execute('INSERT INTO users VALUES (?, ?, ?, ?)',
+                                  (user_data['User'], user_data['Password'],
+                                   user_data['CreationDate'],
+                                   user_data['LastLogIn']))
+        except sqlite3.IntegrityError:
+            return False
+        return True
+    
+    
+    def Close(self):
+        """Commit pending changes and close the store."""
+        
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+    
+    
+    def Commit(self):
+        """Write pending account changes to disk."""
+        
+        with self.lock:
+            self.conn.commit()
+    
+    
+    def GetUser(self, username):
+        """Retrieve a single account record.
+        
+        Arguments:
+            username: the account's username
+        
+        Returns:
+            A dictionary containing the account information, or 'None' if the
+                user doesn't exist.
+        """
+        
+        with self.lock:
+            row = self.conn.execute('SELECT User, Password, CreationDate, '
+                                    'LastLogIn FROM users WHERE User = ?',
+                                    (username,)).fetchone()
+        if row is None:
+            return None
+        return {'User': row[0], 'Password': row[1], 'CreationDate': row[2],
+                'LastLogIn': row[3]}
+    
+    
+    def ImportJSON(self, json_file):
+        """Import the accounts held in a 'users.json' style file.
+        
+        Accounts whose username is already present in the store are skipped,
+            as are malformed records missing a username or password, so one
+            bad record doesn't lose every other account.
+        
+        Arguments:
+            json_file: path to a JSON file containing a list of accounts
+        
+        Returns:
+            The number of accounts imported.
+        """
+        
+        if not os.path.isfile(json_file):
+            return 0
+        try:
+            with open(json_file, 'r') as infile:
+                users = json.load(infile)
+        except (IOError, JSONDecodeError):
+            return 0
+        
+        if not isinstance(users, list):
+            return 0
+        rows = []
+        for user in users:
+            if not isinstance(user, dict) or \
+                    not isinstance(user.get('User'), str) or \
+                    not isinstance(user.get('Password'), str):
+                continue
+            rows.append((user['User'], user['Password'],
+                         user.get('CreationDate') or '',
+                         user.get('LastLogIn') or ''))
+        with self.lock:
+            before = self.conn.total_changes
+            self.conn.executemany('INSERT OR IGNORE INTO users VALUES '
+                                  '(?, ?, ?, ?)', rows)
+            self.conn.commit()
+            return self.conn.total_changes - before
+    
+    
+    def IsEmpty(self):
+        """Return 'True' if the store holds no accounts."""
+        
+        with self.lock:
+            row = self.conn.execute('SELECT 1 FROM users LIMIT 1').fetchone()
+        return row is None
+    
+    
+    def SetLastLogIn(self, username, login_date):
+        """Update the last log-in date of an existing account."""
+        
+        with self.lock:
+            self.conn.execute('UPDATE users SET LastLogIn = ? WHERE User = ?',
+                              (login_date, username))
+    
+    
+    def SetPassword(self, username, password):
+        """Update the password of an existing account."""
+        
+        with self.lock:
+            self.conn.execute('UPDATE users SET Password = ? WHERE User = ?',
+                              (password, username))
+
+
+def PasswordMatches(stored, password):
+    """Check a password against the value stored for an account.
+    
+    Login and password changes compare passwords only through this function,
+        which runs on a worker thread. A slow salted hash check can replace
+        the comparison here without blocking the window.
+    
+    Arguments:
+        stored: the 'Password' value of the account record
+        password: the password provided by the user
+    
+    Returns:
+        'True' if the password matches, 'False' otherwise.
+    """
+    
+    return hmac.compare_digest(stored.encode('utf-8'),
+                               password.encode('utf-8'))
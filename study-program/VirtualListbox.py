@@ -0,0 +1,232 @@
+import bisect
+import tkinter as tk
+from tkinter import font as tkfont
+
+# Color used to highlight selected rows
+SELECT_COLOR = '#b0c4de'
+
+
+class VirtualListbox(tk.Canvas):
+    """A list of text rows that only draws the rows currently visible.
+    
+    A tkinter Listbox creates an element for every row it holds, so filling
+        or rebuilding it takes time proportional to its length. This widget
+        keeps the rows in a plain list and reuses a small set of canvas items
+        for the rows that fit on screen, so inserting or deleting rows never
+        creates or destroys more than a screenful of canvas items. Clicking a
+        row toggles whether it is selected, like a Listbox with
+        'selectmode=multiple'.
+    
+    The widget supports the parts of the Listbox interface used by the
+        program: 'insert', 'delete', 'get', 'size', 'curselection',
+        'selection_clear', and the 'yview' family used by scrollbars.
+    
+    Arguments:
+        parent: the widget's parent object
+        font: the font used for each row
+        bg: the background color of the list
+        yscrollcommand: called with the visible fractions of the list whenever
+                        it scrolls, usually a Scrollbar's 'set' method
+    """
+    
+    def __init__(self, parent, font, bg, yscrollcommand=None):
+    
+        super().__init__(parent, bg=bg, highlightthickness=0)
+        self.font = font
+        self.bg = bg
+        self.yscrollcommand = yscrollcommand
+        self.row_height = tkfont.Font(font=font).metrics('linespace') + 2
+        
+        # The text of every row, the indices of the selected rows, and the
+        #   index of the first visible row
+        self.items = []
+        self.selected = set()
+        self.top = 0
+        
+        # Canvas items for each visible row, as (background, text) pairs
+        self.rows = []
+        
+        self.bind('<Configure>', lambda e: self.Redraw())
+        self.bind('<Button-1>', self.OnClick)
+    
+    
+    def curselection(self):
+        """Return the indices of the selected rows in ascending order."""
+        
+        return tuple(sorted(self.selected))
+    
+    
+    def delete(self, first, last=None):
+        """Delete a row or range of rows, like 'Listbox.delete'.
+        
+        Arguments:
+            first: the index of the first row to delete
+            last: the index of the last row to delete, or 'end'
+                  (default: only delete 'first')
+        """
+        
+        first = self.Index(first)
+        last = first if last is None else self.Index(last)
+        self.DeleteIndices(range(first, last + 1))
+    
+    
+    def DeleteIndices(self, indices):
+        """Delete the rows at any set of indices.
+        
+        The rows are deleted in place, last first, so no new list is built
+            and rows before the first deleted row are never moved.
+        
+        Arguments:
+            indices: the indices of the rows to delete
+        """
+        
+        removed = sorted(set(i for i in indices if 0 <= i < len(self.items)))
+        if not removed:
+            return
+        for index in reversed(removed):
+            del self.items[index]
+        
+        # Shift the selection past the rows that were removed
+        selected = set()
+        for index in self.selected:
+            position = bisect.bisect_left(removed, index)
+            if position < len(removed) and removed[position] == index:
+                continue
+            selected.add(index - position)
+        self.selected = selected
+        self.Redraw()
+    
+    
+    def get(self, index):
+        """Return the text of the row at 'index'."""
+        
+        return self.items[self.Index(index)]
+    
+    
+    def Index(self, index):
+        """Convert a Listbox style index, including 'end', to an int."""
+        
+        if index == 'end':
+            return len(self.items) - 1
+        return int(index)
+    
+    
+    def insert(self, index, *items):
+        """Insert rows before 'index', like 'Listbox.insert'.
+        
+        Arguments:
+            index: the index the first new row is given, or 'end'
+            items: the text of each new row
+        """
+        
+        if not items:
+            return
+        if index == 'end':
+            index = len(self.items)
+        else:
+            index = min(int(index), len(self.items))
+        self.items[index:index] = items
+        
+        if index < len(self.items) - len(items):
+            self.selected = {i + len(items) if i >= index else i
+                             for i in self.selected}
+        self.Redraw()
+    
+    
+    def OnClick(self, event):
+        """Toggle the selection of the clicked row."""
+        
+        index = self.top + event.y // self.row_height
+        if index >= len(self.items):
+            return
+        if index in self.selected:
+            self.selected.discard(index)
+        else:
+            self.selected.add(index)
+        self.Redraw()
+    
+    
+    def Redraw(self):
+        """Draw the visible rows and update the attached scrollbar."""
+        
+        visible = self.VisibleRows()
+        self.top = max(0, min(self.top, len(self.items) - visible))
+        
+        # Create canvas items for rows that have become visible
+        width = max(self.winfo_width(), 1)
+        while len(self.rows) < visible + 1:
+            y = len(self.rows) * self.row_height
+            background = self.create_rectangle(0, y, width,
+                                               y + self.row_height,
+                                               width=0, fill=self.bg)
+            text = self.create_text(2, y + 1, anchor='nw', font=self.font)
+            self.rows.append((background, text))
+        
+        for row, (background, text) in enumerate(self.rows):
+            index = self.top + row
+            if index < len(self.items):
+                fill = SELECT_COLOR if index in self.selected else self.bg
+                self.itemconfigure(text, text=self.items[index])
+            else:
+                fill = self.bg
+                self.itemconfigure(text, text='')
+            self.itemconfigure(background, fill=fill)
+            y = row * self.row_height
+            self.coords(background, 0, y, width, y + self.row_height)
+        
+        if self.yscrollcommand is not None:
+            self.yscrollcommand(*self.yview())
+    
+    
+    def selection_clear(self, first=0, last='end'):
+        """Deselect every row."""
+        
+        self.selected.clear()
+        self.Redraw()
+    
+    
+    def size(self):
+        """Return the number of rows in the list."""
+        
+        return len(self.items)
+    
+    
+    def VisibleRows(self):
+        """Return the number of rows that fit in the widget's height."""
+        
+        return max(1, self.winfo_height() // self.row_height)
+    
+    
+    def yview(self, *args):
+        """Scroll the list, or return the visible fractions of the list.
+        
+        Accepts the same arguments a Scrollbar passes to 'Listbox.yview':
+            ('moveto', fraction) or ('scroll', number, 'units' or 'pages').
+        """
+        
+        if not args:
+            if not self.items:
+                return 0.0, 1.0
+            first = self.top / len(self.items)
+            last = min(1.0, (self.top + self.VisibleRows()) / len(self.items))
+            return first, last
+        
+        if args[0] == 'moveto':
+            self.yview_moveto(args[1])
+        elif args[0] == 'scroll':
+            self.yview_scroll(args[1], args[2])
+    
+    
+    def yview_moveto(self, fraction):
+        """Scroll so the row at 'fraction' of the list is at the top."""
+        
+        self.top = int(float(fraction) * len(self.items))
+        self.Redraw()
+    
+    
+    def yview_scroll(self, number, what):
+        """Scroll by a number of rows ('units') or screens ('pages')."""
+        
+        step = self.VisibleRows() if what == 'pages' else 1
+        self.top += int(number) * step
+        self.Redraw()
@@ -1,5 +1,7 @@
 import tkinter as tk
 
+import VirtualListbox
+
 BLUE = '#b0c4de'
 FONT = ('georgia', 12)
 YELLOW = '#ffefd5'
@@ -120,18 +122,18 @@ def CreateLabelFrame(parent, _text):
 
 
 def CreateListbox(parent, _scrollbar):
-    """Initialize and return a tkinter Listbox widget.
+    """Initialize and return a Listbox that only draws its visible rows.
     
     Arguments:
         parent: the Listbox's parent object
         _scrollbar: the Scrollbar widget attached to the Listbox
     
     Returns:
-        A tkinter Listbox widget
+        A VirtualListbox widget, where clicking a row toggles its selection
     """
 
-    return tk.Listbox(parent, yscrollcommand=_scrollbar.set, font=FONT,
-                      bg=WHITE, selectmode='multiple', activestyle='dotbox')
+    return VirtualListbox.VirtualListbox(parent, font=FONT, bg=WHITE,
+                                         yscrollcommand=_scrollbar.set)
 
 
 def CreateRadioButton(parent, _text, _var, _index):
@@ -0,0 +1,58 @@
+"""Checks that answer logs survive torn writes and lost indexes."""
+
+import pytest
+
+import AnswerLog
+import Benchmark
+import Question
+
+
+@pytest.fixture
+def entries():
+    return Benchmark.MakeEntries(20)
+
+
+def test_answer_log_discards_torn_record(tmp_path, entries):
+    log_file = str(tmp_path / 'user.log')
+    questions = [Question.FromEntry(entry) for entry in entries]
+    log = AnswerLog.AnswerLog(log_file)
+    for i, question in enumerate(questions):
+        log.Append(question, question.correct, True, 1.5, now=1000.0 + i)
+    log.Close()
+    with open(log_file, 'ab') as outfile:
+        outfile.write(b'\x00' * (AnswerLog.RECORD.size // 2))
+    
+    log = AnswerLog.AnswerLog(log_file)
+    assert log.count == len(questions)
+    records = [record for run in log.Scan() for record in run]
+    assert [record[1] for record in records] == \
+        [bytes.fromhex(question.Key()) for question in questions]
+    assert [record[4] for record in records] == \
+        [sum(1 << index for index in question.correct)
+         for question in questions]
+    log.Close()
+
+
+def test_answer_log_rebuilds_index(tmp_path, monkeypatch, entries):
+    monkeypatch.setattr(AnswerLog, 'INDEX_INTERVAL', 4)
+    log_file = str(tmp_path / 'user.log')
+    question = Question.FromEntry(entries[0])
+    log = AnswerLog.AnswerLog(log_file)
+    for i in range(10):
+        log.Append(question, [0], False, 0, now=float(i))
+    log.Close()
+    
+    # Lose the index, then the last records, as a crash might
+    with open(log_file + '.idx', 'wb'):
+        pass
+    with open(log_file, 'r+b') as outfile:
+        outfile.truncate(AnswerLog.RECORD.size * 9 - 1)
+    
+    log = AnswerLog.AnswerLog(log_file)
+    assert log.count == 8
+    with open(log_file + '.idx', 'rb') as infile:
+        index = list(AnswerLog.INDEX_ENTRY.iter_unpack(infile.read()))
+    assert index == [(4, 3.0), (8, 7.0)]
+    times = [record[0] for run in log.Scan(since=5.0) for record in run]
+    assert times[0] <= 5.0 and times[-1] == 7.0
+    log.Close()
@@ -0,0 +1,58 @@
+"""Checks that cached quiz files are found, invalidated, and evicted."""
+
+import os
+
+import BankCache
+
+
+def test_cached_questions_round_trip(tmp_path):
+    quiz_file = tmp_path / 'quiz.json'
+    quiz_file.write_text('[]')
+    cache = BankCache.BankCache(str(tmp_path / 'cache'))
+    st = os.stat(quiz_file)
+    assert cache.Get(str(quiz_file), st) is None
+    cache.Put(str(quiz_file), st, [('multi', 'Question', ['A', 'B'], 1)])
+    assert cache.Get(str(quiz_file), st) == \
+        [('multi', 'Question', ['A', 'B'], 1)]
+
+
+def test_edited_file_misses(tmp_path):
+    quiz_file = tmp_path / 'quiz.json'
+    quiz_file.write_text('[]')
+    cache = BankCache.BankCache(str(tmp_path / 'cache'))
+    cache.Put(str(quiz_file), os.stat(quiz_file), ['old'])
+    quiz_file.write_text('[{}]')
+    assert cache.Get(str(quiz_file), os.stat(quiz_file)) is None
+
+
+def test_other_version_ignored(tmp_path, monkeypatch):
+    quiz_file = tmp_path / 'quiz.json'
+    quiz_file.write_text('[]')
+    st = os.stat(quiz_file)
+    cache = BankCache.BankCache(str(tmp_path / 'cache'))
+    cache.Put(str(quiz_file), st, ['old'])
+    monkeypatch.setattr(BankCache, 'CACHE_MAGIC', b'QBC0')
+    assert cache.Get(str(quiz_file), st) is None
+
+
+def test_least_recently_used_evicted(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    cache = BankCache.BankCache(str(cache_dir), max_bytes=2500)
+    files = []
+    for i in range(2):
+        quiz_file = tmp_path / f'quiz{i}.json'
+        quiz_file.write_text('[]')
+        st = os.stat(quiz_file)
+        cache.Put(str(quiz_file), st, ['x' * 1000])
+        os.utime(cache.CachePath(BankCache.Key(str(quiz_file), st)),
+                 ns=(i * 10**9, i * 10**9))
+        files.append((str(quiz_file), st))
+    
+    # Reading the oldest entry keeps it over the next oldest
+    assert cache.Get(*files[0]) == ['x' * 1000]
+    quiz_file = tmp_path / 'quiz2.json'
+    quiz_file.write_text('[]')
+    cache.Put(str(quiz_file), os.stat(quiz_file), ['x' * 1000])
+    assert cache.Get(*files[0]) is not None
+    assert cache.Get(*files[1]) is None
+    assert len(os.listdir(cache_dir)) == 2
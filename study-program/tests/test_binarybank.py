@@ -0,0 +1,78 @@
+"""Checks of the binary quiz bank format and its recovery from bad files."""
+
+import json
+
+import pytest
+
+import Benchmark
+import BinaryBank
+import Question
+import QuizLoader
+
+@pytest.fixture
+def entries():
+    return Benchmark.MakeEntries(20)
+
+
+@pytest.fixture
+def quiz_file(tmp_path, entries):
+    path = tmp_path / 'quiz.json'
+    path.write_text(json.dumps(entries, indent=4))
+    return str(path)
+
+
+def test_binary_bank_round_trip(quiz_file, entries):
+    bank_file = BinaryBank.Convert(quiz_file)
+    bank = BinaryBank.BinaryBank(bank_file)
+    try:
+        assert len(bank) == len(entries)
+        for i, entry in enumerate(entries):
+            expected = Question.FromEntry(entry)
+            question = bank[i]
+            assert question.Record() == expected.Record()
+        with pytest.raises(IndexError):
+            bank[len(entries)]
+    finally:
+        bank.Close()
+
+
+def test_binary_bank_rejects_truncated_file(quiz_file):
+    bank_file = BinaryBank.Convert(quiz_file)
+    with open(bank_file, 'rb') as infile:
+        data = infile.read()
+    with open(bank_file, 'wb') as outfile:
+        outfile.write(data[:-1])
+    with pytest.raises(ValueError):
+        BinaryBank.BinaryBank(bank_file)
+
+
+def test_binary_bank_rejects_other_files(tmp_path):
+    path = tmp_path / 'empty.qbank'
+    path.write_bytes(b'')
+    with pytest.raises(ValueError):
+        BinaryBank.BinaryBank(str(path))
+    path.write_bytes(b'not a bank at all, just text')
+    with pytest.raises(ValueError):
+        BinaryBank.BinaryBank(str(path))
+
+
+def test_binary_bank_not_written_for_invalid_file(tmp_path, entries):
+    entries[5]['Correct'] = 'not one of the answers'
+    path = tmp_path / 'invalid.json'
+    path.write_text(json.dumps(entries))
+    with pytest.raises(ValueError):
+        BinaryBank.Convert(str(path))
+    assert [file.name for file in tmp_path.iterdir()] == ['invalid.json']
+
+
+def test_stream_closes_binary_banks(quiz_file, entries):
+    bank_file = BinaryBank.Convert(quiz_file)
+    stream = QuizLoader.BankStream([bank_file])
+    stream.Start()
+    while stream.loading:
+        stream.Wait()
+    bank, = stream.TakeBanks()
+    assert len(bank) == len(entries)
+    stream.Close()
+    with pytest.raises(ValueError):
+        bank[0]
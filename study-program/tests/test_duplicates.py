@@ -0,0 +1,38 @@
+"""Checks that near-duplicate questions are found the same way every run."""
+
+import os
+import subprocess
+import sys
+
+import Benchmark
+import NearDuplicates
+import Question
+
+SIGNATURE_SCRIPT = '''
+import Benchmark, NearDuplicates, Question
+index = NearDuplicates.NearDuplicateIndex(seed=7)
+for entry in Benchmark.MakeEntries(5):
+    question = Question.FromEntry(entry)
+    signature = index.Signature(question)
+    print(signature, list(NearDuplicates.BucketKeys(signature)),
+          NearDuplicates.AnswerKey(question))
+'''
+
+
+def test_reworded_copy_found():
+    entries = Benchmark.MakeEntries(10)
+    copy = dict(entries[3])
+    copy['Question'] = entries[3]['Question'].upper() + '?'
+    questions = [Question.FromEntry(entry) for entry in entries + [copy]]
+    assert NearDuplicates.FindGroups(questions) == [[3, 10]]
+
+
+def test_signatures_same_in_every_run():
+    directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    outputs = set()
+    for hash_seed in ['1', '2']:
+        env = dict(os.environ, PYTHONHASHSEED=hash_seed)
+        outputs.add(subprocess.run([sys.executable, '-c', SIGNATURE_SCRIPT],
+                                   cwd=directory, env=env, check=True,
+                                   capture_output=True, text=True).stdout)
+    assert len(outputs) == 1
@@ -0,0 +1,60 @@
+"""Checks that quiz files are streamed correctly, whatever their chunking."""
+
+import json
+from json.decoder import JSONDecodeError
+
+import pytest
+
+import QuizLoader
+
+
+@pytest.fixture
+def entries():
+    # Brackets, braces, and escapes within strings mustn't end an entry early
+    return [{'Type': 'single', 'Question': f'Question {i}: [{"é" * i}]?',
+             'Answer1': 'Yes', 'Answer2': 'No {"or" \\ maybe}',
+             'NumOfAnswers': 2, 'CharCount': 20, 'Correct': 'Yes'}
+            for i in range(20)]
+
+
+@pytest.fixture
+def quiz_file(tmp_path, entries):
+    path = tmp_path / 'quiz.json'
+    path.write_text(json.dumps(entries, indent=4))
+    return str(path)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64, 1 << 16])
+def test_iter_questions_across_chunk_boundaries(quiz_file, entries,
+                                                chunk_size):
+    assert list(QuizLoader.IterQuestions(quiz_file, chunk_size)) == entries
+
+
+@pytest.mark.parametrize('text', ['[]', '  [ ]  ', '[\n]'])
+def test_iter_questions_empty_array(tmp_path, text):
+    path = tmp_path / 'empty.json'
+    path.write_text(text)
+    assert list(QuizLoader.IterQuestions(str(path), 1)) == []
+
+
+@pytest.mark.parametrize('suffix', ['', ',', ', {"Question"'])
+def test_iter_questions_missing_close(tmp_path, entries, suffix):
+    path = tmp_path / 'torn.json'
+    path.write_text(json.dumps(entries)[:-1] + suffix)
+    with pytest.raises(JSONDecodeError):
+        list(QuizLoader.IterQuestions(str(path), 5))
+
+
+@pytest.mark.parametrize('text', ['{}', 'null', '[1 2]', '[1,]'])
+def test_iter_questions_malformed(tmp_path, text):
+    path = tmp_path / 'bad.json'
+    path.write_text(text)
+    with pytest.raises(JSONDecodeError):
+        list(QuizLoader.IterQuestions(str(path), 2))
+
+
+def test_iter_questions_stops_at_close(tmp_path, entries):
+    # Anything after the closing bracket isn't read
+    path = tmp_path / 'trailing.json'
+    path.write_text(json.dumps(entries) + ' trailing garbage')
+    assert list(QuizLoader.IterQuestions(str(path), 3)) == entries
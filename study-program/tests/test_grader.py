@@ -0,0 +1,35 @@
+"""Checks that batches of answer sheets are graded like single sheets."""
+
+import random
+
+import pytest
+
+import BatchGrader
+import Benchmark
+import Question
+
+
+def test_batch_matches_single_sheets():
+    questions = [Question.FromEntry(entry)
+                 for entry in Benchmark.MakeEntries(50)]
+    key = BatchGrader.AnswerKey(questions)
+    rng = random.Random(0)
+    sheets = [[rng.randrange(1 << len(question.answers))
+               for question in questions] for _ in range(40)]
+    assert key.Grade(sheets) == [key.GradeSheet(sheet) for sheet in sheets]
+
+
+@pytest.mark.parametrize('count', [0, 3])
+def test_empty_key(count):
+    key = BatchGrader.AnswerKey([])
+    assert key.Grade([[] for _ in range(count)]) == [(0, 0)] * count
+
+
+def test_duplicate_answer_text():
+    question = Question.FromEntry({
+        'Type': 'multi', 'Question': 'Pick A and B', 'NumOfAnswers': 3,
+        'Answer1': 'A', 'Answer2': 'A', 'Answer3': 'B',
+        'Correct': ['A', 'B']})
+    key = BatchGrader.AnswerKey([question])
+    sheets = [[key.Mask(0, choices)] for choices in ([0, 2], [1, 2], [0, 1])]
+    assert key.Grade(sheets) == [(1, 1), (1, 1), (0, 1)]
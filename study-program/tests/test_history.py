@@ -0,0 +1,43 @@
+"""Checks that file histories are copied out of the legacy file intact."""
+
+import os
+
+import FileHistory
+import Journal
+
+
+def test_migrate_leaves_legacy_files_alone(tmp_path):
+    legacy_file = str(tmp_path / 'previousfiles.json')
+    legacy = Journal.JournaledDict(legacy_file)
+    legacy.Set('alice', ['a.json'])
+    legacy.Set('bob', ['b.json', 'c.json'])
+    legacy.Close()
+    with open(legacy_file + '.journal', 'ab') as outfile:
+        outfile.write(b'["carol",["d.js')
+    before = sorted(os.listdir(tmp_path))
+    with open(legacy_file + '.journal', 'rb') as infile:
+        journal = infile.read()
+    
+    history = FileHistory.FileHistory(str(tmp_path / 'history'),
+                                      legacy_file=legacy_file)
+    assert history.Get('alice') == ['a.json']
+    assert history.Get('bob') == ['b.json', 'c.json']
+    assert history.Get('carol') is None
+    
+    # The torn record is skipped without truncating the legacy journal
+    assert sorted(os.listdir(tmp_path)) == sorted(before + ['history'])
+    with open(legacy_file + '.journal', 'rb') as infile:
+        assert infile.read() == journal
+
+
+def test_existing_histories_kept(tmp_path):
+    legacy_file = str(tmp_path / 'previousfiles.json')
+    legacy = Journal.JournaledDict(legacy_file)
+    legacy.Set('alice', ['old.json'])
+    legacy.Close()
+    history_dir = str(tmp_path / 'history')
+    
+    history = FileHistory.FileHistory(history_dir)
+    history.Set('alice', ['new.json'])
+    assert history.Migrate(legacy_file) == 0
+    assert history.Get('alice') == ['new.json']
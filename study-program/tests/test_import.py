@@ -0,0 +1,32 @@
+"""Checks that importing a folder finds each valid quiz file once."""
+
+import json
+import os
+
+import Benchmark
+import QuizLoader
+
+
+def test_scan_folder(tmp_path):
+    entries = Benchmark.MakeEntries(5)
+    (tmp_path / 'nested' / 'deeper').mkdir(parents=True)
+    for name in ['a.json', 'nested/b.JSON', 'nested/deeper/c.json',
+                 'listed.json']:
+        (tmp_path / name).write_text(json.dumps(entries))
+    (tmp_path / 'empty.json').write_text('[]')
+    (tmp_path / 'nested' / 'broken.json').write_text('[{"Type": ')
+    (tmp_path / 'notes.txt').write_text('not a quiz')
+    
+    listed = QuizLoader.PathKey(str(tmp_path / 'listed.json'))
+    valid, invalid = QuizLoader.ScanFolder(str(tmp_path), {listed})
+    assert valid == sorted(os.path.join(str(tmp_path), name) for name in
+                           ['a.json', os.path.join('nested', 'b.JSON'),
+                            os.path.join('nested', 'deeper', 'c.json')])
+    assert [path for path, problems in invalid] == \
+        sorted(os.path.join(str(tmp_path), name) for name in
+               ['empty.json', os.path.join('nested', 'broken.json')])
+    assert all(problems for path, problems in invalid)
+
+
+def test_scan_empty_folder(tmp_path):
+    assert QuizLoader.ScanFolder(str(tmp_path)) == ([], [])
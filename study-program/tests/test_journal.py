@@ -0,0 +1,79 @@
+"""Checks that journaled dictionaries survive crashes and failed writes."""
+
+import pytest
+
+import Journal
+
+
+def test_journal_replays_changes(tmp_path):
+    snapshot = str(tmp_path / 'data.json')
+    journal = Journal.JournaledDict(snapshot)
+    journal.Set('a', [1])
+    journal.Set('b', [2])
+    journal.Set('a', None)
+    journal.Close()
+    
+    journal = Journal.JournaledDict(snapshot)
+    assert journal.data == {'b': [2]}
+    journal.Close()
+
+
+@pytest.mark.parametrize('torn', [b'["c",[3', b'garbage\n', b'["c"]\n'])
+def test_journal_discards_torn_record(tmp_path, torn):
+    snapshot = str(tmp_path / 'data.json')
+    journal = Journal.JournaledDict(snapshot)
+    journal.Set('a', [1])
+    journal.Close()
+    with open(snapshot + '.journal', 'rb') as infile:
+        good = infile.read()
+    with open(snapshot + '.journal', 'ab') as outfile:
+        outfile.write(torn + b'["d",[4]]\n')
+    
+    journal = Journal.JournaledDict(snapshot)
+    assert journal.data == {'a': [1]}
+    journal.Close()
+    with open(snapshot + '.journal', 'rb') as infile:
+        assert infile.read() == good
+
+
+def test_journal_compaction(tmp_path):
+    snapshot = str(tmp_path / 'data.json')
+    journal = Journal.JournaledDict(snapshot, compact_size=64)
+    for i in range(20):
+        journal.Set(f'key{i}', [i])
+    journal.Close()
+    
+    journal = Journal.JournaledDict(snapshot)
+    assert journal.data == {f'key{i}': [i] for i in range(20)}
+    journal.Close()
+
+
+def test_failed_compaction_reported_once(tmp_path, monkeypatch):
+    compactions = []
+    
+    def FailingDump(*args, **kwargs):
+        compactions.append(args[0])
+        raise OSError('disk full')
+    
+    monkeypatch.setattr(Journal.json, 'dump', FailingDump)
+    snapshot = str(tmp_path / 'data.json')
+    journal = Journal.JournaledDict(snapshot, compact_size=64)
+    errors = []
+    for i in range(40):
+        try:
+            journal.Set(f'key{i}', [i])
+        except OSError as e:
+            errors.append(e)
+        if journal.compactor is not None:
+            journal.compactor.join()
+    journal.Close()
+    
+    # Each retry waits for the journal to grow by another threshold
+    assert len(errors) == len(compactions)
+    assert 1 < len(compactions) < 10
+    assert not (tmp_path / 'data.json.tmp').exists()
+    
+    monkeypatch.undo()
+    journal = Journal.JournaledDict(snapshot)
+    assert journal.data == {f'key{i}': [i] for i in range(40)}
+    journal.Close()
@@ -0,0 +1,51 @@
+"""Checks that question IDs ignore formatting and duplicates load once."""
+
+import json
+
+import Benchmark
+import Question
+import QuizLoader
+
+
+def MakeEntry(question, answers, correct):
+    entry = {'Type': 'multi', 'Question': question,
+             'NumOfAnswers': len(answers), 'Correct': correct}
+    for i, answer in enumerate(answers, 1):
+        entry[f'Answer{i}'] = answer
+    return entry
+
+
+def test_key_ignores_order_case_and_spacing():
+    key = Question.FromEntry(MakeEntry('Which are  primes?',
+                                       ['2', '3', '4'], ['2', '3'])).Key()
+    same = Question.FromEntry(MakeEntry(' which ARE primes? ',
+                                        ['4', '3', '2'], ['3', '2'])).Key()
+    assert key == same and len(key) == 24
+    assert Question.FromEntry(MakeEntry('Which are primes?', ['2', '3', '4'],
+                                        ['2'])).Key() != key
+    assert Question.FromEntry(MakeEntry('Which are primes?', ['2', '3', '5'],
+                                        ['2', '3'])).Key() != key
+
+
+def test_key_kept_in_record():
+    question = Question.FromEntry(Benchmark.MakeEntries(1)[0])
+    assert Question.FromRecord(question.Record()).Key() == question.Key()
+
+
+def test_duplicates_dropped_at_load(tmp_path):
+    entries = Benchmark.MakeEntries(10, 1)
+    paths = [str(tmp_path / 'a.json'), str(tmp_path / 'b.json')]
+    with open(paths[0], 'w') as outfile:
+        json.dump(entries, outfile)
+    with open(paths[1], 'w') as outfile:
+        json.dump(entries[5:] + Benchmark.MakeEntries(5, 2), outfile)
+    
+    stream = QuizLoader.BankStream(paths)
+    stream.Start()
+    questions = []
+    while stream.loading:
+        questions.extend(stream.Wait())
+    questions.extend(stream.Poll())
+    assert len(questions) == 15
+    assert len({question.Key() for question in questions}) == 15
+    assert stream.duplicates == 5
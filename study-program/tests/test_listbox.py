@@ -0,0 +1,37 @@
+"""Checks that the virtual list keeps its rows and selection in step."""
+
+import tkinter as tk
+
+import pytest
+
+import VirtualListbox
+
+
+@pytest.fixture
+def listbox():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip('no display available')
+    listbox = VirtualListbox.VirtualListbox(root, font=('georgia', 12),
+                                            bg='#f8f8ff')
+    yield listbox
+    root.destroy()
+
+
+def test_delete_indices_shifts_selection(listbox):
+    listbox.insert('end', *'abcdefg')
+    listbox.selected.update({1, 3, 6})
+    listbox.DeleteIndices([3, 0, 5, 9])
+    assert [listbox.get(i) for i in range(listbox.size())] == list('bceg')
+    assert listbox.curselection() == (0, 3)
+
+
+def test_insert_shifts_selection(listbox):
+    listbox.insert('end', 'a', 'b')
+    listbox.selected.add(1)
+    listbox.insert(0, 'x', 'y')
+    assert listbox.get(3) == 'b'
+    assert listbox.curselection() == (3,)
+    listbox.delete(0, 'end')
+    assert listbox.size() == 0 and listbox.curselection() == ()
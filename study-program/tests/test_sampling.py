@@ -0,0 +1,68 @@
+"""Checks that sampled quizzes hold as many questions as were asked for."""
+
+import json
+
+import pytest
+
+import Benchmark
+import QuizLoader
+
+
+def Load(stream):
+    stream.Start()
+    questions = []
+    while stream.loading:
+        questions.extend(stream.Wait())
+    return questions + stream.Poll()
+
+
+def WriteQuiz(tmp_path, name, count, seed):
+    path = tmp_path / name
+    path.write_text(json.dumps(Benchmark.MakeEntries(count, seed)))
+    return str(path)
+
+
+def test_sampled_stream_ready_once_read(tmp_path):
+    path = tmp_path / 'empty.json'
+    path.write_text('[]')
+    stream = QuizLoader.BankStream([str(path)], sample_size=5)
+    assert not stream.IsReady()
+    stream.Start()
+    while stream.loading:
+        stream.Wait()
+    assert stream.IsReady() and stream.IsEmpty()
+
+
+@pytest.mark.parametrize('stratify', [False, True])
+def test_failed_file_share_made_up(tmp_path, stratify):
+    paths = [WriteQuiz(tmp_path, 'a.json', 10, 1),
+             str(tmp_path / 'missing.json'),
+             WriteQuiz(tmp_path, 'b.json', 10, 2)]
+    stream = QuizLoader.BankStream(paths, sample_size=7, stratify=stratify)
+    assert len(Load(stream)) == 7
+    assert stream.failed == [paths[1]]
+
+
+def test_small_file_share_made_up(tmp_path):
+    paths = [WriteQuiz(tmp_path, 'small.json', 1, 1),
+             WriteQuiz(tmp_path, 'large.json', 20, 2)]
+    stream = QuizLoader.BankStream(paths, sample_size=6, stratify=True)
+    questions = Load(stream)
+    assert len(questions) == 6
+    small = Benchmark.MakeEntries(1, 1)[0]['Question']
+    assert sum(question.question == small for question in questions) == 1
+
+
+@pytest.mark.parametrize('stratify', [False, True])
+def test_duplicates_replaced(tmp_path, stratify):
+    # Both files hold the same ten questions, and one holds ten more
+    entries = Benchmark.MakeEntries(20, 1)
+    paths = [str(tmp_path / 'a.json'), str(tmp_path / 'b.json')]
+    with open(paths[0], 'w') as outfile:
+        json.dump(entries[:10], outfile)
+    with open(paths[1], 'w') as outfile:
+        json.dump(entries, outfile)
+    stream = QuizLoader.BankStream(paths, sample_size=15, stratify=stratify)
+    questions = Load(stream)
+    assert len(questions) == 15
+    assert len({question.Key() for question in questions}) == 15
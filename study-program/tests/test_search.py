@@ -0,0 +1,54 @@
+"""Checks of the full-text search index and the quizzes launched from it."""
+
+import json
+import sqlite3
+
+import pytest
+
+import Benchmark
+import BinaryBank
+import QuizLoader
+import SearchIndex
+
+
+@pytest.fixture
+def entries():
+    return Benchmark.MakeEntries(20)
+
+
+@pytest.fixture
+def quiz_file(tmp_path, entries):
+    path = tmp_path / 'quiz.json'
+    path.write_text(json.dumps(entries, indent=4))
+    return str(path)
+
+
+def test_search_finds_indexed_question(quiz_file, entries):
+    index = SearchIndex.SearchIndex(':memory:')
+    index.Update([quiz_file])
+    word = SearchIndex.WORD_PATTERN.findall(entries[5]['Question'])[0]
+    results = index.Search(word, [quiz_file])
+    assert (quiz_file, 5, entries[5]['Question']) in results
+    index.Close()
+
+
+def test_unavailable_index(monkeypatch):
+    def Fail(index_file):
+        raise sqlite3.OperationalError('no such module: fts5')
+    
+    monkeypatch.setattr(SearchIndex, 'SearchIndex', Fail)
+    index, error = SearchIndex.LoadSearchIndex()
+    assert index is None and error
+
+
+@pytest.mark.parametrize('binary', [False, True])
+def test_stale_selection_fails(quiz_file, entries, binary):
+    path = BinaryBank.Convert(quiz_file) if binary else quiz_file
+    selection = {path: [1, len(entries)]}
+    stream = QuizLoader.BankStream([path], selection=selection)
+    stream.Start()
+    while stream.loading:
+        stream.Wait()
+    assert stream.IsReady() and stream.IsEmpty()
+    assert stream.failed == [path]
+    assert 'changed' in stream.reasons[path]
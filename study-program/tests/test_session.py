@@ -0,0 +1,141 @@
+"""Checks of how a quiz session draws and grades questions."""
+
+import random
+
+import pytest
+
+import Benchmark
+import Question
+import QuizSession
+import Scheduler
+
+
+def MakeQuestion(q_type, answers, correct):
+    entry = {'Type': q_type, 'Question': 'Which?',
+             'NumOfAnswers': len(answers), 'Correct': correct}
+    for i, answer in enumerate(answers, 1):
+        entry[f'Answer{i}'] = answer
+    return Question.FromEntry(entry)
+
+
+def Ask(question, choices):
+    session = QuizSession.QuizSession([question], rng=random.Random(0))
+    session.NextQuestion()
+    return session.SubmitAnswer(choices)
+
+
+@pytest.mark.parametrize('choice, result', [(1, True), (0, False),
+                                            (2, False)])
+def test_single_answer_graded(choice, result):
+    question = MakeQuestion('single', ['A', 'B', 'C'], 'B')
+    assert Ask(question, [choice]) is result
+
+
+@pytest.mark.parametrize('choices, result', [
+    ([0, 2], True), ([2, 0], True), ([0], False), ([0, 1, 2], False),
+    ([1], False)])
+def test_multi_answer_graded(choices, result):
+    question = MakeQuestion('multi', ['A', 'B', 'C'], ['A', 'C'])
+    assert Ask(question, choices) is result
+
+
+def test_answer_submitted_once():
+    question = MakeQuestion('single', ['A', 'B'], 'A')
+    session = QuizSession.QuizSession([question], rng=random.Random(0))
+    assert session.SubmitAnswer([0]) is None
+    session.NextQuestion()
+    assert session.SubmitAnswer([]) is None
+    assert session.SubmitAnswer([0]) is True
+    assert session.SubmitAnswer([1]) is None
+    assert session.Score() == (1, 1, 1.0)
+
+
+def test_every_question_asked_once():
+    questions = [MakeQuestion('single', ['A', 'B'], 'A') for _ in range(20)]
+    session = QuizSession.QuizSession(questions[:10], rng=random.Random(0))
+    assert session.Score() == (0, 0, None)
+    asked = []
+    while session.NextQuestion() is not None:
+        asked.append(session.current)
+        assert sorted(session.answer_order) == [0, 1]
+        session.SubmitAnswer([session.question_num % 2])
+        if len(asked) == 5:
+            session.AddQuestions(questions[10:])
+    assert sorted(map(id, asked)) == sorted(map(id, questions))
+    assert session.question_num == 20
+    assert session.Score() == (10, 20, 0.5)
+
+
+@pytest.fixture
+def questions():
+    return [Question.FromEntry(entry) for entry in Benchmark.MakeEntries(50)]
+
+
+class CountingBank(list):
+    """A bank that counts the questions decoded from it."""
+    
+    decoded = 0
+    
+    def __getitem__(self, index):
+        self.decoded += 1
+        return super().__getitem__(index)
+
+
+def test_scheduled_draws_from_bank_are_capped(questions):
+    scheduler = Scheduler.Scheduler(None)
+    for question in questions:
+        scheduler.Record(question.Key(), True)
+    bank = CountingBank(questions)
+    session = QuizSession.QuizSession(rng=random.Random(0),
+                                      scheduler=scheduler)
+    session.AddBank(bank)
+    
+    # Nothing is due, so the question due soonest among those drawn is asked
+    assert session.NextQuestion() is not None
+    assert bank.decoded == QuizSession.MAX_BANK_DRAWS
+    assert session.Remaining() == len(questions) - 1
+    asked = {session.current.Key()}
+    while session.NextQuestion() is not None:
+        asked.add(session.current.Key())
+    assert len(asked) == len(questions)
+    scheduler.Close()
+
+
+@pytest.mark.parametrize('choices, result', [
+    ([0, 2], True), ([1, 2], True), ([2, 1], True), ([0, 1, 2], False),
+    ([0, 1], False), ([2], False)])
+def test_duplicate_answer_text_multi(choices, result):
+    question = Question.FromEntry({
+        'Type': 'multi', 'Question': 'Pick A and B', 'NumOfAnswers': 3,
+        'Answer1': 'A', 'Answer2': 'A', 'Answer3': 'B',
+        'Correct': ['A', 'B']})
+    assert question.correct == (0, 2)
+    assert Ask(question, choices) is result
+
+
+@pytest.mark.parametrize('choices, result', [
+    ([0, 1, 2], True), ([0, 2], False), ([1, 2], False)])
+def test_duplicate_correct_text_multi(choices, result):
+    question = Question.FromEntry({
+        'Type': 'multi', 'Question': 'Pick both A and B', 'NumOfAnswers': 3,
+        'Answer1': 'A', 'Answer2': 'A', 'Answer3': 'B',
+        'Correct': ['A', 'A', 'B']})
+    assert Ask(question, choices) is result
+
+
+@pytest.mark.parametrize('choice, result', [(0, True), (1, True),
+                                            (2, False)])
+def test_duplicate_answer_text_single(choice, result):
+    question = Question.FromEntry({
+        'Type': 'single', 'Question': 'Pick A', 'NumOfAnswers': 3,
+        'Answer1': 'A', 'Answer2': 'A', 'Answer3': 'B', 'Correct': 'A'})
+    assert Ask(question, [choice]) is result
+
+
+def test_correct_mask_survives_record():
+    question = MakeQuestion('multi', ['A', 'B', 'C', 'D'], ['B', 'D'])
+    assert question.correct_mask == 0b1010
+    assert Question.ChoiceMask([3, 1]) == question.correct_mask
+    copy = Question.FromRecord(question.Record())
+    assert copy.correct_mask == question.correct_mask
+    assert Ask(copy, [1, 3]) is True
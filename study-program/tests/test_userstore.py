@@ -0,0 +1,58 @@
+"""Checks of the keyed account store and its import of 'users.json'."""
+
+import json
+
+import UserStore
+
+
+def MakeUser(username, password='secret'):
+    return {'User': username, 'Password': password,
+            'CreationDate': '2020-01-01', 'LastLogIn': '2020-01-02'}
+
+
+def test_accounts_round_trip(tmp_path):
+    db_file = str(tmp_path / 'users.db')
+    store = UserStore.UserStore(db_file)
+    assert store.IsEmpty()
+    assert store.AddUser(MakeUser('ada'))
+    assert not store.AddUser(MakeUser('ada', 'other'))
+    store.SetPassword('ada', 'changed')
+    store.SetLastLogIn('ada', '2021-05-06')
+    store.Close()
+    
+    store = UserStore.UserStore(db_file)
+    assert store.GetUser('ada') == {'User': 'ada', 'Password': 'changed',
+                                    'CreationDate': '2020-01-01',
+                                    'LastLogIn': '2021-05-06'}
+    assert store.GetUser('grace') is None
+    store.Close()
+
+
+def test_import_skips_malformed_records(tmp_path):
+    legacy_file = tmp_path / 'users.json'
+    legacy_file.write_text(json.dumps([MakeUser('ada'), {'User': 'grace'},
+                                       {'Password': 'secret'}, 'linus',
+                                       {'User': 7, 'Password': 'secret'},
+                                       MakeUser('alan')]))
+    store = UserStore.UserStore(str(tmp_path / 'users.db'),
+                                str(legacy_file))
+    assert store.GetUser('ada') == MakeUser('ada')
+    assert store.GetUser('alan') == MakeUser('alan')
+    assert store.GetUser('grace') is None
+    assert store.ImportJSON(str(legacy_file)) == 0
+    store.Close()
+
+
+def test_import_unreadable_file(tmp_path):
+    legacy_file = tmp_path / 'users.json'
+    legacy_file.write_text('[{"User": "ada"')
+    store = UserStore.UserStore(str(tmp_path / 'users.db'))
+    assert store.ImportJSON(str(legacy_file)) == 0
+    assert store.ImportJSON(str(tmp_path / 'missing.json')) == 0
+    assert store.IsEmpty()
+    store.Close()
+
+
+def test_password_matches():
+    assert UserStore.PasswordMatches('secret', 'secret')
+    assert not UserStore.PasswordMatches('secret', 'Secret')
@@ -0,0 +1,63 @@
+"""Checks that quiz files split into ranges are reported as a whole."""
+
+import json
+import os
+import random
+
+import pytest
+
+import BankValidator
+import Benchmark
+
+
+@pytest.fixture
+def entries():
+    entries = Benchmark.MakeEntries(500)
+    rng = random.Random(0)
+    for i in rng.sample(range(len(entries)), 30):
+        del entries[i][rng.choice(['Answer1', 'Correct', 'NumOfAnswers'])]
+    
+    # Text that looks like the start of a record, and characters that take
+    #   several bytes, so ranges begin in awkward places
+    for i in rng.sample(range(len(entries)), 60):
+        entries[i]['Question'] += ' {"Type": "single"}, {"a": "é漢"}]'
+    return entries
+
+
+@pytest.mark.parametrize('indent', [None, 4])
+@pytest.mark.parametrize('split', [97, 1000, 4096])
+def test_ranges_match_whole_file(tmp_path, entries, indent, split):
+    path = str(tmp_path / 'quiz.json')
+    with open(path, 'w', encoding='utf-8') as outfile:
+        json.dump(entries, outfile, indent=indent, ensure_ascii=False)
+    size = os.path.getsize(path)
+    
+    ranges = [BankValidator.ValidateRange(path, start,
+                                          min(start + split, size))
+              for start in range(0, size, split)]
+    report = BankValidator.ValidateFile(path)
+    assert report['errors']
+    assert BankValidator.MergeRanges(path, ranges) == report
+
+
+def test_unreadable_ranges_are_checked_whole(tmp_path, entries, monkeypatch):
+    monkeypatch.setattr(BankValidator, 'PARALLEL_BYTES', 0)
+    monkeypatch.setattr(BankValidator, 'SPLIT_BYTES', 1000)
+    path = str(tmp_path / 'torn.json')
+    with open(path, 'w') as outfile:
+        outfile.write(json.dumps(entries)[:-100])
+    
+    reports = BankValidator.ValidateFiles([path], workers=2)
+    assert reports == [BankValidator.ValidateFile(path)]
+    assert reports[0]['error']
+
+
+@pytest.mark.parametrize('count', [BankValidator.MAX_ANSWERS,
+                                   BankValidator.MAX_ANSWERS + 1])
+def test_answer_limit(count):
+    entry = {'Type': 'single', 'Question': 'Pick one', 'NumOfAnswers': count,
+             'Correct': 'Answer 1'}
+    for i in range(count):
+        entry[f'Answer{i+1}'] = f'Answer {i+1}'
+    errors = BankValidator.CheckEntry(entry)
+    assert bool(errors) == (count > BankValidator.MAX_ANSWERS)
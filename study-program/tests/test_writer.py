@@ -0,0 +1,54 @@
+"""Checks that the background writer coalesces saves and reports errors."""
+
+import threading
+
+import Background
+
+
+def test_burst_written_once():
+    written = []
+    writer = Background.CoalescingWriter(
+        lambda key, value: written.append((key, value)), delay=5)
+    for i in range(100):
+        writer.Submit('user', i)
+    writer.Submit('other', 'x')
+    
+    # Flushing doesn't wait out the delay
+    assert writer.Flush() == []
+    assert sorted(written) == [('other', 'x'), ('user', 99)]
+    assert writer.Close() == []
+
+
+def test_errors_returned_once():
+    def Write(key, value):
+        if value == 'bad':
+            raise IOError('disk full')
+    
+    writer = Background.CoalescingWriter(Write, delay=0)
+    writer.Submit('user', 'bad')
+    errors = writer.Flush()
+    assert len(errors) == 1 and isinstance(errors[0], IOError)
+    writer.Submit('user', 'good')
+    assert writer.Close() == []
+
+
+def test_close_writes_pending_values():
+    started = threading.Event()
+    release = threading.Event()
+    written = []
+    
+    def Write(key, value):
+        started.set()
+        release.wait()
+        written.append(value)
+    
+    writer = Background.CoalescingWriter(Write, delay=0)
+    writer.Submit('user', 1)
+    started.wait()
+    
+    # Values submitted during a write are written after it
+    writer.Submit('user', 2)
+    writer.Submit('user', 3)
+    release.set()
+    assert writer.Close() == []
+    assert written == [1, 3]